@@ -2,13 +2,12 @@
 # Web情報を活用して「チャネル別コピー」「Instagramリール（3カット＋字幕）」
 # 「実行計画（What/How/Action）」を動的生成。salt/nonce に対応し出力の多様性を担保。
 from __future__ import annotations
-import re
-import html
 import random
+import asyncio
 import hashlib
-from dataclasses import dataclass
-from typing import Dict, Any, List, Optional
 from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from urllib.parse import quote_plus, urlparse
 
 # ============ 依存（存在しない場合も落ちないように） ============
@@ -20,6 +19,14 @@ except Exception:
     requests = None
     BeautifulSoup = None
     feedparser = None
+try:  # パッケージ（web_consult_ai）として読み込まれた場合
+    from . import (copy_templates, diversity, html_extract, http_cache, http_client, keypoint_index, near_dup,
+                   parse_pool, result_cache)
+    from .keypoints import count_ngrams, extract_keypoints, merge_counts, rank_keypoints
+except ImportError:  # streamlit_app.py から単体モジュールとして読み込まれた場合
+    import copy_templates, diversity, html_extract, http_cache, http_client, keypoint_index, near_dup, \
+        parse_pool, result_cache
+    from keypoints import count_ngrams, extract_keypoints, merge_counts, rank_keypoints
 
 # ============ 既存互換の最低限ダミー定義 =============
 INDUSTRY_WEIGHTS = {
@@ -124,213 +131,423 @@ def _ensure_variety(make_one, n: int, max_retry: int = 3) -> list[str]:
     make_one() を呼び出して n 件作る。重複が多い場合は最大 max_retry 回まで作り直し。
     """
     out: list[str] = []
+    seen = set()
     tries = 0
     while len(out) < n and tries < n * (1 + max_retry):
         v = make_one()
         tries += 1
-        if v not in out:
-            out.append(v)
+        if v not in seen:
+            seen.add(v); out.append(v)
     return out
 
 # ============ Web収集ユーティリティ ============
+# 収集〜本文抽出は asyncio ネイティブ（a* 関数）。同期版はその薄いラッパー。
+# 通信はすべて http_client の共有プール経由（keep-alive・ホスト別プール・リトライ）。
 DEFAULT_SOURCES = [
     "https://news.google.com/rss/search?q={query}&hl=ja&gl=JP&ceid=JP:ja",
 ]
 
-def fetch_web_sources(query: str, extra_urls: Optional[List[str]] = None, limit: int = 10, timeout: float = 8.0) -> List[Dict[str, str]]:
+# ダウンロード上限。巨大ページやPDF/画像は本文を読まずに打ち切る
+ARTICLE_MAX_BYTES = 2 * 1024 * 1024
+ARTICLE_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+FEED_MAX_BYTES = 1024 * 1024
+# 同じ配信記事が複数媒体に載るので、見出しの重複をまとめる分だけ多めにRSSから拾う
+FEED_OVERSAMPLE = 2
+
+# 並列取得の既定値（1バッチ全体の締切は deadline 秒）
+SCRAPE_MAX_WORKERS = 8
+SCRAPE_PER_HOST = 2
+SCRAPE_DEADLINE = 20.0
+
+def _parse_feed(body: bytes, limit: int) -> List[Dict[str, str]]:
+    out: List[Dict[str, str]] = []
+    d = feedparser.parse(body)
+    for e in d.entries[: limit]:
+        url = getattr(e, "link", None)
+        if not url: continue
+        out.append({
+            "title": getattr(e, "title", "").strip(),
+            "url": url,
+            "source": urlparse(url).netloc,
+            "published": getattr(e, "published", "") or getattr(e, "updated", ""),
+        })
+    return out
+
+async def afetch_web_sources(query: str, extra_urls: Optional[List[str]] = None, limit: int = 10,
+                             timeout: float = 8.0) -> List[Dict[str, str]]:
     results: List[Dict[str, str]] = []
-    if not (requests and feedparser):
+    if not (http_client.available() and feedparser):
         return results
     q = quote_plus(query)
     feeds = [u.format(query=q) for u in DEFAULT_SOURCES]
-    try:
-        for feed_url in feeds:
-            d = feedparser.parse(feed_url)
-            for e in d.entries[: limit]:
-                url = getattr(e, "link", None)
-                if not url: continue
-                results.append({
-                    "title": getattr(e, "title", "").strip(),
-                    "url": url,
-                    "source": urlparse(url).netloc,
-                    "published": getattr(e, "published", "") or getattr(e, "updated", ""),
-                })
-    except Exception:
-        pass
+    for feed_url in feeds:
+        try:
+            res = await http_client.aget(feed_url, timeout=timeout, cache="rss", max_bytes=FEED_MAX_BYTES,
+                                         provider="google_news")
+            if res.status == 200:
+                results.extend(_parse_feed(res.content, limit * FEED_OVERSAMPLE))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
     for u in (extra_urls or []):
         if u and isinstance(u, str):
             results.append({"title": "", "url": u.strip(), "source": urlparse(u).netloc, "published": ""})
-    # de-dup
+    # de-dup（URL一致 → 見出しの近似一致。まとめた媒体は "alternates" に残す）
     uniq, seen = [], set()
     for r in results:
         if r["url"] in seen: continue
         seen.add(r["url"]); uniq.append(r)
+    uniq = near_dup.collapse(uniq, near_dup.cluster_titles([r["title"] for r in uniq]))
     return uniq[:limit]
 
-def scrape_and_clean(url: str, timeout: float = 8.0) -> str:
-    if not (requests and BeautifulSoup): 
+def fetch_web_sources(query: str, extra_urls: Optional[List[str]] = None, limit: int = 10, timeout: float = 8.0) -> List[Dict[str, str]]:
+    return http_client.run_sync(afetch_web_sources(query, extra_urls=extra_urls, limit=limit, timeout=timeout))
+
+def clean_html(markup: str) -> str:
+    """本文抽出。lxml / selectolax があれば高速バックエンドを使う（出力は bs4 版と同一）。"""
+    return html_extract.extract_text(markup)
+
+def _clean_key(url: str, res: "http_client.HttpResponse") -> tuple:
+    return (html_extract.rules_version(), url, hashlib.sha256(res.content).hexdigest())
+
+def _clean_cached(url: str, res: "http_client.HttpResponse") -> str:
+    """
+    URL＋本文ハッシュ＋抽出ルール版で本文キャッシュを引く。同じ記事なら再パースしない。
+    """
+    store = http_cache.get_cache()
+    if store is None:
+        return clean_html(res.text)
+    parts = _clean_key(url, res)
+    hit = store.get_derived("clean", *parts)
+    if hit is not None:
+        return hit.decode("utf-8")
+    text = clean_html(res.text)
+    store.put_derived("clean", text.encode("utf-8"), *parts)
+    if text:
+        _index_documents([url], [count_ngrams(text)])
+    return text
+
+def _index_documents(urls: List[str], partials: list) -> Optional["keypoint_index.KeypointIndex"]:
+    """記事ごとの n-gram を文書頻度インデックスへ追加（同じURLは1回だけ数える）。"""
+    index = keypoint_index.get_index()
+    if index is None:
+        return None
+    try:
+        index.add_documents((u, (t for t, _ in c.items())) for u, c in zip(urls, partials) if len(c))
+    except Exception:
+        return None
+    return index
+
+def _clean_and_rank(urls: List[str], responses: List[Optional["http_client.HttpResponse"]], top_k: int = 20) -> tuple:
+    """
+    本文抽出＋n-gram集計＋キーワード順位付けをまとめて実行（キャッシュ済みの本文は集計のみ）。
+    WEB_CONSULT_PARSE_WORKERS を設定するとプロセスプールで並列化される。
+    順位は過去に取得した全記事の文書頻度による TF-IDF（索引が育つまでは出現回数順）。
+    本文がほぼ同一の記事（配信記事の転載など）は1本として数える。
+    戻り値: (本文リスト, キーワード, 各記事の代表記事インデックス)
+    """
+    store = http_cache.get_cache()
+    items, keys = [], []
+    for url, res in zip(urls, responses):
+        parts, hit = None, None
+        if res is not None and store is not None:
+            parts = _clean_key(url, res)
+            hit = store.get_derived("clean", *parts)
+        if res is None:
+            items.append(parse_pool.ParseItem(text=""))
+        elif hit is not None:
+            items.append(parse_pool.ParseItem(text=hit.decode("utf-8"))); parts = None
+        else:
+            items.append(parse_pool.ParseItem(body=res.content, encoding=res.encoding))
+        keys.append(parts)
+    texts, counts, partials = parse_pool.parse_batch(items)
+    for parts, text in zip(keys, texts):
+        if parts is not None:
+            store.put_derived("clean", text.encode("utf-8"), *parts)
+    primary = near_dup.cluster_texts(texts)
+    if not any(texts):
+        return texts, [], primary
+    keep = [i for i, p in enumerate(primary) if p == i]
+    if len(keep) < len(texts):
+        counts = merge_counts(partials[i] for i in keep)
+    index = _index_documents([urls[i] for i in keep], [partials[i] for i in keep])
+    try:
+        return texts, index.rank(counts, top_k) if index is not None else rank_keypoints(counts, top_k), primary
+    except Exception:
+        return texts, rank_keypoints(counts, top_k), primary
+
+async def _afetch_article(url: str, timeout: float = 8.0) -> Optional["http_client.HttpResponse"]:
+    try:
+        res = await http_client.aget(url, timeout=timeout, cache="article",
+                                     max_bytes=ARTICLE_MAX_BYTES, accept=ARTICLE_TYPES)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        return None
+    return res if res.status == 200 and not res.rejected else None
+
+async def ascrape_and_clean(url: str, timeout: float = 8.0) -> str:
+    if not (http_client.available() and html_extract.available_backends()):
+        return ""
+    res = await _afetch_article(url, timeout)
+    if res is None:
         return ""
     try:
-        res = requests.get(url, timeout=timeout, headers={"User-Agent":"Mozilla/5.0"})
-        if res.status_code != 200: 
-            return ""
-        soup = BeautifulSoup(res.text, "html.parser")
-        for s in soup(["script","style","noscript","header","footer","form","nav","aside"]):
-            s.decompose()
-        cand = soup.find("article") or soup.find("main") or soup.find("section") or soup.body
-        text = cand.get_text("\n", strip=True) if cand else soup.get_text("\n", strip=True)
-        text = html.unescape(text)
-        lines = [ln for ln in text.splitlines() if ln and len(ln) > 8]
-        return "\n".join(lines[:800])
+        # パースはCPU処理なのでループを塞がないようワーカースレッドへ
+        return await asyncio.to_thread(_clean_cached, url, res)
     except Exception:
         return ""
 
-def extract_keypoints(texts: List[str], top_k: int = 20) -> List[str]:
-    tokens: List[str] = []
-    for t in texts:
-        t = t.replace("\u3000"," ").replace("　"," ")
-        t = re.sub(r"[^\wぁ-んァ-ヶ一-龠\- ]+", " ", t)
-        words = [w for w in t.split() if len(w) >= 2]
-        tokens.extend(words)
-    bigrams = [" ".join(tokens[i:i+2]) for i in range(len(tokens)-1)]
-    trigrams = [" ".join(tokens[i:i+3]) for i in range(len(tokens)-2)]
-    counts = Counter(tokens + bigrams + trigrams)
-    stop = set(["こと","ため","よう","する","して","です","ます","これ","それ","ここ","もの","あり","ない"])
-    scored = [(k,v) for (k,v) in counts.items() if k not in stop and not re.fullmatch(r"\d+", k)]
-    scored.sort(key=lambda x: x[1], reverse=True)
-    return [p for (p,_) in scored[: top_k]]
+def scrape_and_clean(url: str, timeout: float = 8.0) -> str:
+    return http_client.run_sync(ascrape_and_clean(url, timeout=timeout))
+
+async def _bounded(urls: List[str], fetch_one, default, max_concurrency: int, per_host: int,
+                   deadline: Optional[float]) -> list:
+    """
+    fetch_one(url) を1つのイベントループ上で並行実行する。全体の同時数は max_concurrency、
+    同一ホストへは per_host まで。deadline 秒で打ち切り、間に合わなかった URL は default
+    （未完了タスクはキャンセルされる）。結果は urls と同じ順序。
+    """
+    if not urls:
+        return []
+    total = asyncio.Semaphore(max(1, max_concurrency))
+    limits: Dict[str, asyncio.Semaphore] = {}
+    for u in urls:
+        limits.setdefault(urlparse(u).netloc, asyncio.Semaphore(max(1, per_host)))
+
+    async def one(u: str):
+        async with total, limits[urlparse(u).netloc]:
+            return await fetch_one(u)
+
+    tasks = [asyncio.ensure_future(one(u)) for u in urls]
+    try:
+        await asyncio.wait(tasks, timeout=deadline)
+    finally:
+        for t in tasks:
+            if not t.done():
+                t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return [t.result() if not t.cancelled() and t.exception() is None else default for t in tasks]
+
+async def afetch_articles(urls: List[str], timeout: float = 8.0, max_concurrency: int = SCRAPE_MAX_WORKERS,
+                          per_host: int = SCRAPE_PER_HOST, deadline: Optional[float] = SCRAPE_DEADLINE) -> list:
+    """記事HTMLだけを並行取得（本文抽出は呼び出し側でまとめて行う）。失敗/締切超過は None。"""
+    return await _bounded(urls, lambda u: _afetch_article(u, timeout), None, max_concurrency, per_host, deadline)
+
+async def ascrape_many(urls: List[str], timeout: float = 8.0, max_concurrency: int = SCRAPE_MAX_WORKERS,
+                       per_host: int = SCRAPE_PER_HOST, deadline: Optional[float] = SCRAPE_DEADLINE) -> List[str]:
+    """
+    ascrape_and_clean を1つのイベントループ上で並行実行する（取得できた順に本文抽出）。
+    間に合わなかった URL は ""。結果は urls と同じ順序。
+    """
+    return await _bounded(urls, lambda u: ascrape_and_clean(u, timeout=timeout), "", max_concurrency, per_host, deadline)
+
+def scrape_many(urls: List[str], timeout: float = 8.0, max_workers: int = SCRAPE_MAX_WORKERS,
+                per_host: int = SCRAPE_PER_HOST, deadline: Optional[float] = SCRAPE_DEADLINE) -> List[str]:
+    """
+    scrape_and_clean を最大 max_workers 並列で実行する同期版（ascrape_many のラッパー）。
+    """
+    return http_client.run_sync(ascrape_many(urls, timeout=timeout, max_concurrency=max_workers,
+                                  per_host=per_host, deadline=deadline))
 
 # ============ Instagramリール（3カット＋字幕） ============
+# リールの中身を決めるのはカット1・カット2の語（カット3は固定文）。なので異なるリールの数は
+# 候補の異なる値の順序付きペア数: 全て異なる k 個なら k≥3 で k(k-1)、k=2 で 2、k=1 で 1。
+def _reel_candidates(product: str, keypoints: List[str], web_titles: List[str]) -> List[str]:
+    return (keypoints + web_titles) if (keypoints or web_titles) else [f"{product} の魅力", "ユーザーボイス", "お悩み解決"]
+
+def _reel_pair_space(candidates: List[str]) -> tuple:
+    """(異なる値, 同じ値を2カットに使えるもの)。同じ値のペアは候補に2回以上出る値か、候補が1つだけのとき。"""
+    counts = Counter(candidates)
+    values = list(counts)
+    doubles = [v for v in values if counts[v] >= 2 or len(candidates) == 1]
+    return values, doubles
+
+def _reel_pair(values: List[str], doubles: List[str], idx: int) -> tuple:
+    u = len(values)
+    if idx < u * (u - 1):
+        i, j = divmod(idx, u - 1)
+        return values[i], values[j + 1 if j >= i else j]
+    v = doubles[idx - u * (u - 1)]
+    return v, v
+
+def reel_variant_count(product: str, keypoints: List[str], web_titles: List[str]) -> int:
+    """generate_instagram_reel_script が作れる異なるリールの最大数。"""
+    values, doubles = _reel_pair_space(_reel_candidates(product, keypoints, web_titles))
+    return len(values) * (len(values) - 1) + len(doubles)
+
 def generate_instagram_reel_script(product: str, industry: str, keypoints: List[str], web_titles: List[str],
                                    tone: str = "カジュアル", n: int = 3, salt: str | None = None) -> List[Dict[str, str]]:
+    """
+    異なるリールを最大 n 本。作れる数（reel_variant_count）が n 未満ならその数だけ返す。
+    ランダムに引いて重複が続いたら、残りは組み合わせ空間から非復元抽出で埋める（必ず終わる）。
+    """
     seed = _seed_from("reels", product, industry, tone, " ".join(keypoints), " ".join(web_titles), salt or "")
     rng = random.Random(seed)
-    base_candidates = (keypoints + web_titles) if (keypoints or web_titles) else [f"{product} の魅力", "ユーザーボイス", "お悩み解決"]
+    base_candidates = _reel_candidates(product, keypoints, web_titles)
+    values, doubles = _reel_pair_space(base_candidates)
+    total = len(values) * (len(values) - 1) + len(doubles)
+    target = min(n, total)
     scripts: List[Dict[str, str]] = []
+    render = copy_templates.reel_renderer(tone)
 
-    def one_reel():
+    seen = set()
+    tries = 0
+    while len(scripts) < target and tries < 4 * target + 8:
+        tries += 1
         candidates = base_candidates[:]
         rng.shuffle(candidates)
         take = candidates[:3] if len(candidates) >= 3 else (candidates * 3)[:3]
-        cut1, cut2, cut3 = take
-        script = {
-            "カット1（掴み）": f"映像：『{cut1}』を強いビジュアルで（最初の1秒で結論）\n字幕：『{cut1}、実はここがスゴい』\nSFX：タップ音／ズームイン",
-            "カット2（価値提示）": f"映像：{product}の使用例 or Before→After／UI画面／口コミ\n字幕：『{cut2} が変わると… → 劇的にラク！』\nSFX：スウッシュ／テロップ",
-            "カット3（行動喚起）": f"映像：CTA（商品→詳細・無料体験・予約導線）\n字幕：『今なら0円で体験 ▶ プロフィールのリンクへ』\nSFX：上向き矢印／指差し",
-        }
-        if tone == "ビジネス":
-            for k in script:
-                script[k] = script[k].replace("スゴい", "注目ポイント").replace("ラク", "効率化")
-        elif tone == "ユーモラス":
-            for k in script:
-                script[k] += " 😂"
-        sig = "|".join(script.values())
-        return sig, script
-
-    seen = set()
-    while len(scripts) < n:
-        sig, sc = one_reel()
-        if sig in seen:
+        if (take[0], take[1]) in seen:
             continue
-        seen.add(sig); scripts.append(sc)
+        seen.add((take[0], take[1])); scripts.append(render(product, take))
+    if len(scripts) < target:
+        # 2*target 個引けば、既出（target 未満）を除いても必要数は必ず残る
+        for idx in rng.sample(range(total), min(total, 2 * target)):
+            pair = _reel_pair(values, doubles, idx)
+            if pair in seen:
+                continue
+            seen.add(pair); scripts.append(render(product, pair))
+            if len(scripts) >= target:
+                break
     return scripts
 
-# ============ トーン適用 ============
-def _apply_tone(text: str, tone: str) -> str:
-    if tone == "ビジネス": 
-        return text.replace("！","。").replace("🔥","").replace("✨","").replace("💡","")
-    if tone == "ユーモラス":
-        return text + " 🤣"
-    return text
-
 # ============ チャネル別コピー（Web活用・SNS強化） ============
-def web_enabled_channel_copies(product: str, industry: str, keypoints: List[str], web_titles: List[str],
-                               tone: str = "カジュアル", n: int = 5, sns_focus: bool = False,
-                               salt: str | None = None) -> Dict[str, List[str]]:
-    seed = _seed_from("copies", product, industry, tone, " ".join(keypoints), " ".join(web_titles), salt or "")
-    rng = random.Random(seed)
+# diverse=True のとき、各チャネルで n × DIVERSE_POOL_FACTOR 件作ってから似ていない n 件を選ぶ
+DIVERSE_POOL_FACTOR = 8
+
+_SNS_EXTRA = ["#キャンペーン", "#期間限定", "#先着", "#ビフォーアフター", "UGC", "ハイライト", "保存して後で読む"]
+
+def _copy_candidates(product: str, industry: str, keypoints: List[str], web_titles: List[str],
+                     sns_focus: bool) -> List[str]:
     candidates = [w for w in (keypoints + web_titles) if w] or [f"{industry} トレンド", f"{product} 口コミ", "無料体験", "導入事例"]
     if sns_focus:
-        candidates += ["#キャンペーン", "#期間限定", "#先着", "#ビフォーアフター", "UGC", "ハイライト", "保存して後で読む"]
+        candidates += _SNS_EXTRA
+    return candidates
 
-    copies = {
-        "SNS/Twitter(X)": [], "SNS/Instagram": [], "SNS/LinkedIn": [],
-        "広告/Google": [], "広告/Meta": [],
-        "メール/件名": [], "メール/本文": [],
-        "LP/ヒーロー": [],
-    }
+def _channel_copies(product: str, industry: str, tone: str, candidates: List[str], rng: random.Random,
+                    n: int, sns_focus: bool, diverse: bool = False) -> Dict[str, List[str]]:
+    """
+    チャネルの定義とトーンは copy_templates（データとして宣言、(チャネル, トーン) ごとにコンパイル済み）。
+    diverse=True なら多めに作って MMR（diversity.mmr_select）で互いに似ていないものを選ぶ。
+    """
+    copies: Dict[str, List[str]] = {}
     sns_n = n + 2 if sns_focus else n
+    for ch in list(copy_templates.CHANNELS.values()):
+        render = copy_templates.copy_renderer(ch.name, tone)
+        k = min(ch.pick, len(candidates))
+        def one_copy():
+            return render(product, industry, rng.sample(candidates, k), sns_focus)
+        want = sns_n if ch.sns else n
+        if diverse and diversity.available():
+            pool = _ensure_variety(one_copy, want * DIVERSE_POOL_FACTOR, max_retry=1)
+            copies[ch.name] = [pool[i] for i in diversity.mmr_select(pool, want)]
+        else:
+            copies[ch.name] = _ensure_variety(one_copy, want)
+    return copies
 
-    def one_twitter():
-        s = rng.sample(candidates, min(3, len(candidates)))
-        hash_tags = (" #" + s[0].split()[0]) if sns_focus else ""
-        return _apply_tone(f"【{product}】注目 → {' / '.join(s)}{hash_tags}｜詳しくは🔗", tone)
-    copies["SNS/Twitter(X)"] = _ensure_variety(one_twitter, sns_n)
-
-    def one_instagram():
-        s = rng.sample(candidates, min(4, len(candidates)))
-        ht = " ".join({f"#{w.split()[0][:12]}" for w in s}) if sns_focus else ""
-        return _apply_tone(f"📸 {product} の推し：{' ・ '.join(s)}\n{ht}\n保存して後で見返す ✨", tone)
-    copies["SNS/Instagram"] = _ensure_variety(one_instagram, sns_n)
-
-    def one_linkedin():
-        s = rng.sample(candidates, min(3, len(candidates)))
-        return _apply_tone(f"{industry}の最新論点：{', '.join(s)}。{product} の活用ポイントを共有します。", tone)
-    copies["SNS/LinkedIn"] = _ensure_variety(one_linkedin, sns_n)
-
-    def one_gads():
-        s = rng.sample(candidates, min(2, len(candidates)))
-        return _apply_tone(f"{product}｜{'・'.join(s)}。まずは無料で体験。", tone)
-    copies["広告/Google"] = _ensure_variety(one_gads, n)
-
-    def one_meta():
-        s = rng.sample(candidates, min(2, len(candidates)))
-        return _apply_tone(f"{product} を試す理由 → {' / '.join(s)}。申込は30秒 ⏱", tone)
-    copies["広告/Meta"] = _ensure_variety(one_meta, n)
-
-    def one_subj():
-        s = rng.sample(candidates, min(3, len(candidates)))
-        return f"{product}で成果が動いた要因：{', '.join(s)}"
-    copies["メール/件名"] = _ensure_variety(one_subj, n)
-
-    def one_body():
-        s = rng.sample(candidates, min(3, len(candidates)))
-        return _apply_tone(
-            f"{product}にご関心ありがとうございます。\n今回は「{', '.join(s)}」の観点から、すぐ使えるヒントを2分でご紹介します。\n→ 詳細はリンク先へ。", tone
-        )
-    copies["メール/本文"] = _ensure_variety(one_body, n)
-
-    def one_hero():
-        s = rng.sample(candidates, min(2, len(candidates)))
-        return f"{product} — {industry}のいまに効く。{s[0] if s else '今必要な一手'}を最短で体験。"
-    copies["LP/ヒーロー"] = _ensure_variety(one_hero, n)
+def web_enabled_channel_copies(product: str, industry: str, keypoints: List[str], web_titles: List[str],
+                               tone: str = "カジュアル", n: int = 5, sns_focus: bool = False,
+                               salt: str | None = None, diverse: bool = False) -> Dict[str, List[str]]:
+    seed = _seed_from("copies", product, industry, tone, " ".join(keypoints), " ".join(web_titles), salt or "")
+    candidates = _copy_candidates(product, industry, keypoints, web_titles, sns_focus)
+    return _channel_copies(product, industry, tone, candidates, random.Random(seed), n, sns_focus, diverse)
 
-    return copies
+def web_enabled_channel_copies_batch(jobs: Iterable[Tuple[str, str, str, Optional[str]]], keypoints: List[str],
+                                     web_titles: List[str], n: int = 5, sns_focus: bool = False,
+                                     diverse: bool = False) -> List[Dict[str, List[str]]]:
+    """
+    (product, industry, tone, salt) のジョブ群を、共通のキーワード/見出しでまとめて生成する。
+    各ジョブの結果は web_enabled_channel_copies を個別に呼んだ場合と同一。
+    候補リストと結合済み文字列は1回だけ作る（キーワードが空のときだけ商品ごとに作り直す）。
+    """
+    kp_text, title_text = " ".join(keypoints), " ".join(web_titles)
+    shared = _copy_candidates("", "", keypoints, web_titles, sns_focus) if any(keypoints + web_titles) else None
+    out: List[Dict[str, List[str]]] = []
+    for product, industry, tone, salt in jobs:
+        seed = _seed_from("copies", product, industry, tone, kp_text, title_text, salt or "")
+        candidates = shared if shared is not None else _copy_candidates(product, industry, [], [], sns_focus)
+        out.append(_channel_copies(product, industry, tone, candidates, random.Random(seed), n, sns_focus, diverse))
+    return out
+
+# ============ Web調査結果（1回の収集を計画/コピー/リールで共有） ============
+@dataclass
+class WebResearch:
+    """
+    fetch_web_sources → scrape_and_clean → extract_keypoints の結果一式。
+    同じ query / extra_urls なら使い回せるので、計画・コピー・リールに渡して再収集を避ける。
+    """
+    query: str
+    extra_urls: List[str]
+    sources: List[Dict[str, str]]  # 各要素に本文 "text" を含む
+    keypoints: List[str]
+    max_items: int = 10
+
+    @property
+    def key(self) -> str:
+        return research_key(self.query, self.extra_urls, self.max_items)
+
+    @property
+    def texts(self) -> List[str]:
+        return [s["text"] for s in self.sources]
+
+    @property
+    def web_titles(self) -> List[str]:
+        return [s["title"] for s in self.sources if s.get("title")]
+
+def research_key(query: str, extra_urls: Optional[List[str]] = None, max_items: int = 10) -> str:
+    urls = [u.strip() for u in (extra_urls or []) if u and isinstance(u, str)]
+    return hashlib.sha256("|".join([query or "", str(max_items)] + urls).encode("utf-8")).hexdigest()[:16]
+
+async def arun_web_research(query: str, extra_urls: Optional[List[str]] = None, max_items: int = 10,
+                           deadline: Optional[float] = SCRAPE_DEADLINE) -> WebResearch:
+    items = await afetch_web_sources(query, extra_urls=extra_urls, limit=max_items)
+    urls = [it["url"] for it in items]
+    responses = await afetch_articles(urls, deadline=deadline)
+    pages, keypoints, primary = await asyncio.to_thread(_clean_and_rank, urls, responses, 20)
+    merged = near_dup.collapse([dict(it, text=txt) for it, txt in zip(items, pages)], primary)
+    enriched = [it for it in merged if it["text"]]
+    return WebResearch(query=query, extra_urls=list(extra_urls or []), sources=enriched,
+                       keypoints=keypoints, max_items=max_items)
+
+def run_web_research(query: str, extra_urls: Optional[List[str]] = None, max_items: int = 10,
+                     deadline: Optional[float] = SCRAPE_DEADLINE) -> WebResearch:
+    return http_client.run_sync(arun_web_research(query, extra_urls=extra_urls, max_items=max_items, deadline=deadline))
 
 # ============ メイン：Web → コピー/リール生成 ============
+async def aweb_research_to_copies(query: str, product: str, industry: str,
+                                  extra_urls: Optional[List[str]] = None,
+                                  max_items: int = 10,
+                                  tone: str = "カジュアル",
+                                  sns_focus: bool = False,
+                                  include_reels: bool = False,
+                                  salt: str | None = None,
+                                  research: Optional[WebResearch] = None,
+                                  diverse: bool = False) -> Dict[str, Any]:
+    if research is None:
+        research = await arun_web_research(query, extra_urls=extra_urls, max_items=max_items)
+    keypoints = research.keypoints
+    web_titles = research.web_titles
+    copies = web_enabled_channel_copies(
+        product=product, industry=industry, keypoints=keypoints, web_titles=web_titles,
+        tone=tone, n=5, sns_focus=sns_focus, salt=salt, diverse=diverse
+    )
+    reels = generate_instagram_reel_script(product, industry, keypoints, web_titles, tone, n=3, salt=salt) if include_reels else []
+    return {"sources": research.sources, "keypoints": keypoints, "copies": copies, "reels": reels}
+
 def web_research_to_copies(query: str, product: str, industry: str,
                            extra_urls: Optional[List[str]] = None,
                            max_items: int = 10,
                            tone: str = "カジュアル",
                            sns_focus: bool = False,
                            include_reels: bool = False,
-                           salt: str | None = None) -> Dict[str, Any]:
-    items = fetch_web_sources(query, extra_urls=extra_urls, limit=max_items)
-    texts, enriched = [], []
-    for it in items:
-        txt = scrape_and_clean(it["url"])
-        if not txt: 
-            continue
-        it2 = dict(it); it2["text"] = txt
-        enriched.append(it2); texts.append(txt)
-    keypoints = extract_keypoints(texts, top_k=20) if texts else []
-    web_titles = [s["title"] for s in enriched if s.get("title")]
-    copies = web_enabled_channel_copies(
-        product=product, industry=industry, keypoints=keypoints, web_titles=web_titles,
-        tone=tone, n=5, sns_focus=sns_focus, salt=salt
-    )
-    reels = generate_instagram_reel_script(product, industry, keypoints, web_titles, tone, n=3, salt=salt) if include_reels else []
-    return {"sources": enriched, "keypoints": keypoints, "copies": copies, "reels": reels}
+                           salt: str | None = None,
+                           research: Optional[WebResearch] = None,
+                           diverse: bool = False) -> Dict[str, Any]:
+    return http_client.run_sync(aweb_research_to_copies(
+        query, product, industry, extra_urls=extra_urls, max_items=max_items, tone=tone,
+        sns_focus=sns_focus, include_reels=include_reels, salt=salt, research=research, diverse=diverse))
 
 # ============ 実行計画：Web → Plan（What/How/Action） ============
 @dataclass
@@ -348,19 +565,58 @@ class ActionItem:
 def _shorten(txt: str, n: int = 120) -> str:
     return (txt[:n] + "…") if len(txt) > n else txt
 
+async def aweb_research_to_plan(query: str, product: str, industry: str,
+                                extra_urls: Optional[List[str]] = None,
+                                max_items: int = 8,
+                                tone: str = "カジュアル",
+                                salt: str | None = None,
+                                research: Optional[WebResearch] = None) -> Dict[str, Any]:
+    if research is None:
+        try:
+            research = await arun_web_research(query, extra_urls=extra_urls, max_items=max_items)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            research = WebResearch(query=query, extra_urls=list(extra_urls or []), sources=[], keypoints=[], max_items=max_items)
+    return _plan_from_research(research)
+
 def web_research_to_plan(query: str, product: str, industry: str,
                          extra_urls: Optional[List[str]] = None,
                          max_items: int = 8,
                          tone: str = "カジュアル",
-                         salt: str | None = None) -> Dict[str, Any]:
-    try:
-        res = web_research_to_copies(query=query, product=product, industry=industry,
-                                     extra_urls=extra_urls, max_items=max_items, tone=tone, salt=salt)
-    except Exception:
-        res = {"sources": [], "keypoints": [], "copies": {}}
+                         salt: str | None = None,
+                         research: Optional[WebResearch] = None) -> Dict[str, Any]:
+    return http_client.run_sync(aweb_research_to_plan(
+        query, product, industry, extra_urls=extra_urls, max_items=max_items, tone=tone, salt=salt, research=research))
 
-    sources = res.get("sources", [])
-    keypoints = res.get("keypoints", [])
+def iter_research_stages(query: str, product: str, industry: str,
+                         extra_urls: Optional[List[str]] = None,
+                         max_items: int = 8,
+                         tone: str = "カジュアル",
+                         salt: str | None = None,
+                         research: Optional[WebResearch] = None) -> Iterable[Tuple[str, Any]]:
+    """
+    結果画面の生成を段階ごとに (段階名, 値) で返す：research → plan → copies → reels。
+    research_jobs からバックグラウンドで回し、終わった段階から画面に出す。
+    Web収集はクエリ（rkey）だけをキーにプロセス共通の result_cache に載せ、別セッション・別ノンスの
+    同時実行でも1回だけ走らせて共有する（空の結果は載せない）。ノンスが効くのはコピーとリールのみ。
+    """
+    rkey = research_key(query, extra_urls, max_items)
+    if research is None or research.key != rkey:
+        research = result_cache.cached(
+            "research", lambda: run_web_research(query, extra_urls=extra_urls, max_items=max_items), rkey,
+            keep=lambda r: bool(r.sources))
+    yield "research", research
+    yield "plan", _plan_from_research(research)
+    copies = web_enabled_channel_copies(product, industry, research.keypoints, research.web_titles,
+                                        tone=tone, n=5, sns_focus=True, salt=salt)
+    yield "copies", {"sources": research.sources, "keypoints": research.keypoints, "copies": copies, "reels": []}
+    yield "reels", generate_instagram_reel_script(product, industry, research.keypoints, research.web_titles,
+                                                  tone, n=3, salt=salt)
+
+def _plan_from_research(research: WebResearch) -> Dict[str, Any]:
+    sources = research.sources
+    keypoints = research.keypoints
     focus = keypoints[:6] if keypoints else []
     f1 = focus[0] if len(focus) > 0 else "訴求の明確化"
     f2 = focus[1] if len(focus) > 1 else "第一印象（ヒーロー）改善"
@@ -370,7 +626,8 @@ def web_research_to_plan(query: str, product: str, industry: str,
     f6 = focus[5] if len(focus) > 5 else "CRM/継続導線"
 
     why_text = "最新の記事/事例で頻出の論点に基づく優先順位。ボトルネックに直結しやすい順です。"
-    srcs = [{"title": _shorten(s.get("title") or s.get("url") or ""), "url": s.get("url")} for s in sources][:5]
+    srcs = [{"title": _shorten(s.get("title") or s.get("url") or ""), "url": s.get("url"),
+             "alternates": s.get("alternates", [])} for s in sources][:5]
 
     today = [
         ActionItem(
@@ -0,0 +1,45 @@
+# Channel copy throughput: one web_enabled_channel_copies call per job vs the batch API.
+#   python -m web_consult_ai.benchmarks.bench_copies [--jobs 200] [--n 5] [--repeat 3]
+from __future__ import annotations
+import argparse
+import time
+
+KEYPOINTS = ["来店 予約", "LINE", "クーポン", "電話", "新メニュー", "口コミ", "ヘアケア", "学割", "平日限定", "指名"]
+TITLES = ["美容室の新サービス - 地域新聞", "ヘアケア特集", "学割キャンペーン開始", "予約アプリ比較"]
+TONES = ["カジュアル", "ビジネス", "ユーモラス"]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="channel copy batch benchmark")
+    ap.add_argument("--jobs", type=int, default=200)
+    ap.add_argument("--n", type=int, default=5)
+    ap.add_argument("--repeat", type=int, default=3, help="runs per variant (best time is reported)")
+    ap.add_argument("--sns-focus", action="store_true")
+    args = ap.parse_args()
+
+    from web_consult_ai import ai_core_plus as core
+    jobs = [(f"商品{i}", f"業種{i % 7}", TONES[i % 3], f"salt{i}") for i in range(args.jobs)]
+
+    def per_call():
+        return [core.web_enabled_channel_copies(p, ind, KEYPOINTS, TITLES, tone, n=args.n,
+                                                sns_focus=args.sns_focus, salt=salt) for p, ind, tone, salt in jobs]
+
+    def batch():
+        return core.web_enabled_channel_copies_batch(jobs, KEYPOINTS, TITLES, n=args.n, sns_focus=args.sns_focus)
+
+    expected = per_call()
+    assert batch() == expected, "batch output differs from per-call output"
+    n_copies = sum(len(v) for job in expected for v in job.values())
+    print(f"{args.jobs} jobs, {n_copies} copies per run")
+    print(f"{'variant':<10}{'copies/s':>12}{'jobs/s':>10}")
+    for name, fn in (("per-call", per_call), ("batch", batch)):
+        best = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        print(f"{name:<10}{n_copies / best:>12.0f}{args.jobs / best:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# MMR copy selection: time to pick k of a pool per channel, and how similar the picked
+# copies are to each other (mean pairwise cosine) compared with taking the first k.
+#   python -m web_consult_ai.benchmarks.bench_diversity [--pool 200] [--k 5] [--repeat 5]
+from __future__ import annotations
+import argparse
+import itertools
+import random
+import time
+
+KEYPOINTS = ["来店 予約", "LINE", "クーポン", "電話", "新メニュー", "口コミ", "ヘアケア", "学割", "平日限定", "指名"]
+TITLES = ["美容室の新サービス - 地域新聞", "ヘアケア特集", "学割キャンペーン開始", "予約アプリ比較"]
+
+
+def _mean_similarity(S, idx):
+    pairs = list(itertools.combinations(idx, 2))
+    return sum(float(S[i, j]) for i, j in pairs) / len(pairs) if pairs else 0.0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="diversity selection benchmark")
+    ap.add_argument("--pool", type=int, default=200, help="candidate copies per channel")
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--repeat", type=int, default=5, help="runs per channel (best time is reported)")
+    args = ap.parse_args()
+
+    from web_consult_ai import ai_core_plus as core, copy_templates, diversity
+    if not diversity.available():
+        raise SystemExit("numpy is required for this benchmark")
+    candidates = core._copy_candidates("リーフ", "美容室", KEYPOINTS, TITLES, False)
+    rng = random.Random(0)
+
+    print(f"{'channel':<18}{'pool':>6}{'ms':>8}{'first-k sim':>13}{'mmr sim':>10}")
+    for name, ch in copy_templates.CHANNELS.items():
+        render = copy_templates.copy_renderer(name, "カジュアル")
+        pool = core._ensure_variety(
+            lambda: render("リーフ", "美容室", rng.sample(candidates, k=min(ch.pick, len(candidates))), False),
+            args.pool, max_retry=1)
+        best = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            picked = diversity.mmr_select(pool, args.k)
+            best = min(best, time.perf_counter() - t0)
+        S = diversity.similarity_matrix(pool)
+        print(f"{name:<18}{len(pool):>6}{best * 1000:>8.2f}"
+              f"{_mean_similarity(S, range(min(args.k, len(pool)))):>13.3f}{_mean_similarity(S, picked):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
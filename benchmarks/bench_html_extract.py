@@ -0,0 +1,70 @@
+# Throughput and peak memory of the HTML extraction backends on the fixture pages.
+#   python -m web_consult_ai.benchmarks.bench_html_extract [--seconds 3] [--scale 200]
+# Each backend runs in a fresh process so peak RSS is not shared between them.
+from __future__ import annotations
+import argparse
+import glob
+import multiprocessing as mp
+import os
+import resource
+import time
+from typing import Dict, List
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(__file__)), "tests", "fixtures", "pages")
+
+
+def load_corpus(scale: int) -> List[str]:
+    '''Saved pages as-is, plus each page with its paragraphs repeated to news-page size.'''
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            markup = f.read()
+        pages.append(markup)
+        if "</p>" in markup:
+            head, _, tail = markup.partition("</p>")
+            pages.append(head + "</p>" + ("\n<p>" + head.rsplit("<p", 1)[-1].split(">", 1)[-1] + "</p>") * scale + tail)
+    return pages
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # KiB on Linux
+
+
+def _run(backend: str, pages: List[str], seconds: float) -> Dict[str, float]:
+    from web_consult_ai import html_extract
+    fn = html_extract.get_backend(backend)
+    fn(pages[0])  # warm-up / lazy imports
+    base = _peak_rss_mb()
+    n, nbytes, t0 = 0, 0, time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        for p in pages:
+            fn(p)
+            n += 1
+            nbytes += len(p)
+    dt = time.perf_counter() - t0
+    return {"pages_per_s": n / dt, "mb_per_s": nbytes / dt / 1e6, "peak_rss_delta_mb": _peak_rss_mb() - base}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="HTML extraction backend benchmark")
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--scale", type=int, default=200, help="paragraph repetitions for the enlarged pages")
+    args = ap.parse_args()
+
+    from web_consult_ai import html_extract
+    pages = load_corpus(args.scale)
+    print(f"{len(pages)} pages, {sum(map(len, pages)) / 1e3:.0f} kB total")
+    ctx = mp.get_context("spawn")
+    rows = []
+    for backend in html_extract.available_backends():
+        with ctx.Pool(1) as pool:
+            rows.append((backend, pool.apply(_run, (backend, pages, args.seconds))))
+    ref = dict(rows).get("bs4", {}).get("pages_per_s")
+    print(f"{'backend':<12}{'pages/s':>10}{'MB/s':>8}{'peak RSS +MB':>14}{'vs bs4':>8}")
+    for name, r in rows:
+        speedup = f"{r['pages_per_s'] / ref:.1f}x" if ref else "-"
+        print(f"{name:<12}{r['pages_per_s']:>10.0f}{r['mb_per_s']:>8.1f}{r['peak_rss_delta_mb']:>14.1f}{speedup:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Peak memory and time of keypoint counting: the old list-and-Counter approach vs the
+# streaming, id-packed, bounded counter in keypoints.py.
+#   python -m web_consult_ai.benchmarks.bench_keypoints [--docs 10] [--lines 800] [--vocab 50000]
+# Each variant runs in a fresh process so peak RSS is not shared between them.
+from __future__ import annotations
+import argparse
+import multiprocessing as mp
+import random
+import re
+import resource
+import time
+from collections import Counter
+from typing import Dict, List
+
+
+def make_corpus(docs: int, lines: int, vocab: int, seed: int = 1) -> List[str]:
+    '''Zipf-distributed words, ~12 per line, so n-gram counts look like real articles.'''
+    rng = random.Random(seed)
+    words = [f"語{i}" if i % 3 else f"word{i}" for i in range(vocab)]
+    weights = [1.0 / (i + 1) for i in range(vocab)]
+    return ["\n".join(" ".join(rng.choices(words, weights, k=12)) for _ in range(lines)) for _ in range(docs)]
+
+
+def _list_counter(texts: List[str]) -> List[str]:
+    t = re.sub(r"[^\wぁ-んァ-ヶ一-龠\- ]+", " ", " ".join(texts).replace("　", " "))
+    toks = [w for w in t.split() if len(w) >= 2]
+    big = [" ".join(toks[i:i+2]) for i in range(len(toks) - 1)]
+    tri = [" ".join(toks[i:i+3]) for i in range(len(toks) - 2)]
+    cnt = Counter(toks + big + tri)
+    return [p for p, _ in cnt.most_common(20)]
+
+
+def _streaming(texts: List[str]) -> List[str]:
+    from web_consult_ai import keypoints
+    return keypoints.extract_keypoints(texts, 20)
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # KiB on Linux
+
+
+def _run(name: str, args: tuple) -> Dict[str, float]:
+    texts = make_corpus(*args)
+    base = _peak_rss_mb()
+    t0 = time.perf_counter()
+    (_list_counter if name == "list" else _streaming)(texts)
+    return {"seconds": time.perf_counter() - t0, "peak_rss_delta_mb": _peak_rss_mb() - base}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="keypoint counting memory benchmark")
+    ap.add_argument("--docs", type=int, default=10)
+    ap.add_argument("--lines", type=int, default=800)
+    ap.add_argument("--vocab", type=int, default=50000)
+    args = ap.parse_args()
+
+    ctx = mp.get_context("spawn")
+    print(f"{args.docs} docs x {args.lines} lines, vocab {args.vocab}")
+    print(f"{'variant':<12}{'seconds':>9}{'peak RSS +MB':>14}")
+    for name in ("list", "streaming"):
+        with ctx.Pool(1) as pool:
+            r = pool.apply(_run, (name, (args.docs, args.lines, args.vocab)))
+        print(f"{name:<12}{r['seconds']:>9.2f}{r['peak_rss_delta_mb']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# Near-duplicate detection on a synthetic news corpus with known syndicated copies.
+#   python -m web_consult_ai.benchmarks.bench_near_dup [--stories 200] [--copies 3]
+# Each story gets a few copies with a different publisher suffix, punctuation and
+# width changes in the title, and boilerplate plus a couple of edited words in the body.
+# Reports pairwise precision / recall against the known clusters, time per item and
+# how many article fetches the title stage saves.
+from __future__ import annotations
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+PUBLISHERS = ["日本経済新聞", "Yahoo!ニュース", "朝日新聞デジタル", "ITmedia", "共同通信", "NHK"]
+
+
+def _story(rng: random.Random, vocab: List[str]) -> Tuple[str, str]:
+    title = "".join(rng.choices(vocab, k=6)) + "、" + "".join(rng.choices(vocab, k=3)) + "へ"
+    body = "。".join(" ".join(rng.choices(vocab, k=10)) for _ in range(60))
+    return title, body
+
+
+def _copy(rng: random.Random, title: str, body: str, vocab: List[str]) -> Tuple[str, str]:
+    t = title.replace("、", rng.choice(["、", "　", " ", "：", "、"]))
+    if rng.random() < 0.5:
+        t = t.translate(str.maketrans("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ", "０１２３４５６７８９ＡＢＣＤＥＦＧＨＩＪＫＬＭＮＯＰＱＲＳＴＵＶＷＸＹＺ"))
+    words = body.split(" ")
+    for _ in range(2):
+        words[rng.randrange(len(words))] = rng.choice(vocab)
+    b = "この記事は配信記事です。" + " ".join(words) + "。関連記事 ランキング"
+    return f"{t} - {rng.choice(PUBLISHERS)}", b
+
+
+def make_corpus(stories: int, copies: int, seed: int = 7):
+    rng = random.Random(seed)
+    kanji = [chr(c) for c in range(0x4E00, 0x4E00 + 400)]
+    kata = [chr(c) for c in range(0x30A2, 0x30F3)]
+    vocab = ["".join(rng.choices(kanji, k=rng.randint(2, 3))) for _ in range(3000)]
+    vocab += ["".join(rng.choices(kata, k=rng.randint(3, 5))) for _ in range(2000)]
+    titles, bodies, label = [], [], []
+    for s in range(stories):
+        t, b = _story(rng, vocab)
+        titles.append(f"{t} - {rng.choice(PUBLISHERS)}"); bodies.append(b); label.append(s)
+        for _ in range(rng.randrange(copies + 1)):
+            ct, cb = _copy(rng, t, b, vocab)
+            titles.append(ct); bodies.append(cb); label.append(s)
+    order = list(range(len(titles)))
+    rng.shuffle(order)
+    return [titles[i] for i in order], [bodies[i] for i in order], [label[i] for i in order]
+
+
+def _pairs(groups: List[int]):
+    by = {}
+    for i, g in enumerate(groups):
+        by.setdefault(g, []).append(i)
+    return {(a, b) for members in by.values() for k, a in enumerate(members) for b in members[k+1:]}
+
+
+def _score(pred: List[int], label: List[int]) -> Tuple[float, float]:
+    p, t = _pairs(pred), _pairs(label)
+    precision = len(p & t) / len(p) if p else 1.0
+    recall = len(p & t) / len(t) if t else 1.0
+    return precision, recall
+
+
+def main():
+    ap = argparse.ArgumentParser(description="near-duplicate detection benchmark")
+    ap.add_argument("--stories", type=int, default=200)
+    ap.add_argument("--copies", type=int, default=3, help="max syndicated copies per story")
+    args = ap.parse_args()
+
+    from web_consult_ai import near_dup
+    titles, bodies, label = make_corpus(args.stories, args.copies)
+    n = len(titles)
+    print(f"{n} articles, {len(set(label))} distinct stories")
+    print(f"{'stage':<8}{'precision':>10}{'recall':>8}{'ms/item':>9}{'kept':>7}")
+    for name, fn, data in (("titles", near_dup.cluster_titles, titles), ("texts", near_dup.cluster_texts, bodies)):
+        t0 = time.perf_counter()
+        pred = fn(data)
+        dt = time.perf_counter() - t0
+        precision, recall = _score(pred, label)
+        kept = sum(1 for i, p in enumerate(pred) if p == i)
+        print(f"{name:<8}{precision:>10.3f}{recall:>8.3f}{dt / n * 1e3:>9.2f}{kept:>7}")
+    kept = sum(1 for i, p in enumerate(near_dup.cluster_titles(titles)) if p == i)
+    print(f"title stage skips {n - kept} of {n} fetches ({(n - kept) / n:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# Scaling of the parse stage (HTML -> text -> n-gram counts) with the number of workers.
+#   python -m web_consult_ai.benchmarks.bench_parse_pool [--pages 64] [--scale 200] [--repeat 3]
+# Uses a fixed corpus of enlarged fixture pages, so runs are comparable across machines.
+from __future__ import annotations
+import argparse
+import os
+import time
+
+from .bench_html_extract import load_corpus
+
+
+def main():
+    ap = argparse.ArgumentParser(description="parse stage scaling benchmark")
+    ap.add_argument("--pages", type=int, default=64, help="documents per batch")
+    ap.add_argument("--scale", type=int, default=200, help="paragraph repetitions for the enlarged pages")
+    ap.add_argument("--repeat", type=int, default=3, help="batches per setting (best time is reported)")
+    ap.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+
+    from web_consult_ai import parse_pool
+    corpus = load_corpus(args.scale)
+    pages = [corpus[i % len(corpus)].encode("utf-8") for i in range(args.pages)]
+    items = [parse_pool.ParseItem(body=p, encoding="utf-8") for p in pages]
+    print(f"{len(items)} pages, {sum(map(len, pages)) / 1e6:.1f} MB per batch, {os.cpu_count()} CPUs")
+
+    workers = [0] + [w for w in (2, 4, 8, 16, 32) if w <= args.max_workers]
+    if args.max_workers > 1 and args.max_workers not in workers:
+        workers.append(args.max_workers)
+    expected = None
+    base = None
+    print(f"{'workers':<10}{'pages/s':>10}{'MB/s':>8}{'speedup':>9}")
+    for w in workers:
+        parse_pool.parse_batch(items[:4], workers=w, min_batch=0, min_bytes=0)  # start the pool
+        best = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            texts, counts, _ = parse_pool.parse_batch(items, workers=w, min_batch=0, min_bytes=0)
+            best = min(best, time.perf_counter() - t0)
+        result = (texts, list(counts.items()))
+        if expected is None:
+            expected = result
+        assert result == expected, f"workers={w} changed the output"
+        base = base or best
+        label = "in-proc" if w == 0 else str(w)
+        print(f"{label:<10}{len(items) / best:>10.1f}{sum(map(len, pages)) / best / 1e6:>8.1f}{base / best:>8.1f}x")
+    parse_pool._drop_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# Trend features over many keywords: per-keyword Python loops over the dict format vs
+# the TrendMatrix array (momentum, slope, weekly seasonality), plus memory held.
+#   python -m web_consult_ai.benchmarks.bench_trends [--keywords 500] [--days 365] [--repeat 3]
+from __future__ import annotations
+import argparse
+import random
+import time
+import tracemalloc
+
+
+def _python_features(trends, recent=7, period=7):
+    out = {}
+    for k, v in trends["data"].items():
+        y = v["series"]
+        n = len(y)
+        avg = sum(y) / n
+        tail = y[-recent:]
+        xm = (n - 1) / 2
+        sxx = sum((x - xm) ** 2 for x in range(n))
+        slope = sum((x - xm) * (yy - avg) for x, yy in enumerate(y)) / sxx
+        cycles = n // period
+        z = y[n - cycles * period:]
+        zm = sum(z) / len(z)
+        profile = [sum(z[c * period + p] for c in range(cycles)) / cycles for p in range(period)]
+        total = sum((a - zm) ** 2 for a in z) / len(z)
+        explained = sum((p - zm) ** 2 for p in profile) / period
+        out[k] = (avg, y[-1], sum(tail) / len(tail) / (avg + 1e-9), slope, explained / total if total else 0.0)
+    return out
+
+
+def _make_trends(n_kw, days, seed=0):
+    rng = random.Random(seed)
+    data = {}
+    for i in range(n_kw):
+        level, trend, weekly = rng.uniform(10, 60), rng.uniform(-0.05, 0.05), rng.uniform(0, 15)
+        series = [max(0, min(100, int(level + trend * t + (weekly if t % 7 in (5, 6) else 0) + rng.gauss(0, 4))))
+                  for t in range(days)]
+        data[f"kw{i}"] = {"series": series, "avg": sum(series) / days, "latest": series[-1]}
+    return {"provider": "bench", "geo": "JP", "window_days": days, "keywords": list(data), "data": data}
+
+
+def _best(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def _held_bytes(build):
+    tracemalloc.start()
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, obj
+
+
+def main():
+    ap = argparse.ArgumentParser(description="trend feature benchmark")
+    ap.add_argument("--keywords", type=int, default=500)
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--repeat", type=int, default=3, help="runs per variant (best time is reported)")
+    args = ap.parse_args()
+
+    from web_consult_ai.trend_matrix import TrendMatrix, available
+    if not available():
+        raise SystemExit("numpy is required for this benchmark")
+
+    dict_bytes, trends = _held_bytes(lambda: _make_trends(args.keywords, args.days))
+    matrix_bytes, m = _held_bytes(lambda: TrendMatrix.from_dict(trends))
+    print(f"{args.keywords} keywords x {args.days} days")
+    print(f"memory: dict {dict_bytes / 1e6:.1f} MB, matrix {m.values.nbytes / 1e6:.2f} MB "
+          f"(conversion peak {matrix_bytes / 1e6:.2f} MB)")
+
+    t_py, py = _best(lambda: _python_features(trends), args.repeat)
+    t_conv, _ = _best(lambda: TrendMatrix.from_dict(trends), args.repeat)
+    t_np, feats = _best(m.features, args.repeat)
+    t_back, _ = _best(m.to_dict, args.repeat)
+
+    worst = max(abs(py[k][3] - feats["slope"][i]) for i, k in enumerate(m.keywords))
+    assert worst < 1e-6, f"slope mismatch {worst}"
+    print(f"{'step':<28}{'ms':>10}")
+    print(f"{'python loops (features)':<28}{t_py * 1000:>10.1f}")
+    print(f"{'TrendMatrix.from_dict':<28}{t_conv * 1000:>10.1f}")
+    print(f"{'TrendMatrix.features':<28}{t_np * 1000:>10.1f}")
+    print(f"{'TrendMatrix.to_dict':<28}{t_back * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
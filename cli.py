@@ -36,6 +36,8 @@ def main():
     report = consult(inputs)
     with open(args.out, "w", encoding="utf-8") as f:
         json.dump(report, f, ensure_ascii=False, indent=2)
+    for name, reason in report.get("degraded", {}).items():
+        print(f"warning: {name} provider degraded ({reason})")
     print(f"Wrote {args.out}")
 
 if __name__ == "__main__":
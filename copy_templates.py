@@ -0,0 +1,169 @@
+# Copy templates and tone rules declared as data, compiled once into render functions.
+# Channels and tones can be added with register_channel / register_tone (or by adding
+# entries below) without touching the generators in ai_core_plus.
+#
+# Templates are developer-owned data (they are compiled to Python code, never take them
+# from user input). Fields use str.format syntax; the part after ":" is an argument:
+#   {product} {industry}
+#   {picks:SEP}     picked candidates joined with SEP
+#   {first:DEFAULT} first picked candidate, or DEFAULT when nothing was picked
+#   {pick:I}        I-th picked candidate (reel cuts)
+#   {tag1}          " #<first word of the first pick>" when sns_focus, else ""
+#   {tagset}        "#<word> ..." for every pick (deduplicated) when sns_focus, else ""
+from __future__ import annotations
+import re
+import string
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+Render = Callable[[str, str, Sequence[str], bool], str]
+
+
+@dataclass(frozen=True)
+class ToneRule:
+    replace: Tuple[Tuple[str, str], ...] = ()   # applied as one simultaneous substitution
+    suffix: str = ""
+
+
+@dataclass(frozen=True)
+class CopyChannel:
+    name: str
+    pick: int              # candidates sampled per copy
+    template: str
+    sns: bool = False      # gets two extra variants when sns_focus
+    toned: bool = True     # whether the tone rule applies
+
+
+# -------- data ----------
+TONES: Dict[str, Dict[str, ToneRule]] = {
+    "copy": {
+        "ビジネス": ToneRule(replace=(("！", "。"), ("🔥", ""), ("✨", ""), ("💡", ""))),
+        "ユーモラス": ToneRule(suffix=" 🤣"),
+    },
+    "reel": {
+        "ビジネス": ToneRule(replace=(("スゴい", "注目ポイント"), ("ラク", "効率化"))),
+        "ユーモラス": ToneRule(suffix=" 😂"),
+    },
+}
+
+# Generation order matters: channels draw from one RNG in this order.
+CHANNELS: Dict[str, CopyChannel] = {c.name: c for c in [
+    CopyChannel("SNS/Twitter(X)", 3, "【{product}】注目 → {picks: / }{tag1}｜詳しくは🔗", sns=True),
+    CopyChannel("SNS/Instagram", 4, "📸 {product} の推し：{picks: ・ }\n{tagset}\n保存して後で見返す ✨", sns=True),
+    CopyChannel("SNS/LinkedIn", 3, "{industry}の最新論点：{picks:, }。{product} の活用ポイントを共有します。", sns=True),
+    CopyChannel("広告/Google", 2, "{product}｜{picks:・}。まずは無料で体験。"),
+    CopyChannel("広告/Meta", 2, "{product} を試す理由 → {picks: / }。申込は30秒 ⏱"),
+    CopyChannel("メール/件名", 3, "{product}で成果が動いた要因：{picks:, }", toned=False),
+    CopyChannel("メール/本文", 3, "{product}にご関心ありがとうございます。\n今回は「{picks:, }」の観点から、"
+                                 "すぐ使えるヒントを2分でご紹介します。\n→ 詳細はリンク先へ。"),
+    CopyChannel("LP/ヒーロー", 2, "{product} — {industry}のいまに効く。{first:今必要な一手}を最短で体験。", toned=False),
+]}
+
+REEL_CUTS: Dict[str, str] = {
+    "カット1（掴み）": "映像：『{pick:0}』を強いビジュアルで（最初の1秒で結論）\n字幕：『{pick:0}、実はここがスゴい』\nSFX：タップ音／ズームイン",
+    "カット2（価値提示）": "映像：{product}の使用例 or Before→After／UI画面／口コミ\n字幕：『{pick:1} が変わると… → 劇的にラク！』\nSFX：スウッシュ／テロップ",
+    "カット3（行動喚起）": "映像：CTA（商品→詳細・無料体験・予約導線）\n字幕：『今なら0円で体験 ▶ プロフィールのリンクへ』\nSFX：上向き矢印／指差し",
+}
+
+
+# -------- compilation ----------
+# Each field compiles to a Python expression over (product, industry, picks, sns);
+# a template becomes the source of one function, built with exec like any template engine.
+_FIELDS: Dict[str, Callable[[str], str]] = {
+    "product": lambda arg: "product",
+    "industry": lambda arg: "industry",
+    "picks": lambda arg: f"{arg!r}.join(picks)",
+    "first": lambda arg: f"(picks[0] if picks else {arg!r})",
+    "pick": lambda arg: f"picks[{int(arg)}]",
+    "tag1": lambda arg: "((' #' + picks[0].split()[0]) if sns else '')",
+    "tagset": lambda arg: "(' '.join({'#' + w.split()[0][:12] for w in picks}) if sns else '')",
+}
+
+
+def _template_expr(template: str) -> str:
+    parts: List[str] = []
+    for literal, field, arg, _ in string.Formatter().parse(template):
+        if literal:
+            parts.append(repr(literal))
+        if field is not None:
+            if field not in _FIELDS:
+                raise ValueError(f"unknown template field {field!r} in {template!r}")
+            parts.append(_FIELDS[field](arg or ""))
+    return " + ".join(parts) or "''"
+
+
+def _tone_wrap(expr: str, rule: Optional[ToneRule], env: Dict[str, object]) -> str:
+    if rule is None:
+        return expr
+    if rule.replace and all(len(a) == 1 for a, _ in rule.replace):
+        env["_table"] = str.maketrans({a: b for a, b in rule.replace})
+        expr = f"({expr}).translate(_table)"
+    elif rule.replace:
+        mapping = dict(rule.replace)
+        env["_pattern"] = re.compile("|".join(re.escape(a) for a in sorted(mapping, key=len, reverse=True)))
+        env["_sub"] = lambda m: mapping[m.group()]
+        expr = f"_pattern.sub(_sub, {expr})"
+    if rule.suffix:
+        expr = f"({expr}) + {rule.suffix!r}"
+    return expr
+
+
+def _build(expr: str, env: Dict[str, object]) -> Render:
+    code = f"def render(product, industry, picks, sns):\n    return {expr}\n"
+    exec(compile(code, "<copy_template>", "exec"), env)
+    return env["render"]
+
+
+def compile_template(template: str, tone: Optional[ToneRule] = None) -> Render:
+    '''Compile a template (and optionally a tone rule) into one render function.'''
+    env: Dict[str, object] = {}
+    return _build(_tone_wrap(_template_expr(template), tone, env), env)
+
+
+def compile_tone(rule: Optional[ToneRule]) -> Callable[[str], str]:
+    env: Dict[str, object] = {}
+    render = _build(_tone_wrap("product", rule, env), env)
+    return lambda text: render(text, "", (), False)
+
+
+@lru_cache(maxsize=None)
+def copy_renderer(channel: str, tone: str) -> Render:
+    '''Compiled template + tone for one (channel, tone), cached.'''
+    ch = CHANNELS[channel]
+    return compile_template(ch.template, TONES["copy"].get(tone) if ch.toned else None)
+
+
+@lru_cache(maxsize=None)
+def reel_renderer(tone: str) -> Callable[[str, Sequence[str]], Dict[str, str]]:
+    rule = TONES["reel"].get(tone)
+    cuts = [(label, compile_template(t, rule)) for label, t in REEL_CUTS.items()]
+    return lambda product, picks: {label: render(product, "", picks, False) for label, render in cuts}
+
+
+# -------- registries ----------
+_lock = threading.Lock()
+
+def _invalidate() -> None:
+    copy_renderer.cache_clear()
+    reel_renderer.cache_clear()
+
+
+def register_channel(channel: CopyChannel) -> None:
+    '''Add (or replace) a copy channel. New channels are generated after the existing ones.'''
+    compile_template(channel.template)  # fail fast on unknown fields
+    with _lock:
+        CHANNELS[channel.name] = channel
+        _invalidate()
+
+
+def register_tone(kind: str, tone: str, rule: ToneRule) -> None:
+    '''kind: "copy" or "reel".'''
+    with _lock:
+        TONES.setdefault(kind, {})[tone] = rule
+        _invalidate()
+
+
+def channel_names() -> List[str]:
+    return list(CHANNELS)
@@ -0,0 +1,70 @@
+# Diversity-aware selection of generated copy: pick k of n candidates with maximal
+# marginal relevance (MMR) over hashed character-bigram vectors.
+# Similarity is one n x n cosine matrix computed in NumPy; selection updates a
+# running "closest already-picked" vector, so picking k costs O(n * k).
+from __future__ import annotations
+from typing import List, Optional, Sequence
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+DIM = 1024            # hashed feature dimensions
+LAMBDA = 0.5          # relevance vs. novelty
+_MULT = 0x9E3779B1    # bigram hash: (prev * _MULT + cur) mod DIM
+
+
+def available() -> bool:
+    return np is not None
+
+
+def hashed_features(texts: Sequence[str], dim: int = DIM) -> "np.ndarray":
+    '''L2-normalized counts of hashed character bigrams, one row per text (stable across processes).'''
+    n = len(texts)
+    if n == 0:
+        return np.zeros((0, dim), dtype=np.float32)
+    codes = [np.frombuffer(t.encode("utf-32-le"), dtype=np.uint32) for t in texts]
+    lens = np.array([len(c) for c in codes])
+    flat = np.concatenate(codes).astype(np.uint64) if lens.sum() else np.zeros(0, dtype=np.uint64)
+    rows = np.repeat(np.arange(n), lens)
+    same = rows[:-1] == rows[1:]
+    h = (flat[:-1] * np.uint64(_MULT) + flat[1:]) % np.uint64(dim)
+    idx = rows[:-1][same] * dim + h[same].astype(np.int64)
+    X = np.bincount(idx, minlength=n * dim).reshape(n, dim).astype(np.float32)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    return X / np.where(norms == 0, 1.0, norms)
+
+
+def similarity_matrix(texts: Sequence[str], dim: int = DIM) -> "np.ndarray":
+    X = hashed_features(texts, dim)
+    return X @ X.T
+
+
+def mmr_select(texts: Sequence[str], k: int, relevance: Optional[Sequence[float]] = None,
+               lam: float = LAMBDA) -> List[int]:
+    '''
+    Indices of k texts in selection order. relevance defaults to generation order
+    (earlier candidates slightly preferred), so the first pick is texts[0].
+    '''
+    n = len(texts)
+    k = min(k, n)
+    if k <= 0:
+        return []
+    if np is None:
+        return list(range(k))
+    S = similarity_matrix(texts)
+    rel = np.asarray(relevance, dtype=np.float32) if relevance is not None else \
+        1.0 - np.arange(n, dtype=np.float32) / max(n, 1)
+    picked = [int(np.argmax(rel))]
+    closest = S[picked[0]].copy()
+    taken = np.zeros(n, dtype=bool)
+    taken[picked[0]] = True
+    for _ in range(k - 1):
+        score = lam * rel - (1.0 - lam) * closest
+        score[taken] = -np.inf
+        j = int(np.argmax(score))
+        picked.append(j)
+        taken[j] = True
+        np.maximum(closest, S[j], out=closest)
+    return picked
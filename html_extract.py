@@ -0,0 +1,155 @@
+# Article text extraction with pluggable HTML parser backends.
+# "bs4" (BeautifulSoup + html.parser) is the reference implementation; "lxml" and
+# "selectolax" are C-accelerated backends that must produce the same text, and are
+# picked automatically when installed.
+from __future__ import annotations
+import hashlib
+import html
+import json
+import os
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+try:
+    from bs4 import BeautifulSoup
+except Exception:
+    BeautifulSoup = None
+try:
+    import lxml.html as lxml_html
+except Exception:
+    lxml_html = None
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except Exception:
+    LexborHTMLParser = None
+
+# Extraction rules. Changing any of these changes rules_version(), which
+# invalidates cached cleaned text automatically.
+STRIP_TAGS = ["script","style","noscript","header","footer","form","nav","aside"]
+MIN_LINE_LEN = 8   # keep lines strictly longer than this
+MAX_LINES = 800
+CONTENT_TAGS = ["article", "main", "section"]  # first match wins, then <body>
+_CLEANER_REV = 2   # bump when the extraction logic itself changes
+
+_HAS_BODY = re.compile(r"<body[\s>/]", re.I)
+
+
+def rules_version() -> str:
+    raw = json.dumps([_CLEANER_REV, STRIP_TAGS, MIN_LINE_LEN, MAX_LINES, CONTENT_TAGS])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def _lines(strings: Iterable[str]) -> Iterator[str]:
+    '''
+    Shared tail of every backend: strip each text node, unescape, split into lines,
+    keep the long ones. Lazy, so callers stop parsing once MAX_LINES are collected.
+    '''
+    for s in strings:
+        s = s.strip()
+        if not s:
+            continue
+        for ln in html.unescape(s).splitlines():
+            if ln and len(ln) > MIN_LINE_LEN:
+                yield ln
+
+
+def _finish(strings: Iterable[str]) -> str:
+    out: List[str] = []
+    for ln in _lines(strings):
+        out.append(ln)
+        if len(out) >= MAX_LINES:
+            break
+    return "\n".join(out)
+
+
+# -------- bs4 (reference) ----------
+def _extract_bs4(markup: str) -> str:
+    soup = BeautifulSoup(markup, "html.parser")
+    for s in soup(STRIP_TAGS):
+        s.decompose()
+    cand = None
+    for tag in CONTENT_TAGS:
+        cand = soup.find(tag)
+        if cand:
+            break
+    cand = cand or soup.body or soup
+    return _finish(cand.stripped_strings)
+
+
+# -------- lxml ----------
+def _lxml_strings(el, strip: frozenset) -> Iterator[str]:
+    # Walks text/tail directly instead of removing nodes; skipped subtrees keep their tail.
+    # <template> is skipped too: bs4 keeps its text as TemplateString, which stripped_strings omits.
+    if el.text and isinstance(el.tag, str):
+        yield el.text
+    for child in el:
+        if isinstance(child.tag, str) and child.tag not in strip and child.tag != "template":
+            yield from _lxml_strings(child, strip)
+        if child.tail:
+            yield child.tail
+
+def _lxml_visible(el, strip: frozenset) -> bool:
+    return not any(a.tag in strip for a in el.iterancestors())
+
+def _extract_lxml(markup: str) -> str:
+    if not markup.strip():
+        return ""
+    root = lxml_html.document_fromstring(markup)
+    strip = frozenset(STRIP_TAGS)
+    cand = None
+    for tag in CONTENT_TAGS:
+        cand = next((el for el in root.iter(tag) if _lxml_visible(el, strip)), None)
+        if cand is not None:
+            break
+    if cand is None:
+        # lxml always synthesizes <body>; html.parser only has one if the markup does
+        body = root.find("body")
+        cand = body if body is not None and _HAS_BODY.search(markup) else root
+    return _finish(_lxml_strings(cand, strip))
+
+
+# -------- selectolax (lexbor) ----------
+def _extract_selectolax(markup: str) -> str:
+    tree = LexborHTMLParser(markup)
+    tree.strip_tags(STRIP_TAGS)
+    cand = None
+    for tag in CONTENT_TAGS:
+        cand = tree.css_first(tag)
+        if cand is not None:
+            break
+    if cand is None:
+        cand = tree.body if tree.body is not None and _HAS_BODY.search(markup) else tree.root
+    if cand is None:
+        return ""
+    return _finish(n.text_content for n in cand.traverse(include_text=True) if n.tag == "-text")
+
+
+BACKENDS: Dict[str, Callable[[str], str]] = {}
+if LexborHTMLParser is not None:
+    BACKENDS["selectolax"] = _extract_selectolax
+if lxml_html is not None:
+    BACKENDS["lxml"] = _extract_lxml
+if BeautifulSoup is not None:
+    BACKENDS["bs4"] = _extract_bs4
+
+# WEB_CONSULT_HTML_BACKEND pins a backend; otherwise the fastest installed one is used.
+PREFERRED = os.environ.get("WEB_CONSULT_HTML_BACKEND") or None
+
+
+def available_backends() -> List[str]:
+    return list(BACKENDS)
+
+
+def get_backend(name: Optional[str] = None) -> Callable[[str], str]:
+    name = name or PREFERRED
+    if name:
+        if name not in BACKENDS:
+            raise ValueError(f"HTML backend {name!r} is not installed (available: {', '.join(BACKENDS) or 'none'})")
+        return BACKENDS[name]
+    if not BACKENDS:
+        raise RuntimeError("no HTML parser installed (need beautifulsoup4, lxml or selectolax)")
+    return next(iter(BACKENDS.values()))
+
+
+def extract_text(markup: str, backend: Optional[str] = None) -> str:
+    return get_backend(backend)(markup)
@@ -0,0 +1,350 @@
+# On-disk HTTP response cache shared by every worker process on the host.
+# Layout under the cache dir:
+#   meta/ab/<request key>.json  -> status, validators, body hash, stored_at, ttl
+#   blobs/cd/<sha256 of body>   -> response body (content-addressed, shared between keys)
+# Writes go through a temp file + os.replace so readers never see partial files;
+# eviction runs under an exclusive lock file so only one process prunes at a time.
+# Writes are best-effort: a full or read-only cache dir is counted as store_error and
+# the caller carries on uncached.
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: eviction is still safe, just not serialized across processes
+    fcntl = None
+
+CACHE_DIR = os.environ.get("WEB_CONSULT_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "web_consult_ai")
+MAX_BYTES = int(os.environ.get("WEB_CONSULT_HTTP_CACHE_BYTES", str(256 * 1024 * 1024)))
+ENABLED = os.environ.get("WEB_CONSULT_HTTP_CACHE", "1") != "0"
+
+_log = logging.getLogger(__name__)
+
+# Freshness per kind of source, in seconds. Stale entries are revalidated, not dropped.
+TTL_BY_KIND: Dict[str, float] = {
+    "rss": 15 * 60,
+    "article": 24 * 3600,
+    "search": 6 * 3600,
+    "trends": 3600,   # a 90-day Trends window barely moves within an hour
+}
+DEFAULT_TTL = 3600.0
+
+# Blobs younger than this are never garbage-collected: another process may be
+# about to write the metadata that references them.
+_BLOB_GRACE = 60.0
+_LOW_WATERMARK = 0.9
+_DERIVED_TTL = 10 * 365 * 24 * 3600.0  # derived values are keyed by their inputs, so never stale
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    url: str
+    status: int
+    headers: Dict[str, str]
+    encoding: Optional[str]
+    sha: str
+    size: int
+    stored_at: float
+    ttl: float
+    truncated: bool = False  # body was cut at the request's max_bytes (part of the key)
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (now or time.time()) < self.stored_at + self.ttl
+
+    def validators(self) -> Dict[str, str]:
+        out = {}
+        if self.headers.get("etag"):
+            out["If-None-Match"] = self.headers["etag"]
+        if self.headers.get("last-modified"):
+            out["If-Modified-Since"] = self.headers["last-modified"]
+        return out
+
+
+def request_key(method: str, url: str, params: Any = None, data: Any = None,
+                max_bytes: Optional[int] = None) -> str:
+    def norm(x):
+        if isinstance(x, dict):
+            return sorted((str(k), str(v)) for k, v in x.items())
+        return x
+    parts = [method.upper(), url, norm(params), norm(data)]
+    if max_bytes is not None:  # a body cut at max_bytes must not answer a larger limit
+        parts.append(max_bytes)
+    raw = json.dumps(parts, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def ttl_for(kind: Optional[str]) -> float:
+    return TTL_BY_KIND.get(kind or "", DEFAULT_TTL)
+
+
+class HttpCache:
+    '''
+    Content-addressed response store with LRU eviction against a byte budget.
+    LRU order is the mtime of the metadata file, bumped on every hit.
+    '''
+    _KEEP_HEADERS = ("etag", "last-modified", "content-type")
+
+    def __init__(self, root: str = CACHE_DIR, max_bytes: int = MAX_BYTES):
+        self.root = os.path.join(root, "http")
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._approx_bytes: Optional[int] = None
+        self.counters = {"hit": 0, "miss": 0, "revalidated": 0, "stale_if_error": 0, "stale_if_open": 0,
+                         "store_error": 0, "stored": 0, "evicted": 0}
+        os.makedirs(os.path.join(self.root, "meta"), exist_ok=True)
+        os.makedirs(os.path.join(self.root, "blobs"), exist_ok=True)
+
+    # -------- paths / atomic io ----------
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.root, "meta", key[:2], key + ".json")
+
+    def _blob_path(self, sha: str) -> str:
+        return os.path.join(self.root, "blobs", sha[:2], sha)
+
+    @staticmethod
+    def _atomic_write(path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def record(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    # -------- lookup / store ----------
+    def lookup(self, key: str) -> Optional[CacheEntry]:
+        try:
+            with open(self._meta_path(key), "rb") as f:
+                return CacheEntry(**json.loads(f.read()))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def read_body(self, entry: CacheEntry) -> Optional[bytes]:
+        try:
+            with open(self._blob_path(entry.sha), "rb") as f:
+                body = f.read()
+        except OSError:
+            return None
+        try:
+            os.utime(self._meta_path(entry.key))
+        except OSError:
+            pass
+        return body
+
+    def store(self, key: str, url: str, status: int, headers: Dict[str, str], encoding: Optional[str],
+              body: bytes, ttl: float, truncated: bool = False) -> Optional[CacheEntry]:
+        '''Store body under key; None (and a store_error count) when the cache dir cannot be written.'''
+        try:
+            return self._store(key, url, status, headers, encoding, body, ttl, truncated)
+        except OSError as e:
+            self._write_failed(e)
+            return None
+
+    def _write_failed(self, e: OSError) -> None:
+        self.record("store_error")
+        _log.warning("HTTP cache write failed in %s: %s", self.root, e)
+
+    def _store(self, key: str, url: str, status: int, headers: Dict[str, str], encoding: Optional[str],
+               body: bytes, ttl: float, truncated: bool = False) -> CacheEntry:
+        sha = hashlib.sha256(body).hexdigest()
+        blob = self._blob_path(sha)
+        added = 0
+        if not os.path.exists(blob):
+            self._atomic_write(blob, body)
+            added = len(body)
+        lower = {k.lower(): v for k, v in (headers or {}).items()}
+        entry = CacheEntry(key=key, url=url, status=status, encoding=encoding, sha=sha, size=len(body),
+                           headers={k: lower[k] for k in self._KEEP_HEADERS if k in lower},
+                           stored_at=time.time(), ttl=ttl, truncated=truncated)
+        self._atomic_write(self._meta_path(key), json.dumps(entry.__dict__).encode("utf-8"))
+        self.record("stored")
+        self._grow(added)
+        return entry
+
+    def refresh(self, entry: CacheEntry, headers: Dict[str, str] | None = None) -> CacheEntry:
+        '''Mark an entry fresh again after a 304, picking up new validators if sent.'''
+        lower = {k.lower(): v for k, v in (headers or {}).items()}
+        for k in ("etag", "last-modified"):
+            if lower.get(k):
+                entry.headers[k] = lower[k]
+        entry.stored_at = time.time()
+        try:
+            self._atomic_write(self._meta_path(entry.key), json.dumps(entry.__dict__).encode("utf-8"))
+        except OSError as e:  # still fresh for this response, just not on disk
+            self._write_failed(e)
+        return entry
+
+    # -------- derived artifacts (e.g. cleaned article text) ----------
+    def _derived_key(self, namespace: str, parts: Tuple[str, ...]) -> str:
+        raw = "\x1f".join((namespace,) + parts)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_derived(self, namespace: str, *parts: str) -> Optional[bytes]:
+        '''
+        Values computed from cached content, stored alongside HTTP bodies so they share
+        the byte budget and LRU. Callers put everything the value depends on into parts.
+        Entries stored with a ttl are ignored once it has passed.
+        '''
+        entry = self.lookup(self._derived_key(namespace, parts))
+        body = self.read_body(entry) if entry is not None and entry.is_fresh() else None
+        self.record(f"{namespace}_hit" if body is not None else f"{namespace}_miss")
+        return body
+
+    def put_derived(self, namespace: str, data: bytes, *parts: str, ttl: float = _DERIVED_TTL) -> None:
+        self.store(self._derived_key(namespace, parts), namespace, 200, {}, None, data, ttl)
+
+    # -------- eviction ----------
+    def _iter_meta(self) -> Iterator[Tuple[str, float]]:
+        base = os.path.join(self.root, "meta")
+        for d in os.scandir(base):
+            if not d.is_dir():
+                continue
+            for f in os.scandir(d.path):
+                if f.name.endswith(".json"):
+                    try:
+                        yield f.path, f.stat().st_mtime
+                    except OSError:
+                        continue
+
+    def _iter_blobs(self) -> Iterator[Tuple[str, int, float]]:
+        base = os.path.join(self.root, "blobs")
+        for d in os.scandir(base):
+            if not d.is_dir():
+                continue
+            for f in os.scandir(d.path):
+                if f.name.startswith(".tmp-"):
+                    continue
+                try:
+                    st = f.stat()
+                    yield f.path, st.st_size, st.st_mtime
+                except OSError:
+                    continue
+
+    def disk_usage(self) -> int:
+        return sum(size for _, size, _ in self._iter_blobs())
+
+    def _grow(self, n: int) -> None:
+        with self._lock:
+            if self._approx_bytes is None:
+                self._approx_bytes = self.disk_usage()
+            else:
+                self._approx_bytes += n
+            over = self._approx_bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self, target: Optional[int] = None) -> int:
+        '''
+        Drop least-recently-used entries until blobs fit in target bytes
+        (default: 90% of max_bytes). Returns the number of entries removed.
+        '''
+        target = int(self.max_bytes * _LOW_WATERMARK) if target is None else target
+        lock_path = os.path.join(self.root, "evict.lock")
+        with open(lock_path, "a+") as lf:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lf, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return 0  # another process is already evicting
+            removed = self._evict_locked(target)
+        return removed
+
+    def _evict_locked(self, target: int) -> int:
+        metas = []
+        for path, mtime in self._iter_meta():
+            try:
+                with open(path, "rb") as f:
+                    m = json.loads(f.read())
+                metas.append((mtime, path, m["sha"]))
+            except (OSError, ValueError, KeyError):
+                continue
+        metas.sort()
+        refs: Dict[str, int] = {}
+        for _, _, sha in metas:
+            refs[sha] = refs.get(sha, 0) + 1
+        blobs = {os.path.basename(p): (p, size, mtime) for p, size, mtime in self._iter_blobs()}
+        total = sum(size for _, size, _ in blobs.values())
+        now = time.time()
+        # unreferenced blobs first (left over from evicted keys or crashed writers)
+        for sha, (p, size, mtime) in list(blobs.items()):
+            if sha not in refs and now - mtime > _BLOB_GRACE:
+                try:
+                    os.unlink(p); total -= size
+                except OSError:
+                    pass
+        removed = 0
+        for _, path, sha in metas:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            removed += 1
+            refs[sha] -= 1
+            if refs[sha] == 0 and sha in blobs:
+                p, size, _ = blobs[sha]
+                try:
+                    os.unlink(p); total -= size
+                except OSError:
+                    pass
+        with self._lock:
+            self._approx_bytes = total
+            self.counters["evicted"] += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self.counters)
+            out["approx_bytes"] = self._approx_bytes
+        lookups = out["hit"] + out["revalidated"] + out["miss"]
+        out["hit_ratio"] = (out["hit"] + out["revalidated"]) / lookups if lookups else 0.0
+        out["max_bytes"] = self.max_bytes
+        return out
+
+
+_default: Optional[HttpCache] = None
+_default_lock = threading.Lock()
+
+def get_cache() -> Optional[HttpCache]:
+    '''Process-wide cache, or None when disabled (WEB_CONSULT_HTTP_CACHE=0).'''
+    global _default
+    if not ENABLED:
+        return None
+    with _default_lock:
+        if _default is None:
+            try:
+                _default = HttpCache()
+            except OSError:
+                return None
+        return _default
+
+def configure(root: Optional[str] = None, max_bytes: Optional[int] = None, enabled: bool = True) -> Optional[HttpCache]:
+    '''Replace the process-wide cache (tests, or apps that want a different directory/budget).'''
+    global _default, ENABLED
+    with _default_lock:
+        ENABLED = enabled
+        _default = HttpCache(root or CACHE_DIR, max_bytes or MAX_BYTES) if enabled else None
+        return _default
+
+def stats() -> Dict[str, Any]:
+    cache = get_cache()
+    return cache.stats() if cache else {}
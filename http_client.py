@@ -0,0 +1,489 @@
+# Shared HTTP client: keep-alive pooling, per-host pool sizes and retries with backoff.
+# Every outbound fetch (RSS, articles, search providers) goes through this module.
+from __future__ import annotations
+import asyncio
+import atexit
+import codecs
+import json
+import random
+import re
+import threading
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+try:
+    from . import http_cache, resilience
+except ImportError:  # loaded as a top-level module (streamlit_app.py)
+    import http_cache
+    import resilience
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except Exception:
+    requests = None
+    HTTPAdapter = None
+    Retry = None
+try:
+    import aiohttp
+except Exception:
+    aiohttp = None
+try:
+    import charset_normalizer
+except Exception:
+    charset_normalizer = None
+
+USER_AGENT = {"User-Agent": "Mozilla/5.0"}
+
+# Pool sizing. Hosts not listed here share DEFAULT_POOL_SIZE connections each.
+DEFAULT_POOL_SIZE = 4
+HOST_POOL_SIZES: Dict[str, int] = {
+    "news.google.com": 8,
+    "serpapi.com": 8,
+    "duckduckgo.com": 2,
+}
+TOTAL_CONNECTIONS = 64
+KEEPALIVE_SECONDS = 30.0
+
+# Retries on transient failures: connection errors and these status codes.
+RETRY_TOTAL = 2
+RETRY_BACKOFF = 0.3
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_METHODS = frozenset({"GET", "HEAD", "POST"})  # POST is only used for read-only search forms
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, response: "HttpResponse"):
+        super().__init__(f"HTTP {response.status} for {response.url}")
+        self.response = response
+
+
+@dataclass
+class HttpResponse:
+    '''
+    Fully-read response, identical for the sync and async paths.
+    '''
+    url: str
+    status: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    content: bytes = b""
+    encoding: Optional[str] = None
+    truncated: bool = False  # body cut at max_bytes
+    rejected: bool = False   # Content-Type not in accept; body was never read
+    stale: bool = False      # expired cached body served because upstream failed or its circuit is open
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            raise HTTPStatusError(self)
+
+
+# -------- streaming helpers ----------
+_CHUNK = 64 * 1024
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([A-Za-z0-9_.:-]+)""", re.I)
+_NON_ASCII = re.compile(rb"[\x80-\xff]")
+_BOMS = ((codecs.BOM_UTF8, "utf-8"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+
+def _header(headers: Dict[str, str], name: str) -> str:
+    name = name.lower()
+    return next((v for k, v in headers.items() if k.lower() == name), "")
+
+def _known_codec(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name.strip().strip("'\"")).name
+    except LookupError:
+        return None
+
+def detect_charset(headers: Dict[str, str], body: bytes) -> Optional[str]:
+    '''
+    Content-Type charset, then BOM, then <meta charset> in the first 4 KB. Only if all
+    of those are missing is a detector run, and only over the 16 KB starting at the first
+    non-ASCII byte (a long ASCII <head> says nothing about the encoding), so the body is
+    decoded exactly once afterwards (requests' .text runs chardet over all of it).
+    '''
+    ctype = _header(headers, "Content-Type")
+    for part in ctype.split(";")[1:]:
+        k, _, v = part.partition("=")
+        if k.strip().lower() == "charset" and _known_codec(v):
+            return _known_codec(v)
+    for bom, name in _BOMS:
+        if body.startswith(bom):
+            return name
+    m = _META_CHARSET.search(body[:4096])
+    if m and _known_codec(m.group(1).decode("ascii", "ignore")):
+        return _known_codec(m.group(1).decode("ascii", "ignore"))
+    if not body or ctype.lower().startswith(("application/json", "application/rss", "application/atom", "text/xml", "application/xml")):
+        return None  # JSON/XML default to UTF-8 (XML parsers read the prolog themselves)
+    first = _NON_ASCII.search(body)
+    if first is None:
+        return "utf-8"  # plain ASCII decodes the same either way
+    region = body[first.start():first.start() + 16384]
+    try:
+        region.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        if e.start >= len(region) - 3 and first.start() + len(region) < len(body):
+            return "utf-8"  # a multibyte char cut by the region boundary
+    if charset_normalizer is not None:
+        best = charset_normalizer.from_bytes(region).best()
+        if best is not None:
+            return best.encoding
+    return None
+
+def _accepts(headers: Dict[str, str], accept: Optional[Tuple[str, ...]]) -> bool:
+    if not accept:
+        return True
+    ctype = _header(headers, "Content-Type").split(";")[0].strip().lower()
+    return not ctype or ctype.startswith(accept)
+
+
+def available() -> bool:
+    return requests is not None or aiohttp is not None
+
+def pool_size_for(host: str) -> int:
+    return HOST_POOL_SIZES.get(host, DEFAULT_POOL_SIZE)
+
+
+# -------- response cache glue (shared by the sync and async paths) ----------
+@dataclass
+class _CachePlan:
+    store: "http_cache.HttpCache"
+    key: str
+    url: str
+    ttl: float
+    entry: Optional["http_cache.CacheEntry"]
+    kwargs: Dict[str, Any]
+    response: Optional[HttpResponse] = None
+
+def _from_entry(entry: "http_cache.CacheEntry", body: bytes, stale: bool = False) -> HttpResponse:
+    return HttpResponse(url=entry.url, status=entry.status, headers=dict(entry.headers),
+                        content=body, encoding=entry.encoding, truncated=entry.truncated, stale=stale)
+
+def _cache_begin(method: str, url: str, kind: Optional[str], kwargs: Dict[str, Any],
+                 max_bytes: Optional[int] = None) -> Optional[_CachePlan]:
+    store = http_cache.get_cache() if kind else None
+    if store is None:
+        return None
+    key = http_cache.request_key(method, url, kwargs.get("params"), kwargs.get("data"), max_bytes)
+    entry = store.lookup(key)
+    plan = _CachePlan(store=store, key=key, url=url, ttl=http_cache.ttl_for(kind), entry=entry, kwargs=dict(kwargs))
+    if entry is not None and entry.is_fresh():
+        body = store.read_body(entry)
+        if body is not None:
+            store.record("hit")
+            plan.response = _from_entry(entry, body)
+            return plan
+    if entry is not None:
+        headers = dict(kwargs.get("headers") or {})
+        headers.update(entry.validators())
+        plan.kwargs["headers"] = headers
+    return plan
+
+def _cache_finish(plan: _CachePlan, res: HttpResponse, conditional: bool = True) -> Optional[HttpResponse]:
+    '''
+    Store a fresh 200, or answer from the cached body on 304 (revalidated) and on 5xx
+    (stale-if-error, marked .stale). Returns None when a 304 arrives but the body is gone.
+    '''
+    store, entry = plan.store, plan.entry
+    if conditional and entry is not None and (res.status == 304 or res.status >= 500):
+        body = store.read_body(entry)
+        if body is None:
+            return None if res.status == 304 else res
+        if res.status == 304:
+            store.refresh(entry, res.headers)
+            store.record("revalidated")
+            return _from_entry(entry, body)
+        store.record("stale_if_error")
+        return _from_entry(entry, body, stale=True)
+    store.record("miss")
+    if res.status == 200 and not res.rejected and "no-store" not in _header(res.headers, "Cache-Control").lower():
+        store.store(plan.key, plan.url, res.status, res.headers, res.encoding, res.content, plan.ttl,
+                    truncated=res.truncated)
+    return res
+
+def _cache_stale(plan: _CachePlan) -> Optional[HttpResponse]:
+    '''The cached body of plan regardless of age (the provider's circuit is open), if any.'''
+    body = plan.store.read_body(plan.entry) if plan.entry is not None else None
+    if body is None:
+        return None
+    plan.store.record("stale_if_open")
+    return _from_entry(plan.entry, body, stale=True)
+
+
+# -------- sync (requests) ----------
+_session = None
+_session_lock = threading.Lock()
+
+def _retry() -> "Retry":
+    return Retry(total=RETRY_TOTAL, connect=RETRY_TOTAL, read=0, status=RETRY_TOTAL,
+                 backoff_factor=RETRY_BACKOFF, status_forcelist=RETRY_STATUSES,
+                 allowed_methods=RETRY_METHODS, raise_on_status=False)
+
+def get_session() -> "requests.Session":
+    '''
+    Process-wide requests.Session. Hosts in HOST_POOL_SIZES get their own adapter
+    (and pool size); everything else uses the default adapter.
+    '''
+    global _session
+    if requests is None:
+        raise RuntimeError("requests is not installed")
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            s.headers.update(USER_AGENT)
+            default = HTTPAdapter(pool_connections=TOTAL_CONNECTIONS // DEFAULT_POOL_SIZE,
+                                  pool_maxsize=DEFAULT_POOL_SIZE, max_retries=_retry())
+            s.mount("http://", default)
+            s.mount("https://", default)
+            for host, size in HOST_POOL_SIZES.items():
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=_retry())
+                s.mount(f"https://{host}/", adapter)
+                s.mount(f"http://{host}/", adapter)
+            _session = s
+        return _session
+
+def _send(method: str, url: str, *, timeout: float = 20.0, max_bytes: Optional[int] = None,
+          accept: Optional[Tuple[str, ...]] = None, **kwargs) -> HttpResponse:
+    with get_session().request(method, url, timeout=timeout, stream=True, **kwargs) as res:
+        headers = dict(res.headers)
+        out = HttpResponse(url=res.url, status=res.status_code, headers=headers)
+        if not _accepts(headers, accept):
+            out.rejected = True
+            return out
+        buf = bytearray()
+        for chunk in res.iter_content(_CHUNK):
+            buf += chunk
+            if max_bytes is not None and len(buf) >= max_bytes:
+                out.truncated = True
+                del buf[max_bytes:]
+                break
+    out.content = bytes(buf)
+    out.encoding = detect_charset(headers, out.content)
+    return out
+
+def _guarded_send(method: str, url: str, *, provider: Optional[str] = None, timeout: float = 20.0,
+                  **kwargs) -> HttpResponse:
+    guard = resilience.guard(provider) if provider else None
+    if guard is None:
+        return _send(method, url, timeout=timeout, **kwargs)
+    guard.before(max_wait=timeout)
+    try:
+        res = _send(method, url, timeout=timeout, **kwargs)
+    except Exception:
+        guard.failure()
+        raise
+    guard.record(res.status)
+    return res
+
+def request(method: str, url: str, *, timeout: float = 20.0, cache: Optional[str] = None,
+            max_bytes: Optional[int] = None, accept: Optional[Tuple[str, ...]] = None,
+            provider: Optional[str] = None, **kwargs) -> HttpResponse:
+    '''
+    Pooled request. The body is streamed: a Content-Type outside accept (prefixes such as
+    "text/html") is rejected before anything is read, and reading stops at max_bytes.
+    With cache="rss"/"article"/"search" (see http_cache.TTL_BY_KIND) the on-disk cache is
+    consulted first and stale entries are revalidated with a conditional GET.
+    With provider= (a provider endpoint such as "serpapi" or "google_news"), requests
+    that reach the network are rate limited and go through that provider's circuit
+    breaker (see resilience); while it is open (or the token wait would exceed timeout)
+    a cached body is served if there is one, else CircuitOpen / Throttled is raised.
+    '''
+    limits = {"max_bytes": max_bytes, "accept": accept, "provider": provider}
+    plan = _cache_begin(method, url, cache, kwargs, max_bytes)
+    if plan is None:
+        return _guarded_send(method, url, timeout=timeout, **limits, **kwargs)
+    if plan.response is not None:
+        return plan.response
+    try:
+        res = _guarded_send(method, url, timeout=timeout, **limits, **plan.kwargs)
+    except (resilience.CircuitOpen, resilience.Throttled):
+        out = _cache_stale(plan)
+        if out is None:
+            raise
+        return out
+    out = _cache_finish(plan, res)
+    if out is None:  # 304 but the cached body vanished: fetch it unconditionally
+        res = _guarded_send(method, url, timeout=timeout, **limits, **kwargs)
+        out = _cache_finish(plan, res, conditional=False)
+    return out
+
+def get(url: str, **kwargs) -> HttpResponse:
+    return request("GET", url, **kwargs)
+
+def post(url: str, **kwargs) -> HttpResponse:
+    return request("POST", url, **kwargs)
+
+
+# -------- async (aiohttp, or the pooled requests session on a worker thread) ----------
+_async_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+_host_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+def async_session():
+    '''
+    aiohttp.ClientSession bound to the running loop, created on first use and reused
+    for every request on that loop so connections stay alive between calls.
+    '''
+    loop = asyncio.get_running_loop()
+    sess = _async_sessions.get(loop)
+    if sess is None or sess.closed:
+        connector = aiohttp.TCPConnector(limit=TOTAL_CONNECTIONS, limit_per_host=max(HOST_POOL_SIZES.values(), default=DEFAULT_POOL_SIZE),
+                                         keepalive_timeout=KEEPALIVE_SECONDS, ttl_dns_cache=300)
+        sess = aiohttp.ClientSession(connector=connector, headers=USER_AGENT)
+        _async_sessions[loop] = sess
+    return sess
+
+def _host_limit(host: str) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    limits = _host_limits.setdefault(loop, {})
+    if host not in limits:
+        limits[host] = asyncio.Semaphore(pool_size_for(host))
+    return limits[host]
+
+async def aclose() -> None:
+    '''Close the session of the running loop (call before shutting a service loop down).'''
+    loop = asyncio.get_running_loop()
+    sess = _async_sessions.pop(loop, None)
+    if sess is not None and not sess.closed:
+        await sess.close()
+
+async def _aiohttp_request(method: str, url: str, timeout: float, max_bytes: Optional[int] = None,
+                           accept: Optional[Tuple[str, ...]] = None, **kwargs) -> HttpResponse:
+    async with _host_limit(urlparse(url).netloc):
+        async with async_session().request(method, url, timeout=aiohttp.ClientTimeout(total=timeout), **kwargs) as res:
+            headers = dict(res.headers)
+            out = HttpResponse(url=str(res.url), status=res.status, headers=headers)
+            if not _accepts(headers, accept):
+                out.rejected = True
+                return out
+            buf = bytearray()
+            async for chunk in res.content.iter_chunked(_CHUNK):
+                buf += chunk
+                if max_bytes is not None and len(buf) >= max_bytes:
+                    out.truncated = True
+                    del buf[max_bytes:]
+                    break
+    out.content = bytes(buf)
+    out.encoding = detect_charset(headers, out.content)
+    return out
+
+async def arequest(method: str, url: str, *, timeout: float = 20.0, cache: Optional[str] = None,
+                   max_bytes: Optional[int] = None, accept: Optional[Tuple[str, ...]] = None,
+                   provider: Optional[str] = None, **kwargs) -> HttpResponse:
+    '''
+    Async request with the same streaming limits, retry policy, response cache, rate
+    limits and circuit breakers as request(). Cancellation is never swallowed.
+    '''
+    limits = {"max_bytes": max_bytes, "accept": accept, "provider": provider}
+    if aiohttp is None:
+        return await asyncio.to_thread(request, method, url, timeout=timeout, cache=cache, **limits, **kwargs)
+    plan = await asyncio.to_thread(_cache_begin, method, url, cache, kwargs, max_bytes) if cache else None
+    if plan is None:
+        return await _aguarded_send(method, url, timeout, **limits, **kwargs)
+    if plan.response is not None:
+        return plan.response
+    try:
+        res = await _aguarded_send(method, url, timeout, **limits, **plan.kwargs)
+    except (resilience.CircuitOpen, resilience.Throttled):
+        out = await asyncio.to_thread(_cache_stale, plan)
+        if out is None:
+            raise
+        return out
+    out = await asyncio.to_thread(_cache_finish, plan, res)
+    if out is None:
+        res = await _aguarded_send(method, url, timeout, **limits, **kwargs)
+        out = await asyncio.to_thread(_cache_finish, plan, res, False)
+    return out
+
+async def _aguarded_send(method: str, url: str, timeout: float, provider: Optional[str] = None,
+                         **kwargs) -> HttpResponse:
+    guard = resilience.guard(provider) if provider else None
+    if guard is None:
+        return await _arequest_retrying(method, url, timeout, **kwargs)
+    await guard.abefore(max_wait=timeout)
+    try:
+        res = await _arequest_retrying(method, url, timeout, **kwargs)
+    except asyncio.CancelledError:
+        guard.breaker.release()  # not the provider's fault; free a half-open trial
+        raise
+    except Exception:
+        guard.failure()
+        raise
+    guard.record(res.status)
+    return res
+
+async def _arequest_retrying(method: str, url: str, timeout: float, **kwargs) -> HttpResponse:
+    '''
+    Connection errors and RETRY_STATUSES are retried up to RETRY_TOTAL times with
+    exponential backoff, matching the urllib3 policy of the sync session.
+    '''
+    attempt = 0
+    while True:
+        try:
+            res = await _aiohttp_request(method, url, timeout, **kwargs)
+            if res.status not in RETRY_STATUSES or attempt >= RETRY_TOTAL:
+                return res
+        except aiohttp.ClientConnectionError:
+            if attempt >= RETRY_TOTAL:
+                raise
+        await asyncio.sleep(RETRY_BACKOFF * (2 ** attempt) * (0.5 + random.random()))
+        attempt += 1
+
+async def aget(url: str, **kwargs) -> HttpResponse:
+    return await arequest("GET", url, **kwargs)
+
+
+# -------- running coroutines from sync code ----------
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+def background_loop() -> asyncio.AbstractEventLoop:
+    '''
+    One long-lived event loop on a daemon thread. Sync wrappers run their coroutines
+    here, so the aiohttp session (and its keep-alive connections) survives between calls.
+    '''
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="http-client-loop", daemon=True).start()
+            _loop = loop
+        return _loop
+
+def run_sync(coro):
+    '''
+    Run a coroutine from sync code on the background loop and wait for its result.
+    Safe to call from a thread that already has a running loop (other than the background one).
+    '''
+    loop = background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_sync() called from the http client loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+@atexit.register
+def _shutdown() -> None:
+    if _loop is not None and _loop.is_running():
+        try:
+            asyncio.run_coroutine_threadsafe(aclose(), _loop).result(timeout=2)
+        except Exception:
+            pass
+        _loop.call_soon_threadsafe(_loop.stop)
@@ -0,0 +1,133 @@
+# Persistent document-frequency index over every article research has parsed, so
+# keypoints can be ranked by TF-IDF instead of raw in-request frequency.
+# Stored as SQLite next to the HTTP cache, one file per tokenizer:
+#   docs(h)      -> 64-bit hash of the article URL, so a page is counted once
+#   terms(h, df) -> 64-bit hash of the n-gram, number of indexed docs containing it
+#   meta(k, v)   -> running document count
+# Tables are WITHOUT ROWID with integer keys, which keeps the file small. WAL mode
+# lets several processes read while one writes.
+from __future__ import annotations
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    from . import http_cache, keypoints
+except ImportError:  # loaded as a top-level module (streamlit_app.py)
+    import http_cache, keypoints
+
+ENABLED = os.environ.get("WEB_CONSULT_KEYPOINT_INDEX", "1") != "0"
+MIN_DOCS = 20          # below this the index says too little; rank by raw frequency
+CANDIDATES = 200       # top raw-frequency n-grams re-scored by TF-IDF
+MAX_BYTES = int(os.environ.get("WEB_CONSULT_KEYPOINT_INDEX_BYTES", str(64 * 1024 * 1024)))
+# past MAX_BYTES, terms seen in a single document are dropped (their idf barely changes)
+
+
+def term_hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+class KeypointIndex:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS docs (h INTEGER PRIMARY KEY) WITHOUT ROWID")
+            db.execute("CREATE TABLE IF NOT EXISTS terms (h INTEGER PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID")
+            db.execute("CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v INTEGER NOT NULL) WITHOUT ROWID")
+            db.execute("INSERT OR IGNORE INTO meta(k, v) VALUES ('docs', 0)")
+
+    def _conn(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10.0)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def add_documents(self, docs: Iterable[Tuple[str, Iterable[str]]]) -> int:
+        '''
+        Add (doc_id, distinct terms) pairs in one transaction. Documents already in the
+        index are skipped. Returns how many were new.
+        '''
+        added = 0
+        db = self._conn()
+        with db:
+            for doc_id, terms in docs:
+                if db.execute("INSERT OR IGNORE INTO docs(h) VALUES (?)", (term_hash(doc_id),)).rowcount == 0:
+                    continue
+                db.executemany("INSERT INTO terms(h, df) VALUES (?, 1) ON CONFLICT(h) DO UPDATE SET df = df + 1",
+                               ((term_hash(t),) for t in set(terms)))
+                added += 1
+            db.execute("UPDATE meta SET v = v + ? WHERE k = 'docs'", (added,))
+        if added and self.used_bytes() > MAX_BYTES:
+            with db:
+                db.execute("DELETE FROM terms WHERE df <= 1")
+        return added
+
+    def used_bytes(self) -> int:
+        db = self._conn()
+        pages = db.execute("PRAGMA page_count").fetchone()[0] - db.execute("PRAGMA freelist_count").fetchone()[0]
+        return pages * db.execute("PRAGMA page_size").fetchone()[0]
+
+    def doc_count(self) -> int:
+        return self._conn().execute("SELECT v FROM meta WHERE k = 'docs'").fetchone()[0]
+
+    def term_count(self) -> int:
+        return self._conn().execute("SELECT count(*) FROM terms").fetchone()[0]
+
+    def document_frequencies(self, terms: Sequence[str]) -> Dict[str, int]:
+        hashes = {term_hash(t): t for t in terms}
+        out = {t: 0 for t in terms}
+        keys = list(hashes)
+        db = self._conn()
+        for i in range(0, len(keys), 500):  # stay under SQLite's bound-parameter limit
+            chunk = keys[i:i+500]
+            q = f"SELECT h, df FROM terms WHERE h IN ({','.join('?' * len(chunk))})"
+            for h, df in db.execute(q, chunk):
+                out[hashes[h]] = df
+        return out
+
+    def idf(self, df: int, n_docs: int) -> float:
+        # BM25's idf, floored at 0 so terms in most documents just stop counting
+        return max(0.0, math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5)))
+
+    def rank(self, counts: "keypoints.NgramCounter", top_k: int = 20) -> List[str]:
+        '''
+        TF-IDF ranking of the request's n-grams. Ties keep the raw-frequency order,
+        and a cold index (fewer than MIN_DOCS documents) falls back to it entirely.
+        '''
+        candidates = keypoints.rank_keypoints(counts, CANDIDATES)
+        n_docs = self.doc_count()
+        if n_docs < MIN_DOCS:
+            return candidates[:top_k]
+        dfs = self.document_frequencies(candidates)
+        scored = sorted(candidates, key=lambda t: -counts.get(t) * self.idf(dfs[t], n_docs))
+        return scored[:top_k]
+
+
+_indexes: Dict[str, KeypointIndex] = {}
+_lock = threading.Lock()
+
+def get_index(tokenizer: Optional[str] = None) -> Optional[KeypointIndex]:
+    '''
+    Process-wide index for a tokenizer, kept in the HTTP cache directory. None when
+    disabled (WEB_CONSULT_KEYPOINT_INDEX=0) or when the HTTP cache itself is off.
+    '''
+    store = http_cache.get_cache()
+    if not ENABLED or store is None:
+        return None
+    name = keypoints.word_segment.backend_name(tokenizer)
+    path = os.path.join(os.path.dirname(store.root), f"keypoints-{name}.sqlite3")
+    with _lock:
+        if path not in _indexes:
+            try:
+                _indexes[path] = KeypointIndex(path)
+            except (OSError, sqlite3.Error):
+                return None
+        return _indexes[path]
@@ -0,0 +1,170 @@
+# Keypoint extraction: segment article text into content words (word_segment),
+# count 1-3 grams, rank by frequency.
+# Counting streams over one document at a time with a sliding window that restarts
+# at sentence boundaries. Tokens get
+# integer ids and every n-gram is packed into a single int, so no n-gram strings
+# are built until ranking. The table is bounded Space-Saving style: past
+# capacity the rarest entries are dropped, and any n-gram counted more than
+# NgramCounter.floor times is guaranteed to still be there.
+# Counts are per document and merge in document order (e.g. partials from worker
+# processes), so ranking ties come out exactly like a single pass.
+from __future__ import annotations
+import heapq
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from . import word_segment
+    from .word_segment import STOP_WORDS
+except ImportError:  # loaded as a top-level module (streamlit_app.py)
+    import word_segment
+    from word_segment import STOP_WORDS
+
+_NUMERIC = re.compile(r"\d+")
+MAX_N = 3
+CAPACITY = 20_000    # n-grams kept after pruning; the table grows to 2x this before pruning
+
+_BITS = 24           # bits per token id in a packed n-gram (16M distinct tokens)
+_MASK = (1 << _BITS) - 1
+
+
+class NgramCounter:
+    '''
+    Bounded 1..3-gram counts. Keys are token ids packed into one int
+    (ids start at 1, so the number of 24-bit slots is the n-gram order).
+    tokenizer is a word_segment backend name (None: the preferred one).
+    '''
+
+    def __init__(self, capacity: int = CAPACITY, tokenizer: Optional[str] = None):
+        self.capacity = capacity
+        self.tokenizer = word_segment.backend_name(tokenizer)
+        self.floor = 0   # max count an evicted n-gram had; bounds the over-count of newer ones
+        self._ids: Dict[str, int] = {}
+        self._vocab: List[str] = []
+        self._counts: Dict[int, int] = {}
+
+    def _id(self, token: str) -> int:
+        i = self._ids.get(token)
+        if i is None:
+            self._vocab.append(token)
+            i = self._ids[token] = len(self._vocab)
+        return i
+
+    def add(self, text: str) -> "NgramCounter":
+        '''Count one document. N-grams never span two documents.'''
+        counts, floor, limit = self._counts, self.floor, 2 * self.capacity
+        a = b = 0
+        for w in word_segment.iter_tokens(text, self.tokenizer):
+            if not w:
+                a = b = 0
+                continue
+            c = self._id(w)
+            counts[c] = counts.get(c, floor) + 1
+            if b:
+                k = (b << _BITS) | c
+                counts[k] = counts.get(k, floor) + 1
+                if a:
+                    k = (a << 2 * _BITS) | k
+                    counts[k] = counts.get(k, floor) + 1
+            a, b = b, c
+            if len(counts) > limit:
+                self._prune()
+                counts, floor = self._counts, self.floor
+        return self
+
+    def merge(self, other: "NgramCounter") -> "NgramCounter":
+        remap = [0] + [self._id(t) for t in other._vocab]
+        counts, floor = self._counts, self.floor
+        for key, c in other._counts.items():
+            k, shift = 0, 0
+            while key:
+                k |= remap[key & _MASK] << shift
+                key >>= _BITS
+                shift += _BITS
+            counts[k] = counts.get(k, floor) + c
+        self.floor += other.floor
+        if len(counts) > 2 * self.capacity:
+            self._prune()
+        return self
+
+    def _prune(self) -> None:
+        # keep the `capacity` largest counts; ties go to the earliest inserted
+        counts = self._counts
+        cut = heapq.nlargest(self.capacity, counts.values())[-1]
+        room = self.capacity - sum(1 for c in counts.values() if c > cut)
+        kept: Dict[int, int] = {}
+        for k, c in counts.items():
+            if c > cut or (c == cut and room > 0):
+                room -= c == cut
+                kept[k] = c
+            elif c > self.floor:
+                self.floor = c
+        self._counts = kept
+
+    # -------- reading ----------
+    def _decode(self, key: int) -> str:
+        parts = []
+        while key:
+            parts.append(self._vocab[(key & _MASK) - 1])
+            key >>= _BITS
+        return " ".join(reversed(parts))
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        '''(n-gram, count) in first-occurrence order.'''
+        for k, c in self._counts.items():
+            yield self._decode(k), c
+
+    def get(self, ngram: str, default: int = 0) -> int:
+        key = 0
+        for t in ngram.split(" "):
+            i = self._ids.get(t)
+            if i is None:
+                return default
+            key = (key << _BITS) | i
+        return self._counts.get(key, default)
+
+    def top(self, top_k: int, skip=lambda s: False) -> List[str]:
+        # ties: shorter n-grams first, then first occurrence (dict order)
+        order = sorted(self._counts.items(), key=lambda kv: (-kv[1], (kv[0].bit_length() - 1) // _BITS))
+        out = []
+        for k, _ in order:
+            if len(out) >= top_k:
+                break
+            s = self._decode(k)
+            if not skip(s):
+                out.append(s)
+        return out
+
+
+def _is_noise(ngram: str) -> bool:
+    return ngram.lower() in STOP_WORDS or _NUMERIC.fullmatch(ngram) is not None
+
+
+def count_ngrams(text: str, counts: Optional[NgramCounter] = None, tokenizer: Optional[str] = None) -> NgramCounter:
+    return (NgramCounter(tokenizer=tokenizer) if counts is None else counts).add(text)
+
+
+def count_texts(texts: Iterable[str], capacity: int = CAPACITY, tokenizer: Optional[str] = None) -> NgramCounter:
+    counts = NgramCounter(capacity, tokenizer)
+    for t in texts:
+        counts.add(t)
+    return counts
+
+
+def merge_counts(partials: Iterable[NgramCounter], capacity: int = CAPACITY) -> NgramCounter:
+    '''Merge per-document counts; pass them in document order to keep tie order stable.'''
+    total = NgramCounter(capacity)
+    for c in partials:
+        total.merge(c)
+    return total
+
+
+def rank_keypoints(counts: NgramCounter, top_k: int = 20) -> List[str]:
+    return counts.top(top_k, skip=_is_noise)
+
+
+def extract_keypoints(texts: List[str], top_k: int = 20, tokenizer: Optional[str] = None) -> List[str]:
+    return rank_keypoints(count_texts(texts, tokenizer=tokenizer), top_k)
@@ -1,37 +1,162 @@
 from __future__ import annotations
-from typing import List, Dict, Any
-import os
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass, replace
+from typing import Callable, List, Dict, Any, Optional
+import time
 
-from .providers import PytrendsProvider, DummyTrendsProvider, SerpAPISearchProvider, DuckDuckGoProvider
+from . import trend_matrix
+from .providers import registry
 from .config import ResearchConfig, Benchmark, DEFAULT_BENCHMARKS
 
+# Per-provider budgets and the overall deadline for one round of provider calls, in seconds.
+PROVIDER_TIMEOUTS: Dict[str, float] = {"trends": 20.0, "search": 20.0}
+DEADLINE = 25.0
+
+# Shared by every consult. A provider that misses its budget keeps its thread until the
+# HTTP timeout fires, so callers are never blocked on it.
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="market-research")
+
+
+@dataclass
+class ProviderResult:
+    name: str
+    value: Any            # the provider's dict, or a TrendMatrix (call_providers(matrix=True))
+    seconds: float
+    degraded: bool = False
+    error: str = ""
+
+
+class ProviderCalls:
+    '''
+    Provider calls running concurrently. result(name) waits until the provider's own
+    budget or the shared deadline (both counted from submission) runs out; a provider
+    that is late or raises yields its fallback value marked degraded instead. A value
+    the provider itself marked {"degraded": True} (open circuit) counts as degraded too.
+    '''
+    def __init__(self, calls: Dict[str, Callable[[], Any]], fallbacks: Dict[str, Any],
+                 timeouts: Optional[Dict[str, float]] = None, deadline: float = DEADLINE):
+        self.started = time.perf_counter()
+        self.deadline = deadline
+        self.timeouts = {**PROVIDER_TIMEOUTS, **(timeouts or {})}
+        self._fallbacks = fallbacks
+        self._futures: Dict[str, Future] = {name: _pool.submit(self._timed, fn) for name, fn in calls.items()}
+        self._results: Dict[str, ProviderResult] = {}
+
+    @staticmethod
+    def _timed(fn: Callable[[], Dict[str, Any]]):
+        t0 = time.perf_counter()
+        value = fn()
+        return value, time.perf_counter() - t0
+
+    def result(self, name: str) -> ProviderResult:
+        if name in self._results:
+            return self._results[name]
+        budget = min(self.timeouts.get(name, self.deadline), self.deadline)
+        remaining = max(0.0, self.started + budget - time.perf_counter())
+        try:
+            value, seconds = self._futures[name].result(timeout=remaining)
+            if isinstance(value, trend_matrix.TrendMatrix):
+                degraded, error = value.degraded, value.error
+            else:
+                degraded = isinstance(value, dict) and bool(value.get("degraded"))  # provider's own fallback
+                error = value.get("error", "") if degraded else ""
+            res = ProviderResult(name, value, seconds, degraded, error)
+        except FutureTimeout:
+            res = self._degraded(name, f"timeout after {budget:g}s")
+        except Exception as e:
+            res = self._degraded(name, f"{type(e).__name__}: {e}")
+        self._results[name] = res
+        return res
+
+    def results(self) -> Dict[str, ProviderResult]:
+        return {name: self.result(name) for name in self._futures}
+
+    def _degraded(self, name: str, error: str) -> ProviderResult:
+        fallback = self._fallbacks.get(name, {})
+        if isinstance(fallback, trend_matrix.TrendMatrix):
+            value: Any = replace(fallback, degraded=True, error=error)
+        else:
+            value = dict(fallback, degraded=True, error=error)
+        return ProviderResult(name, value, time.perf_counter() - self.started, degraded=True, error=error)
+
+
 class MarketResearch:
+    '''
+    Providers come from the process-wide registry and are looked up on use, so a
+    long-lived instance picks up pytrends / SERPAPI_KEY once they become available.
+    Assigning .trends / .search pins a provider on this instance.
+    '''
     def __init__(self, cfg: ResearchConfig | None = None):
         self.cfg = cfg or ResearchConfig()
-        # Trends provider (optional dependency)
-        try:
-            self.trends = PytrendsProvider()
-            self.trends_name = "pytrends"
-        except Exception:
-            self.trends = DummyTrendsProvider()
-            self.trends_name = "dummy"
-        # Search provider
-        serp_key = os.environ.get("SERPAPI_KEY")
-        if serp_key:
-            self.search = SerpAPISearchProvider(serp_key)
-            self.search_name = "serpapi"
-        else:
-            self.search = DuckDuckGoProvider()
-            self.search_name = "duckduckgo"
+        self._trends: Any = None
+        self._search: Any = None
+
+    @property
+    def trends(self) -> Any:
+        return self._trends or registry.trends_provider()[1]
+
+    @trends.setter
+    def trends(self, provider: Any) -> None:
+        self._trends = provider
+
+    @property
+    def trends_name(self) -> str:
+        return type(self._trends).__name__ if self._trends else registry.trends_provider()[0]
+
+    @property
+    def search(self) -> Any:
+        return self._search or registry.search_provider()[1]
+
+    @search.setter
+    def search(self, provider: Any) -> None:
+        self._search = provider
+
+    @property
+    def search_name(self) -> str:
+        return type(self._search).__name__ if self._search else registry.search_provider()[0]
 
     # -------- External data ----------
     def get_trends(self, keywords: List[str] | None = None) -> Dict[str, Any]:
         kw = keywords or self.cfg.keywords or []
         return self.trends.get_interest(kw, geo=self.cfg.geo, days=self.cfg.trend_days)
 
+    def get_trend_matrix(self, keywords: List[str] | None = None) -> "trend_matrix.TrendMatrix":
+        '''get_trends as a TrendMatrix (needs numpy); built directly by providers that support it.'''
+        kw = keywords or self.cfg.keywords or []
+        provider = self.trends
+        if hasattr(provider, "get_matrix"):
+            return provider.get_matrix(kw, geo=self.cfg.geo, days=self.cfg.trend_days)
+        return trend_matrix.TrendMatrix.from_dict(provider.get_interest(kw, geo=self.cfg.geo, days=self.cfg.trend_days))
+
     def get_competitor_snippets(self, query: str, num: int = 10) -> Dict[str, Any]:
         return self.search.search(query, num=num)
 
+    def call_providers(self, keywords: List[str] | None, query: str, num: int = 10,
+                       timeouts: Optional[Dict[str, float]] = None, deadline: float = DEADLINE,
+                       matrix: bool = False) -> ProviderCalls:
+        '''
+        Start get_trends and get_competitor_snippets concurrently. Providers are
+        resolved inside the calls, so a slow first construction counts against the
+        budget. The degraded fallbacks have the providers' usual shape with no data
+        (and provider None), so downstream adapters (trends_to_weight_patch,
+        normalize_ads) treat them as empty. With matrix=True the trends value (and its
+        fallback) is a TrendMatrix instead of the dict.
+        '''
+        kw = keywords or self.cfg.keywords or []
+        trends_fallback: Any = {"provider": None, "geo": self.cfg.geo, "window_days": self.cfg.trend_days,
+                                "keywords": kw, "data": {}}
+        if matrix:
+            trends_fallback = trend_matrix.TrendMatrix.from_dict(trends_fallback)
+        fallbacks = {
+            "trends": trends_fallback,
+            "search": {"provider": None, "query": query, "results": [], "ads": []},
+        }
+        calls = {
+            "trends": (lambda: self.get_trend_matrix(keywords)) if matrix else (lambda: self.get_trends(keywords)),
+            "search": lambda: self.get_competitor_snippets(query, num=num),
+        }
+        return ProviderCalls(calls, fallbacks, timeouts=timeouts, deadline=deadline)
+
     def get_benchmarks(self, industry: str | None = None, channel: str | None = None) -> Benchmark:
         ind = industry or self.cfg.industry
         ch = channel or self.cfg.channel
@@ -40,18 +165,23 @@ class MarketResearch:
 
     # -------- Simple adapters ----------
     @staticmethod
-    def trends_to_weight_patch(trends: Dict[str, Any]) -> Dict[str, float]:
+    def trends_to_weight_patch(trends: "Dict[str, Any] | trend_matrix.TrendMatrix") -> Dict[str, float]:
         '''
         Convert trend momentum to multipliers for awareness/consideration etc.
-        Very conservative: clamp within +-20%.
+        Very conservative: clamp within +-20%. Accepts the providers' dict or a TrendMatrix.
         '''
-        if not trends or "data" not in trends or not trends["data"]:
-            return {}
-        avgs = [v["avg"] for v in trends["data"].values() if "avg" in v]
-        latest = [v["latest"] for v in trends["data"].values() if "latest" in v]
-        if not avgs or not latest:
-            return {}
-        ratio = (sum(latest)/len(latest)) / (sum(avgs)/len(avgs) + 1e-9)
+        if isinstance(trends, trend_matrix.TrendMatrix):
+            if not trends.keywords:
+                return {}
+            ratio = float(trends.latest().mean() / (trends.avg().mean() + 1e-9))
+        else:
+            if not trends or "data" not in trends or not trends["data"]:
+                return {}
+            avgs = [v["avg"] for v in trends["data"].values() if "avg" in v]
+            latest = [v["latest"] for v in trends["data"].values() if "latest" in v]
+            if not avgs or not latest:
+                return {}
+            ratio = (sum(latest)/len(latest)) / (sum(avgs)/len(avgs) + 1e-9)
         mult = max(0.8, min(1.2, ratio))
         return {
             "awareness_mult": mult,
@@ -0,0 +1,151 @@
+# Near-duplicate detection for syndicated articles.
+#   titles : MinHash over character 3-grams of the normalized headline (publisher suffix
+#            removed), bucketed with LSH bands so only likely pairs are compared
+#   texts  : 64-bit SimHash over word 3-gram shingles, bucketed by 7-bit blocks
+#            (two hashes within 8 bits of each other share at least one of 9 blocks)
+# Clustering is leader-based: each item joins the earliest earlier primary it matches,
+# so the first-listed source stays the primary and the rest become its alternates.
+from __future__ import annotations
+import hashlib
+import re
+import unicodedata
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+try:
+    from . import word_segment
+except ImportError:  # loaded as a top-level module (streamlit_app.py)
+    import word_segment
+
+NUM_PERM = 64
+LSH_BANDS = 16                 # 16 bands x 4 rows: pairs above ~0.5 Jaccard are almost always compared
+TITLE_THRESHOLD = 0.6          # estimated Jaccard of title 3-grams
+TEXT_MAX_DISTANCE = 8          # SimHash Hamming distance out of 64; unrelated articles sit around 32
+_SIMHASH_BLOCKS = TEXT_MAX_DISTANCE + 1   # pigeonhole: a near pair agrees on at least one block
+
+_MASK64 = (1 << 64) - 1
+_PRIME = (1 << 61) - 1
+_PUBLISHER_SUFFIX = re.compile(r"\s+[-|｜–—]\s+[^-|｜–—]{1,40}$")
+_NON_TEXT = re.compile(r"[\W_]+")
+
+
+def _h64(s: str) -> int:
+    return int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _perms(n: int) -> List[Tuple[int, int]]:
+    out = []
+    for i in range(n):
+        d = hashlib.blake2b(f"minhash-{i}".encode(), digest_size=16).digest()
+        out.append((int.from_bytes(d[:8], "big") % (_PRIME - 1) + 1, int.from_bytes(d[8:], "big") % _PRIME))
+    return out
+
+_PERMS = _perms(NUM_PERM)
+
+
+# -------- fingerprints ----------
+def normalize_title(title: str) -> str:
+    '''"見出し - 媒体名" -> "見出し", NFKC, lowercase, punctuation and spaces removed.'''
+    t = unicodedata.normalize("NFKC", title or "").strip()
+    t = _PUBLISHER_SUFFIX.sub("", t)
+    return _NON_TEXT.sub("", t.lower())
+
+
+def char_shingles(s: str, k: int = 3) -> set:
+    if len(s) <= k:
+        return {s} if s else set()
+    return {s[i:i+k] for i in range(len(s) - k + 1)}
+
+
+def minhash(features: Iterable[str]) -> Tuple[int, ...]:
+    hs = [_h64(f) for f in features]
+    if not hs:
+        return ()
+    return tuple(min((a * h + b) % _PRIME for h in hs) for a, b in _PERMS)
+
+
+def minhash_similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    if not a or not b:
+        return 0.0
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def word_shingles(text: str, k: int = 3) -> Counter:
+    tokens = word_segment.tokenize(text, "script")
+    if len(tokens) < k:
+        return Counter([" ".join(tokens)]) if tokens else Counter()
+    return Counter(" ".join(tokens[i:i+k]) for i in range(len(tokens) - k + 1))
+
+
+def simhash(features: Dict[str, int]) -> int:
+    hs = [_h64(f) for f in features]
+    ws = list(features.values())
+    if np is not None:
+        bits = np.unpackbits(np.array(hs, dtype=">u8").view(np.uint8).reshape(-1, 8), axis=1)  # MSB first
+        v = (np.array(ws, dtype=np.int64)[:, None] * (2 * bits.astype(np.int64) - 1)).sum(axis=0)
+        return int("".join("1" if x > 0 else "0" for x in v), 2)
+    v = [0] * 64
+    for h, w in zip(hs, ws):
+        for bit in range(64):
+            v[bit] += w if h >> bit & 1 else -w
+    return sum(1 << bit for bit in range(64) if v[bit] > 0)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin((a ^ b) & _MASK64).count("1")
+
+
+# -------- clustering ----------
+def _cluster(keys: List[Optional[list]], fps: list, similar: Callable[[object, object], bool]) -> List[int]:
+    '''keys[i]: bucket keys of item i (None: never a duplicate). Returns each item's primary index.'''
+    primary = list(range(len(fps)))
+    buckets: Dict[object, List[int]] = {}
+    for i, ks in enumerate(keys):
+        if not ks:
+            continue
+        candidates = sorted({j for k in ks for j in buckets.get(k, ())})
+        primary[i] = next((j for j in candidates if similar(fps[i], fps[j])), i)
+        if primary[i] == i:
+            for k in ks:
+                buckets.setdefault(k, []).append(i)
+    return primary
+
+
+def cluster_titles(titles: Sequence[str], threshold: float = TITLE_THRESHOLD) -> List[int]:
+    fps = [minhash(char_shingles(normalize_title(t))) for t in titles]
+    rows = NUM_PERM // LSH_BANDS
+    keys = [[(b, fp[b*rows:(b+1)*rows]) for b in range(LSH_BANDS)] if fp else None for fp in fps]
+    return _cluster(keys, fps, lambda a, b: minhash_similarity(a, b) >= threshold)
+
+
+def cluster_texts(texts: Sequence[str], max_distance: int = TEXT_MAX_DISTANCE) -> List[int]:
+    fps, keys = [], []
+    width = 64 // _SIMHASH_BLOCKS
+    for t in texts:
+        feats = word_shingles(t) if t else None
+        fp = simhash(feats) if feats else 0
+        fps.append(fp)
+        keys.append([(b, fp >> (b * width) & ((1 << width) - 1)) for b in range(_SIMHASH_BLOCKS)] if feats else None)
+    return _cluster(keys, fps, lambda a, b: hamming(a, b) <= max_distance)
+
+
+def collapse(items: List[Dict], primary: List[int]) -> List[Dict]:
+    '''
+    Keep primaries in order; each duplicate becomes an entry in its primary's
+    "alternates" list (title / url / source), so attribution is not lost.
+    '''
+    out: Dict[int, Dict] = {}
+    for i, it in enumerate(items):
+        p = primary[i]
+        if p == i:
+            out[i] = dict(it, alternates=list(it.get("alternates", [])))
+        else:
+            alt = out[p]["alternates"]
+            alt.append({k: it.get(k, "") for k in ("title", "url", "source")})
+            alt.extend(it.get("alternates", []))
+    return list(out.values())
@@ -0,0 +1,101 @@
+# Optional process-pool stage for the CPU-bound part of research: HTML -> cleaned text
+# and per-document n-gram counts. Workers return partial counts, the parent merges them.
+# Small batches run in-process, where pool start-up and pickling would cost more than
+# the parsing itself.
+from __future__ import annotations
+import atexit
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    from . import html_extract, keypoints
+except ImportError:  # loaded as a top-level module (streamlit_app.py)
+    import html_extract, keypoints
+
+# 0 disables the pool (everything runs in-process); -1 means one worker per CPU.
+WORKERS = int(os.environ.get("WEB_CONSULT_PARSE_WORKERS", "0"))
+CHUNKSIZE = int(os.environ.get("WEB_CONSULT_PARSE_CHUNKSIZE", "2"))
+MIN_BATCH = 4                 # fewer documents than this: in-process
+MIN_BATCH_BYTES = 256 * 1024  # less HTML than this in total: in-process
+
+
+@dataclass
+class ParseItem:
+    '''Either raw HTML (body + charset) to clean and count, or already-clean text to count.'''
+    body: Optional[bytes] = None
+    encoding: Optional[str] = None
+    text: Optional[str] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.body) if self.body is not None else len(self.text or "")
+
+
+def parse_one(item: ParseItem) -> Tuple[str, keypoints.NgramCounter]:
+    if item.text is not None:
+        text = item.text
+    elif item.body:
+        text = html_extract.extract_text(item.body.decode(item.encoding or "utf-8", errors="replace"))
+    else:
+        text = ""
+    return text, keypoints.count_ngrams(text)
+
+
+def resolve_workers(workers: Optional[int] = None) -> int:
+    w = WORKERS if workers is None else workers
+    return (os.cpu_count() or 1) if w < 0 else w
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None or _pool_size != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            # never fork: the parent runs the HTTP event loop thread (and Streamlit's threads)
+            method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context(method))
+            _pool_size = workers
+        return _pool
+
+def _drop_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+atexit.register(_drop_pool)
+
+
+def parse_batch(items: Sequence[ParseItem], workers: Optional[int] = None, chunksize: Optional[int] = None,
+                min_batch: int = MIN_BATCH, min_bytes: int = MIN_BATCH_BYTES
+                ) -> Tuple[List[str], keypoints.NgramCounter, List[keypoints.NgramCounter]]:
+    '''
+    Clean and count a batch. Returns texts in input order, the merged n-gram counts
+    (merged in input order, so ranking ties match a single in-process pass) and the
+    per-document counts.
+    '''
+    w = resolve_workers(workers)
+    raw = [it for it in items if it.body is not None]
+    small = len(raw) < min_batch or sum(it.size for it in raw) < min_bytes
+    results = None
+    if w > 1 and not small:
+        try:
+            results = list(_get_pool(w).map(parse_one, items, chunksize=chunksize or CHUNKSIZE))
+        except BrokenProcessPool:
+            _drop_pool()
+    if results is None:
+        results = [parse_one(it) for it in items]
+    texts = [t for t, _ in results]
+    partials = [c for _, c in results]
+    return texts, keypoints.merge_counts(partials), partials
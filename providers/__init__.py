@@ -1,2 +1,3 @@
 from .trends_pytrends import PytrendsProvider, DummyTrendsProvider
 from .search_serpapi import SerpAPISearchProvider, DuckDuckGoProvider
+from . import registry
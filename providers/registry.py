@@ -0,0 +1,89 @@
+# Process-wide provider instances. Providers are built once per process and shared by
+# every MarketResearch / consult call (construction can be costly: TrendReq does a
+# cookie handshake). A construction that fails (pytrends missing, no SERPAPI_KEY...)
+# is remembered and only retried after RETRY_SECONDS, so it is not re-attempted on
+# every request. Search providers are wrapped in the search result cache
+# (providers.search_cache), so one instance also owns its in-flight requests.
+from __future__ import annotations
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .trends_pytrends import PytrendsProvider, DummyTrendsProvider
+from .search_serpapi import SerpAPISearchProvider, DuckDuckGoProvider
+from .search_cache import cached_search
+
+RETRY_SECONDS = float(os.environ.get("WEB_CONSULT_PROVIDER_RETRY_SECONDS", "300"))
+
+FACTORIES: Dict[str, Callable[..., Any]] = {
+    "pytrends": PytrendsProvider,
+    "dummy": DummyTrendsProvider,
+    "serpapi": lambda key: cached_search(SerpAPISearchProvider(key), "serpapi"),
+    "duckduckgo": lambda: cached_search(DuckDuckGoProvider(), "duckduckgo"),
+}
+
+
+class ProviderUnavailable(RuntimeError):
+    pass
+
+
+class _Slot:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.instance: Any = None
+        self.error: Optional[BaseException] = None
+        self.failed_at = 0.0
+
+
+_slots: Dict[Tuple[str, tuple], _Slot] = {}
+_lock = threading.Lock()
+
+
+def get(name: str, *args: Any) -> Any:
+    '''
+    Shared instance of provider `name` built with args. Raises ProviderUnavailable
+    (chained to the original error) while a failed construction is within RETRY_SECONDS.
+    '''
+    key = (name, args)
+    with _lock:
+        slot = _slots.get(key)
+        if slot is None:
+            slot = _slots[key] = _Slot()
+    with slot.lock:  # one thread constructs; the others wait for it
+        if slot.instance is not None:
+            return slot.instance
+        if slot.error is not None and time.monotonic() - slot.failed_at < RETRY_SECONDS:
+            raise ProviderUnavailable(f"{name}: {slot.error}") from slot.error
+        try:
+            slot.instance = FACTORIES[name](*args)
+            slot.error = None
+        except Exception as e:
+            slot.error, slot.failed_at = e, time.monotonic()
+            raise ProviderUnavailable(f"{name}: {e}") from e
+        return slot.instance
+
+
+def trends_provider() -> Tuple[str, Any]:
+    '''("pytrends", provider) when pytrends works, else ("dummy", provider).'''
+    try:
+        return "pytrends", get("pytrends")
+    except ProviderUnavailable:
+        return "dummy", get("dummy")
+
+
+def search_provider() -> Tuple[str, Any]:
+    '''SerpAPI when SERPAPI_KEY is set (one instance per key), else DuckDuckGo.'''
+    key = os.environ.get("SERPAPI_KEY")
+    if key:
+        try:
+            return "serpapi", get("serpapi", key)
+        except ProviderUnavailable:
+            pass
+    return "duckduckgo", get("duckduckgo")
+
+
+def reset() -> None:
+    '''Forget every instance and cached failure (tests, or after installing a dependency).'''
+    with _lock:
+        _slots.clear()
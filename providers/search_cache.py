@@ -0,0 +1,120 @@
+# Result cache around any search provider (anything with .search(q, num=..., **kw)).
+#   - keyed by provider name, normalized query (NFKC, case, whitespace), engine and num
+#   - stored in the HTTP cache directory, so every process on the host shares it
+#   - single-flight: concurrent identical searches in a process share one upstream call
+#   - stale-while-revalidate: past FRESH_SECONDS an entry is still served for up to
+#     STALE_SECONDS more while one background refresh replaces it
+#   - while the provider's circuit is open (or its rate limit would make the caller
+#     wait past the timeout) a miss returns an empty result marked degraded, not cached
+#   - degraded results (e.g. parsed from a stale HTTP cache entry) are returned but never
+#     stored, so an outage cannot re-stamp old results as fresh
+from __future__ import annotations
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from .. import http_cache, resilience
+
+FRESH_SECONDS = http_cache.ttl_for("search")
+STALE_SECONDS = float(os.environ.get("WEB_CONSULT_SEARCH_STALE_SECONDS", str(24 * 3600)))
+
+_SPACES = re.compile(r"\s+")
+_refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-refresh")
+
+
+def normalize_query(q: str) -> str:
+    return _SPACES.sub(" ", unicodedata.normalize("NFKC", q or "")).strip().lower()
+
+
+class CachedSearchProvider:
+    def __init__(self, inner: Any, name: str, fresh: float = FRESH_SECONDS, stale: float = STALE_SECONDS):
+        self.inner = inner
+        self.name = name
+        self.fresh = fresh
+        self.stale = stale
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[str, ...], Future] = {}
+        self.counters = {"hit": 0, "stale": 0, "miss": 0, "coalesced": 0, "refresh_error": 0,
+                         "fallback": 0, "degraded": 0}
+
+    def __getattr__(self, attr: str) -> Any:  # api_key etc. of the wrapped provider
+        if attr == "inner":
+            raise AttributeError(attr)
+        return getattr(self.inner, attr)
+
+    def search(self, q: str, num: int = 10, **kwargs: Any) -> Dict[str, Any]:
+        parts = (self.name, normalize_query(q), str(kwargs.get("engine", "")), str(num))
+        store = http_cache.get_cache()
+        cached = self._load(store, parts)
+        if cached is not None:
+            age = time.time() - cached["stored_at"]
+            if age < self.fresh:
+                self._count("hit")
+                return cached["value"]
+            if age < self.fresh + self.stale:
+                self._count("stale")
+                self._fetch(store, parts, q, num, kwargs, background=True)
+                return cached["value"]
+        self._count("miss")
+        try:
+            return self._fetch(store, parts, q, num, kwargs).result()
+        except (resilience.CircuitOpen, resilience.Throttled) as e:
+            self._count("fallback")
+            return {"provider": self.name, "query": q, "results": [], "ads": [], "degraded": True,
+                    "error": f"{type(e).__name__}: {e}"}
+
+    # -------- internals ----------
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    @staticmethod
+    def _load(store: Optional[http_cache.HttpCache], parts: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        raw = store.get_derived("search", *parts) if store else None
+        try:
+            return json.loads(raw) if raw is not None else None
+        except ValueError:
+            return None
+
+    def _fetch(self, store: Optional[http_cache.HttpCache], parts: Tuple[str, ...], q: str, num: int,
+               kwargs: Dict[str, Any], background: bool = False) -> Future:
+        '''Future for the upstream call of parts, joining one already in flight.'''
+        with self._lock:
+            fut = self._inflight.get(parts)
+            if fut is not None:
+                if not background:
+                    self.counters["coalesced"] += 1
+                return fut
+            fut = self._inflight[parts] = Future()
+
+        def run():
+            try:
+                value = self.inner.search(q, num=num, **kwargs)
+                if isinstance(value, dict) and value.get("degraded"):
+                    self._count("degraded")
+                elif store:
+                    blob = json.dumps({"stored_at": time.time(), "value": value}, ensure_ascii=False)
+                    store.put_derived("search", blob.encode("utf-8"), *parts, ttl=self.fresh + self.stale)
+                fut.set_result(value)
+            except BaseException as e:
+                if background:
+                    self._count("refresh_error")  # the stale entry keeps being served
+                fut.set_exception(e)
+            finally:
+                with self._lock:
+                    self._inflight.pop(parts, None)
+
+        if background:
+            _refresh_pool.submit(run)
+        else:
+            run()
+        return fut
+
+
+def cached_search(provider: Any, name: str) -> CachedSearchProvider:
+    return CachedSearchProvider(provider, name)
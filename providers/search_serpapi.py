@@ -2,6 +2,14 @@
 from typing import List, Dict, Any
 import os
 
+from .. import http_client
+
+def _mark_stale(r: "http_client.HttpResponse", out: Dict[str, Any]) -> Dict[str, Any]:
+    '''Results parsed from an expired cached page (upstream failing or circuit open) are degraded.'''
+    if r.stale:
+        out.update(degraded=True, error="stale cached response")
+    return out
+
 class SerpAPISearchProvider:
     def __init__(self, api_key: str | None = None):
         self.api_key = api_key or os.environ.get("SERPAPI_KEY")
@@ -9,9 +17,9 @@ class SerpAPISearchProvider:
             raise ValueError("SERPAPI_KEY is required for SerpAPISearchProvider")
 
     def search(self, q: str, engine: str = "google", num: int = 10) -> Dict[str, Any]:
-        import requests
         params = {"api_key": self.api_key, "engine": engine, "q": q, "num": num}
-        r = requests.get("https://serpapi.com/search.json", params=params, timeout=20)
+        r = http_client.get("https://serpapi.com/search.json", params=params, timeout=20, cache="search",
+                            provider="serpapi")
         r.raise_for_status()
         data = r.json()
         results = []
@@ -30,7 +38,7 @@ class SerpAPISearchProvider:
                 "displayed_link": ad.get("displayed_link"),
                 "snippet": ad.get("snippet"),
             })
-        return {"provider":"serpapi","query":q,"results":results,"ads":ads}
+        return _mark_stale(r, {"provider":"serpapi","query":q,"results":results,"ads":ads})
 
 
 class DuckDuckGoProvider:
@@ -43,9 +51,11 @@ class DuckDuckGoProvider:
         pass
 
     def search(self, q: str, num: int = 10) -> Dict[str, Any]:
-        import requests, bs4  # needs beautifulsoup4
+        import bs4  # needs beautifulsoup4
         url = "https://duckduckgo.com/html/"
-        r = requests.post(url, data={"q": q}, timeout=20, headers={"User-Agent":"Mozilla/5.0"})
+        r = http_client.post(url, data={"q": q}, timeout=20, cache="search", provider="duckduckgo")
+        if r.status == 202:  # anti-bot page instead of results
+            raise http_client.HTTPStatusError(r)
         r.raise_for_status()
         soup = bs4.BeautifulSoup(r.text, "html.parser")
         results = []
@@ -55,4 +65,4 @@ class DuckDuckGoProvider:
             snippet_el = a.find_parent(class_="result__title").find_next_sibling(class_="result__snippet")
             snippet = snippet_el.get_text(" ", strip=True) if snippet_el else ""
             results.append({"title": title, "link": link, "snippet": snippet})
-        return {"provider":"duckduckgo","query":q,"results":results,"ads":[]}
+        return _mark_stale(r, {"provider":"duckduckgo","query":q,"results":results,"ads":[]})
@@ -1,5 +1,18 @@
 # Trends providers: Pytrends (if available) with a safe Dummy fallback.
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+import json
+import os
+import threading
+
+from .. import http_cache, resilience, trend_matrix
+
+BATCH = 5             # Google Trends compares at most 5 terms per request
+# Sent with every batch. A moderate-volume term: Google scales each request to its top
+# term in integers, so a dominant anchor would flatten niche keywords to 0/1.
+ANCHOR = os.environ.get("WEB_CONSULT_TRENDS_ANCHOR", "口コミ")
+ANCHOR_LEVEL = 50.0   # fetched series are scaled so the anchor's mean is this
+MIN_PEAK = 1          # raw peaks at or below this carry no shape, only Google's integer floor
+MAX_WAIT = 10.0       # longest wait for a rate-limit token before falling back
 
 class DummyTrendsProvider:
     '''
@@ -9,8 +22,17 @@ class DummyTrendsProvider:
     def __init__(self):
         pass
 
+    def get_matrix(self, keywords: List[str], geo: str = "JP", days: int = 90) -> "trend_matrix.TrendMatrix":
+        np = trend_matrix.np
+        kws = list(keywords or ["マーケティング"])
+        slopes = (np.arange(len(kws)) + 1)[:, None] * 0.2
+        values = np.clip(np.trunc(50 + slopes * (np.arange(days) - days / 2)), 0, 100)
+        return trend_matrix.TrendMatrix(kws, values.astype(np.float32), provider="dummy", geo=geo, window_days=days)
+
     def get_interest(self, keywords: List[str], geo: str = "JP", days: int = 90) -> Dict[str, Any]:
         base = 50
+        if trend_matrix.available():
+            return self.get_matrix(keywords, geo, days).to_dict(keywords)
         out = {}
         for i,k in enumerate(keywords or ["マーケティング"]):
             slope = (i+1) * 0.2
@@ -23,21 +45,139 @@ class PytrendsProvider:
     '''
     Google Trends via pytrends. Optional dependency; if pytrends is missing,
     you should fall back to DummyTrendsProvider upstream.
+    One instance is shared process-wide (providers.registry); TrendReq keeps the
+    payload between build_payload and interest_over_time, so requests are serialized.
+
+    Series are cached per (keyword, geo, window) in the HTTP cache directory, and only
+    missing keywords are fetched, 4 at a time plus the ANCHOR keyword. Google scales
+    every request to its own peak, so each batch is rescaled to the anchor; series
+    from different requests (and cache entries) are then on one scale, and the result
+    is renormalized to a peak of 100 across the requested keywords like a single
+    request would be. A keyword flattened to the integer floor by a batch-mate is
+    fetched again without it; one still at the floor next to the anchor alone is too
+    small to measure and is left out rather than scaled up from 0/1 values (cached as
+    such for the trends TTL, so it does not spend rate-limit tokens on every call).
+    A batch in which the anchor itself has no data (e.g. a geo where ANCHOR is never
+    searched) cannot be put on the shared scale; it is not cached and the result is
+    degraded, so set WEB_CONSULT_TRENDS_ANCHOR to a term searched in that geo.
+
+    Requests go through the "pytrends" rate limit and circuit breaker (resilience). When
+    a batch cannot be fetched the result falls back to the cached keywords, or to
+    DummyTrendsProvider data if none are cached, marked {"degraded": True}.
     '''
     def __init__(self, tz: int = 540):
         from pytrends.request import TrendReq  # type: ignore
         self.pytrends = TrendReq(hl="ja-JP", tz=tz)
+        self._lock = threading.Lock()
 
     def get_interest(self, keywords: List[str], geo: str = "JP", days: int = 90) -> Dict[str, Any]:
-        import pandas as pd
-        if not keywords:
-            keywords = ["マーケティング"]
-        self.pytrends.build_payload(keywords, timeframe=f"now {days}-d", geo=geo)
-        df = self.pytrends.interest_over_time()
-        if df is None or df.empty:
-            return {"provider": "pytrends", "geo": geo, "window_days": days, "keywords": keywords, "data": {}}
-        out = {}
-        for k in keywords:
-            series = df[k].fillna(0).astype(int).tolist()
-            out[k] = {"series": series, "avg": float(df[k].mean()), "latest": int(df[k].iloc[-1])}
-        return {"provider": "pytrends", "geo": geo, "window_days": days, "keywords": keywords, "data": out}
+        keywords = keywords or ["マーケティング"]
+        if trend_matrix.available():
+            return self.get_matrix(keywords, geo, days).to_dict(keywords)
+        anchored, error = self._collect(keywords, geo, days)
+        if error is not None and not anchored:
+            out = DummyTrendsProvider().get_interest(keywords, geo=geo, days=days)
+        else:
+            out = {"provider": "pytrends", "geo": geo, "window_days": days, "keywords": keywords,
+                   "data": _renormalize(keywords, anchored)}
+        if error is not None:
+            out.update(degraded=True, error=f"{type(error).__name__}: {error}")
+        return out
+
+    def get_matrix(self, keywords: List[str], geo: str = "JP", days: int = 90) -> "trend_matrix.TrendMatrix":
+        '''Same data as get_interest as a TrendMatrix (needs numpy).'''
+        keywords = keywords or ["マーケティング"]
+        anchored, error = self._collect(keywords, geo, days)
+        if error is not None and not anchored:
+            m = DummyTrendsProvider().get_matrix(keywords, geo, days)
+        else:
+            m = _renormalize_matrix(keywords, anchored, geo, days)
+        if error is not None:
+            m.degraded, m.error = True, f"{type(error).__name__}: {error}"
+        return m
+
+    def _collect(self, keywords: List[str], geo: str, days: int) -> Tuple[Dict[str, List[float]], Optional[Exception]]:
+        '''Anchored series per keyword (cache first), and the error that stopped fetching, if any.'''
+        store = http_cache.get_cache()
+        parts = (geo, f"{days}d", ANCHOR)
+        anchored: Dict[str, List[float]] = {}
+        missing = []
+        for k in dict.fromkeys(keywords):
+            hit = store.get_derived("trends", k, *parts) if store else None
+            if hit is not None:
+                series = json.loads(hit)
+                if series is not None:  # null: at the floor when last fetched
+                    anchored[k] = series
+            else:
+                missing.append(k)
+        others = [k for k in missing if k != ANCHOR]
+        step = BATCH - 1
+        batches = [others[i:i+step] for i in range(0, len(others), step)] or ([[]] if missing else [])
+        guard = resilience.guard("pytrends")
+        while batches:
+            batch = batches.pop(0)
+            try:
+                fetched, low = guard.call(lambda: self._fetch_anchored(batch, geo, days), max_wait=MAX_WAIT)
+            except Exception as e:
+                guard.fell_back()
+                return anchored, e
+            if fetched is None:  # same anchor for every batch, so the rest would fail too
+                guard.fell_back()
+                return anchored, LookupError(f"anchor {ANCHOR!r} has no trends data for geo {geo!r}")
+            if low and len(low) < len(batch):  # flattened by a batch-mate: compare them without it
+                batches.append(low)
+            elif low and store:
+                for k in low:
+                    store.put_derived("trends", b"null", k, *parts, ttl=http_cache.ttl_for("trends"))
+            for k, series in fetched.items():
+                if store:
+                    store.put_derived("trends", json.dumps(series).encode("utf-8"), k, *parts,
+                                      ttl=http_cache.ttl_for("trends"))
+                anchored[k] = series
+        return anchored, None
+
+    def _fetch_anchored(self, batch: List[str], geo: str,
+                        days: int) -> Tuple[Optional[Dict[str, List[float]]], List[str]]:
+        '''
+        Anchored series of batch (and the anchor), plus the keywords left at the integer
+        floor. The series are None when the anchor is all zeros and nothing can be scaled.
+        '''
+        payload = batch + [ANCHOR]
+        with self._lock:
+            self.pytrends.build_payload(payload, timeframe=f"now {days}-d", geo=geo)
+            df = self.pytrends.interest_over_time()
+        if df is None or df.empty:  # nothing cached: Google returns no rows for a transient failure too
+            return {}, []
+        low = [k for k in batch if float(df[k].max()) <= MIN_PEAK]
+        base = float(df[ANCHOR].mean())
+        if not base > 0:
+            return None, []
+        factor = ANCHOR_LEVEL / base
+        return {k: (df[k].fillna(0) * factor).round(3).tolist() for k in payload if k not in low}, low
+
+
+def _renormalize(keywords: List[str], anchored: Dict[str, List[float]]) -> Dict[str, Any]:
+    present = [k for k in dict.fromkeys(keywords) if k in anchored]
+    peak = max((max(anchored[k], default=0.0) for k in present), default=0.0)
+    scale = 100.0 / peak if peak > 0 else 0.0
+    out = {}
+    for k in present:
+        series = [int(round(v * scale)) for v in anchored[k]]
+        if series:
+            out[k] = {"series": series, "avg": sum(series) / len(series), "latest": series[-1]}
+    return out
+
+
+def _renormalize_matrix(keywords: List[str], anchored: Dict[str, List[float]], geo: str,
+                        days: int) -> "trend_matrix.TrendMatrix":
+    '''_renormalize as a TrendMatrix (scaled in float64 so the integers match exactly).'''
+    np = trend_matrix.np
+    present = [k for k in dict.fromkeys(keywords) if anchored.get(k)]
+    width = max((len(anchored[k]) for k in present), default=0)
+    values = np.full((len(present), width), np.nan)
+    for i, k in enumerate(present):
+        values[i, width - len(anchored[k]):] = anchored[k]
+    peak = float(np.nanmax(values)) if values.size else 0.0
+    scale = 100.0 / peak if peak > 0 else 0.0
+    return trend_matrix.TrendMatrix(present, np.round(values * scale).astype(np.float32), provider="pytrends",
+                                    geo=geo, window_days=days)
@@ -0,0 +1,110 @@
+# Background jobs for the Streamlit result page.
+# A job runs a stage generator ((stage name, value) pairs) on a process-wide thread
+# pool and publishes each value as soon as it is produced, so reruns of the page can
+# render finished stages while later ones are still running.
+# Jobs are keyed by their inputs: submitting a key that is already running (or
+# finished recently) returns the existing job, so reruns and other sessions with the
+# same inputs share one run instead of starting the work again.
+from __future__ import annotations
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+WORKERS = int(os.environ.get("WEB_CONSULT_JOB_WORKERS", "4"))
+KEEP_SECONDS = float(os.environ.get("WEB_CONSULT_JOB_KEEP_SECONDS", "600"))  # finished jobs stay shareable this long
+MAX_JOBS = 256
+
+Stages = Iterable[Tuple[str, Any]]
+
+
+def job_key(*parts: Any) -> str:
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:24]
+
+
+class Job:
+    def __init__(self, key: str):
+        self.key = key
+        self.submitted_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.error: Optional[BaseException] = None
+        self._stages: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def stages(self) -> Dict[str, Any]:
+        '''Stages finished so far, in the order they were produced.'''
+        with self._lock:
+            return dict(self._stages)
+
+    def _run(self, make_stages: Callable[[], Stages]) -> None:
+        try:
+            for stage, value in make_stages():
+                with self._lock:
+                    self._stages[stage] = value
+        except BaseException as e:  # surfaced to the page, never raised in the pool thread
+            self.error = e
+        finally:
+            self.finished_at = time.time()
+            self._done.set()
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_jobs: "OrderedDict[str, Job]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max(1, WORKERS), thread_name_prefix="research-job")
+    return _executor
+
+
+def _reusable(job: Job, now: float) -> bool:
+    if not job.done:
+        return True
+    return job.error is None and now - job.finished_at < KEEP_SECONDS
+
+
+def _prune(now: float) -> None:
+    for key in [k for k, j in _jobs.items() if not _reusable(j, now)]:
+        del _jobs[key]
+    while len(_jobs) > MAX_JOBS:
+        key = next((k for k, j in _jobs.items() if j.done), None)
+        if key is None:  # everything is still running; keep them all
+            break
+        del _jobs[key]
+
+
+def submit(key: str, make_stages: Callable[[], Stages]) -> Job:
+    '''
+    Start make_stages() in the background, or return the job already running (or
+    finished within KEEP_SECONDS) for key. A job that failed is not shared; the next
+    submit for its key starts a new one.
+    '''
+    now = time.time()
+    with _lock:
+        job = _jobs.get(key)
+        if job is not None and _reusable(job, now):
+            _jobs.move_to_end(key)
+            return job
+        _prune(now)
+        job = _jobs[key] = Job(key)
+    _get_executor().submit(job._run, make_stages)
+    return job
+
+
+def get(key: str) -> Optional[Job]:
+    with _lock:
+        return _jobs.get(key)
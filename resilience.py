@@ -0,0 +1,286 @@
+# Rate limiting and circuit breaking for external providers (SerpAPI, DuckDuckGo,
+# Google News RSS, Google Trends).
+#   - token bucket per provider, shared by every thread; with WEB_CONSULT_RATE_LIMIT_DB
+#     set to a file path the buckets live in SQLite and are shared across processes
+#   - circuit breaker per provider (per process): after FAILURE_THRESHOLD consecutive
+#     failures calls fail fast with CircuitOpen for RESET_SECONDS, then one trial call
+#     decides whether to close it again; callers fall back to cached or dummy data
+#   - metrics() reports breaker state, throttle waits and short-circuited calls
+# Provider endpoints pass provider= to http_client, which applies the guard only to
+# requests that reach the network, so cache hits never spend tokens. Other URLs (e.g.
+# the articles an RSS feed links to) are never guarded.
+from __future__ import annotations
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# provider -> (requests per second, burst)
+LIMITS: Dict[str, Tuple[float, float]] = {
+    "serpapi": (1.0, 5),
+    "duckduckgo": (0.5, 2),
+    "google_news": (1.0, 5),
+    "pytrends": (0.2, 2),
+}
+FAILURE_THRESHOLD = 5
+RESET_SECONDS = 30.0
+FAILURE_STATUSES = (429, 500, 502, 503, 504)
+# DuckDuckGo answers bots with a 202 or 403 block page instead of results
+PROVIDER_FAILURE_STATUSES: Dict[str, Tuple[int, ...]] = {"duckduckgo": FAILURE_STATUSES + (202, 403)}
+DB_PATH = os.environ.get("WEB_CONSULT_RATE_LIMIT_DB") or None
+
+_log = logging.getLogger(__name__)
+
+
+def _parse_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    '''"serpapi=2/10,pytrends=0.1/1" -> {"serpapi": (2.0, 10.0), ...}; bad items are skipped.'''
+    out = {}
+    for item in filter(None, (s.strip() for s in spec.split(","))):
+        name, _, value = item.partition("=")
+        rate, _, burst = value.partition("/")
+        try:
+            limit = (float(rate), float(burst or 1))
+        except ValueError:
+            _log.warning("ignoring malformed WEB_CONSULT_RATE_LIMITS item %r", item)
+            continue
+        if not name.strip() or limit[0] <= 0 or limit[1] < 1:
+            _log.warning("ignoring malformed WEB_CONSULT_RATE_LIMITS item %r", item)
+            continue
+        out[name.strip()] = limit
+    return out
+
+LIMITS.update(_parse_limits(os.environ.get("WEB_CONSULT_RATE_LIMITS", "")))
+
+
+class Throttled(Exception):
+    '''The wait for a token would exceed the caller's max_wait.'''
+
+
+class CircuitOpen(Exception):
+    '''The provider's breaker is open; use a fallback.'''
+
+
+# -------- token buckets ----------
+class TokenBucket:
+    '''
+    In-process bucket. reserve() takes a token now and returns how long the caller must
+    sleep before using it, so waiting happens outside the lock (and works for asyncio).
+    '''
+    def __init__(self, rate: float, burst: float):
+        self.rate, self.burst = rate, burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: Optional[float] = None) -> float:
+        if self.rate == float("inf"):  # provider without a limit
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+            if max_wait is not None and wait > max_wait:
+                raise Throttled(f"would wait {wait:.1f}s")
+            self._tokens, self._updated = tokens - 1, now
+            return wait
+
+
+class SqliteTokenBucket:
+    '''Same contract as TokenBucket, with the state in a SQLite row shared by processes.'''
+    def __init__(self, path: str, name: str, rate: float, burst: float):
+        self.path, self.name, self.rate, self.burst = path, name, rate, burst
+        self._local = threading.local()
+        with self._conn() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, "
+                       "updated REAL NOT NULL) WITHOUT ROWID")
+
+    def _conn(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def reserve(self, max_wait: Optional[float] = None) -> float:
+        db = self._conn()
+        db.execute("BEGIN IMMEDIATE")  # serializes reservations across processes
+        try:
+            row = db.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+            now = time.time()
+            tokens = self.burst if row is None else min(self.burst, row[0] + (now - row[1]) * self.rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+            if max_wait is not None and wait > max_wait:
+                raise Throttled(f"would wait {wait:.1f}s")
+            db.execute("INSERT OR REPLACE INTO buckets(name, tokens, updated) VALUES (?, ?, ?)",
+                       (self.name, tokens - 1, now))
+            db.execute("COMMIT")
+            return wait
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+
+# -------- circuit breaker ----------
+class CircuitBreaker:
+    def __init__(self, threshold: int = FAILURE_THRESHOLD, reset_seconds: float = RESET_SECONDS):
+        self.threshold, self.reset_seconds = threshold, reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self._opened_at < self.reset_seconds:
+                    return False
+                self.state, self._trial = "half_open", False
+            if self.state == "half_open":
+                if self._trial:  # one trial call at a time
+                    return False
+                self._trial = True
+            return True
+
+    def release(self) -> None:
+        '''An allowed call never ran (e.g. throttled): let another one be the trial.'''
+        with self._lock:
+            self._trial = False
+
+    def success(self) -> None:
+        with self._lock:
+            self.state, self.failures, self._trial = "closed", 0, False
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.threshold:
+                if self.state != "open":
+                    self.opened += 1
+                self.state, self._opened_at, self._trial = "open", time.monotonic(), False
+
+
+# -------- guard: bucket + breaker + metrics ----------
+class Guard:
+    def __init__(self, name: str, bucket: Any, breaker: CircuitBreaker,
+                 failure_statuses: Tuple[int, ...] = FAILURE_STATUSES):
+        self.name, self.bucket, self.breaker = name, bucket, breaker
+        self.failure_statuses = failure_statuses
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "failures": 0, "short_circuited": 0, "throttled": 0, "rejected": 0,
+                         "fallbacks": 0}
+        self.throttle_wait_seconds = 0.0
+
+    def _count(self, name: str, wait: float = 0.0) -> None:
+        with self._lock:
+            self.counters[name] += 1
+            self.throttle_wait_seconds += wait
+
+    def _admit(self, max_wait: Optional[float]) -> float:
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise CircuitOpen(f"{self.name} circuit is open")
+        try:
+            wait = self.bucket.reserve(max_wait)
+        except Throttled:
+            self.breaker.release()
+            self._count("rejected")
+            raise
+        except BaseException:  # e.g. the SQLite bucket is locked; the call never ran
+            self.breaker.release()
+            raise
+        self._count("calls")
+        if wait > 0:
+            self._count("throttled", wait)
+        return wait
+
+    def before(self, max_wait: Optional[float] = None) -> None:
+        '''Raise CircuitOpen / Throttled, or wait for a token. Pair with success()/failure().'''
+        wait = self._admit(max_wait)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def abefore(self, max_wait: Optional[float] = None) -> None:
+        wait = self._admit(max_wait)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+
+    def success(self) -> None:
+        self.breaker.success()
+
+    def failure(self) -> None:
+        self._count("failures")
+        self.breaker.failure()
+
+    def record(self, status: int) -> None:
+        self.failure() if status in self.failure_statuses else self.success()
+
+    def call(self, fn: Callable[[], Any], fallback: Optional[Callable[[Exception], Any]] = None,
+             max_wait: Optional[float] = None) -> Any:
+        '''fn() under the guard. With a fallback, CircuitOpen / Throttled / errors return fallback(error).'''
+        try:
+            self.before(max_wait)
+        except (CircuitOpen, Throttled) as e:
+            if fallback is None:
+                raise
+            self._count("fallbacks")
+            return fallback(e)
+        try:
+            value = fn()
+        except Exception as e:
+            self.failure()
+            if fallback is None:
+                raise
+            self._count("fallbacks")
+            return fallback(e)
+        self.success()
+        return value
+
+    def fell_back(self) -> None:
+        '''Count a fallback served by the caller (for callers not using call()).'''
+        self._count("fallbacks")
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self.counters)
+            out["throttle_wait_seconds"] = round(self.throttle_wait_seconds, 3)
+        out.update(state=self.breaker.state, consecutive_failures=self.breaker.failures, opened=self.breaker.opened)
+        return out
+
+
+_guards: Dict[str, Guard] = {}
+_lock = threading.Lock()
+
+def guard(name: str) -> Guard:
+    '''Process-wide guard for a provider (limits from LIMITS, unlimited if not listed).'''
+    with _lock:
+        g = _guards.get(name)
+        if g is None:
+            rate, burst = LIMITS.get(name, (float("inf"), float("inf")))
+            if DB_PATH and rate != float("inf"):
+                bucket: Any = SqliteTokenBucket(DB_PATH, name, rate, burst)
+            else:
+                bucket = TokenBucket(rate, burst)
+            g = _guards[name] = Guard(name, bucket, CircuitBreaker(),
+                                      PROVIDER_FAILURE_STATUSES.get(name, FAILURE_STATUSES))
+        return g
+
+def metrics() -> Dict[str, Dict[str, Any]]:
+    with _lock:
+        guards = list(_guards.values())
+    return {g.name: g.metrics() for g in guards}
+
+def reset() -> None:
+    '''Drop every guard (tests, or after changing LIMITS / DB_PATH).'''
+    with _lock:
+        _guards.clear()
@@ -0,0 +1,158 @@
+# Process-wide in-memory cache for results the Streamlit app would otherwise rebuild
+# on every rerun and in every session: web research and the derived tables
+# (funnel diagnosis, KPI backsolve, budget allocation, concrete examples).
+# Entries are keyed by a hash of the normalized arguments (plus an optional salt),
+# expire after a TTL, and are evicted least-recently-used past a byte budget.
+# Cached values are shared between sessions, so callers must not mutate them.
+from __future__ import annotations
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+MAX_BYTES = int(os.environ.get("WEB_CONSULT_RESULT_CACHE_BYTES", str(64 * 1024 * 1024)))
+DEFAULT_TTL = float(os.environ.get("WEB_CONSULT_RESULT_CACHE_TTL", "900"))
+ENABLED = os.environ.get("WEB_CONSULT_RESULT_CACHE", "1") != "0"
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def make_key(namespace: str, *parts: Any, salt: Optional[str] = None) -> str:
+    '''Stable key for namespace + arguments; dict order and surrounding whitespace do not matter.'''
+    blob = json.dumps([namespace, _normalize(list(parts)), salt], sort_keys=True, ensure_ascii=False, default=repr)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:32]
+
+
+def _sizeof(value: Any) -> int:
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class ResultCache:
+    def __init__(self, max_bytes: int = MAX_BYTES, ttl: float = DEFAULT_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        size = _sizeof(value)
+        if size > self.max_bytes:  # would evict everything else; not worth keeping
+            return
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (expires, size, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: Optional[float] = None,
+                       keep: Optional[Callable[[Any], bool]] = None) -> Any:
+        '''
+        Cached value for key, or compute() stored under it (unless keep(value) is false,
+        e.g. for an empty result worth retrying). Concurrent misses for one key share a
+        single compute(): the others wait for its value (or its exception).
+        '''
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        with self._lock:
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return fut.result()
+        try:
+            value = self.get(key, missing)  # stored by a compute that finished after our miss
+            if value is missing:
+                value = compute()
+                if keep is None or keep(value):
+                    self.put(key, value, ttl)
+            fut.set_result(value)
+            return value
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _drop(self, key: str) -> None:
+        self._bytes -= self._entries.pop(key)[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses,
+                    "coalesced": self.coalesced}
+
+
+_cache: Optional[ResultCache] = None
+_lock = threading.Lock()
+
+def get_cache() -> Optional[ResultCache]:
+    '''Process-wide cache, or None when disabled with WEB_CONSULT_RESULT_CACHE=0.'''
+    global _cache
+    if not ENABLED:
+        return None
+    with _lock:
+        if _cache is None:
+            _cache = ResultCache()
+        return _cache
+
+
+def cached(namespace: str, compute: Callable[[], Any], *parts: Any, salt: Optional[str] = None,
+           ttl: Optional[float] = None, keep: Optional[Callable[[Any], bool]] = None) -> Any:
+    store = get_cache()
+    if store is None:
+        return compute()
+    return store.get_or_compute(make_key(namespace, *parts, salt=salt), compute, ttl, keep)
+
+
+def cached_call(fn: Callable[..., Any], *args: Any, salt: Optional[str] = None, ttl: Optional[float] = None) -> Any:
+    '''fn(*args) memoized across sessions by fn's name and the normalized arguments.'''
+    return cached(f"{fn.__module__}.{fn.__qualname__}", lambda: fn(*args), *args, salt=salt, ttl=ttl)
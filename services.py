@@ -1,20 +1,48 @@
 from __future__ import annotations
-from typing import Dict, Any
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
 import re
+import threading
+import time
 
-from .market_research import MarketResearch
+from .market_research import DEADLINE, MarketResearch
 from .adapters import apply_weight_patch, kpi_backsolve_from_benchmark
-from . import ai_core
+from . import ai_core, resilience, trend_matrix
+
+_research: Optional[MarketResearch] = None
+_research_lock = threading.Lock()
+
+def get_market_research() -> MarketResearch:
+    '''One MarketResearch per process; its providers come from providers.registry.'''
+    global _research
+    with _research_lock:
+        if _research is None:
+            _research = MarketResearch()
+        return _research
 
 def _extract_target_cv(text: str) -> int:
     m = re.search(r"(\d+)", text or "")
     return int(m.group(1)) if m else 10
 
-def consult(inputs: Dict[str, Any]) -> Dict[str, Any]:
+@contextmanager
+def _timed(timings: Dict[str, float], stage: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = round(time.perf_counter() - t0, 4)
+
+def consult(inputs: Dict[str, Any], timeouts: Optional[Dict[str, float]] = None,
+            deadline: float = DEADLINE) -> Dict[str, Any]:
     '''
     Orchestrate: research -> patch weights/kpi -> run ai_core -> return report dict.
+    Trends and search run concurrently while the local stages are computed. A provider
+    that misses its budget (timeouts, per provider) or the overall deadline is reported
+    under "degraded" and its section is built from empty data instead of failing.
     '''
-    mr = MarketResearch()
+    timings: Dict[str, float] = {}
+    with _timed(timings, "setup"):
+        mr = get_market_research()
 
     industry = inputs.get("industry","その他")
     keywords = inputs.get("keywords") or []
@@ -22,8 +50,23 @@ def consult(inputs: Dict[str, Any]) -> Dict[str, Any]:
     goal     = inputs.get("goal","今週：主要CV 10 件")
     objective= inputs.get("objective","")
 
-    trends = mr.get_trends(keywords)
-    weights_patch = mr.trends_to_weight_patch(trends)
+    calls = mr.call_providers(keywords, " ".join(keywords or [industry, "サービス", "比較"]),
+                              timeouts=timeouts, deadline=deadline, matrix=trend_matrix.available())
+
+    # KPI from benchmarks (local, overlaps with the provider calls)
+    with _timed(timings, "kpi"):
+        bench = mr.get_benchmarks(industry, channel)
+        target_cv = _extract_target_cv(goal + " " + objective)
+        kpi = kpi_backsolve_from_benchmark(target_cv, bench)
+
+    # Concrete actions & examples from ai_core
+    with _timed(timings, "actions"):
+        actions = ai_core.three_horizons_actions(inputs, tone=inputs.get("tone","やさしめ"))
+        examples = ai_core.concrete_examples(inputs, tone=inputs.get("tone","やさしめ"))
+
+    trends_res = calls.result("trends")
+    weights_patch = mr.trends_to_weight_patch(trends_res.value)  # TrendMatrix when numpy is installed
+    trends = trends_res.value.to_dict(keywords or None) if trend_matrix.available() else trends_res.value
 
     # Patch ai_core.INDUSTRY_WEIGHTS at runtime (non-destructive copy for this run)
     patched_weights = apply_weight_patch(ai_core.INDUSTRY_WEIGHTS, industry, weights_patch)
@@ -43,29 +86,30 @@ def consult(inputs: Dict[str, Any]) -> Dict[str, Any]:
         }
         return {"scores": scores, "bottleneck": min(scores, key=scores.get), "weights_used": w, "weights_patch": weights_patch}
 
-    diagnosis = _diagnose()
-
-    # KPI from benchmarks
-    bench = mr.get_benchmarks(industry, channel)
-    target_cv = _extract_target_cv(goal + " " + objective)
-    kpi = kpi_backsolve_from_benchmark(target_cv, bench)
-
-    # Concrete actions & examples from ai_core
-    actions = ai_core.three_horizons_actions(inputs, tone=inputs.get("tone","やさしめ"))
-    examples = ai_core.concrete_examples(inputs, tone=inputs.get("tone","やさしめ"))
+    with _timed(timings, "diagnosis"):
+        diagnosis = _diagnose()
 
     # Competitor creative ideas
-    serp = mr.get_competitor_snippets(" ".join(keywords or [industry, "サービス", "比較"]))
+    search_res = calls.result("search")
+    serp = search_res.value
     ads  = mr.normalize_ads(serp)
 
+    for res in (trends_res, search_res):
+        timings[res.name] = round(res.seconds, 4)
+    timings["total"] = round(time.perf_counter() - calls.started + timings["setup"], 4)
+    degraded = {res.name: res.error for res in (trends_res, search_res) if res.degraded}
+
     return {
         "research": {
-            "trends_provider": mr.trends_name,
-            "search_provider": mr.search_name,
+            "trends_provider": trends.get("provider"),  # None when the call failed or timed out
+            "search_provider": serp.get("provider"),
             "trends": trends,
             "ads_samples": ads,
             "benchmarks": bench.__dict__,
         },
+        "degraded": degraded,
+        "timings": timings,
+        "providers": resilience.metrics(),  # breaker state and throttle waits, process-wide
         "diagnosis": diagnosis,
         "kpi": kpi,
         "actions": actions,
@@ -15,8 +15,10 @@ try:
         INDUSTRY_WEIGHTS, CHANNEL_TIPS, GLOSSARY,
         humanize, smartify_goal, funnel_diagnosis, kpi_backsolve, explain_terms,
         budget_allocation, three_horizons_actions, concrete_examples, build_utm, dynamic_advice,
-        web_research_to_plan, web_research_to_copies
+        research_key, iter_research_stages
     )
+    import research_jobs
+    from result_cache import cached_call
     USING_PLUS = True
     HAS_PLAN = True
     HAS_WEB_COPIES = True
@@ -30,6 +32,9 @@ except ModuleNotFoundError:
     HAS_PLAN = False
     HAS_WEB_COPIES = False
 
+    def cached_call(fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
     def explain_terms(text: str, enabled: bool = True) -> str:
         return text
 
@@ -94,10 +99,8 @@ def ensure_session():
     st.session_state.setdefault("explain_terms", True)
     st.session_state.setdefault("friendly", True)
     st.session_state.setdefault("emoji_rich", True)
-    # 自動生成フラグ & ノンス
-    st.session_state.setdefault("auto_plan_done", False)
-    st.session_state.setdefault("auto_copies_done", False)
-    st.session_state.setdefault("auto_reels_done", False)
+    # 自動生成ジョブ（入力＋ノンスがキー）& ノンス
+    st.session_state.setdefault("auto_job", None)
     st.session_state.setdefault("gen_nonce", secrets.token_hex(4))
 ensure_session()
 
@@ -185,10 +188,7 @@ def render_input():
                 "score_referral": score_referral,
             }
             st.session_state.ad_started_at = None
-            # 自動生成フラグ & ノンスをリセット
-            st.session_state.auto_plan_done = False
-            st.session_state.auto_copies_done = False
-            st.session_state.auto_reels_done = False
+            # ノンスを更新（＝別ジョブとして生成し直す）
             st.session_state.gen_nonce = secrets.token_hex(4)
             goto("ad")
 
@@ -233,11 +233,14 @@ def render_ad():
 # =========================
 # 結果画面
 # =========================
+JOB_POLL_SECONDS = 0.7
+
 def render_result():
     if not st.session_state.inputs:
         goto("input")
     inputs = st.session_state.inputs
     tone = st.session_state.get("tone", "やさしめ")
+    pending = False
 
     st.markdown('<span class="step">STEP 3</span> あなたへの具体提案', unsafe_allow_html=True)
     st.markdown('<div class="card">', unsafe_allow_html=True)
@@ -264,9 +267,6 @@ def render_result():
     with col_ref1:
         if st.button("🔄 生成を更新"):
             st.session_state.gen_nonce = secrets.token_hex(4)
-            st.session_state.auto_plan_done = False
-            st.session_state.auto_copies_done = False
-            st.session_state.auto_reels_done = False
             st.rerun()
     with col_ref2:
         st.caption("※ 押すたびに表現・順番・ハッシュタグが変わります。")
@@ -278,27 +278,37 @@ def render_result():
         extra_urls_list: List[str] = []
         salt = st.session_state.get("gen_nonce")
 
-        # 実行計画：初回だけ自動生成
-        if not st.session_state.auto_plan_done:
-            with st.spinner("Webから情報収集→計画に落とし込み中（SNS強化）..."):
-                plan = web_research_to_plan(
-                    query=default_query,
-                    product=inputs.get("product","サービス"),
-                    industry=inputs.get("industry","その他"),
-                    extra_urls=extra_urls_list,
-                    max_items=8,
-                    tone=tone,
-                    salt=salt  # ★ ノンス混入
-                )
-            st.session_state["auto_plan"] = plan
-            st.session_state.auto_plan_done = True
+        # Web収集 → 計画 → コピー → リールを共有スレッドプールでバックグラウンド実行し、終わった段階から表示する。
+        # ジョブは入力＋ノンス単位（再実行では同じジョブを共有）。ノンスはセッションごとなので、
+        # 別セッションとの共有はクエリ単位のWeb収集（iter_research_stages 内で1回だけ実行）で行う。
+        product = inputs.get("product","サービス")
+        industry = inputs.get("industry","その他")
+        rkey = research_key(default_query, extra_urls_list, max_items=8)
+        jkey = research_jobs.job_key(rkey, product, industry, tone, salt)
+        finished = st.session_state.get("auto_job")
+        if finished is not None and finished["key"] == jkey:
+            stages, job_error, pending = finished["stages"], finished["error"], False
         else:
-            plan = st.session_state.get("auto_plan", {"sources":[], "today":[], "week":[], "month":[]})
+            job = research_jobs.submit(jkey, lambda: iter_research_stages(
+                default_query, product, industry, extra_urls=extra_urls_list, max_items=8,
+                tone=tone, salt=salt))  # ★ ノンス混入
+            pending = not job.done
+            stages, job_error = job.stages(), job.error
+            if not pending:
+                st.session_state["auto_job"] = {"key": jkey, "stages": stages, "error": job_error}
+        if job_error is not None:
+            st.warning(f"自動生成の途中でエラーが発生しました（{type(job_error).__name__}）。『🔄 生成を更新』で再実行できます。")
+
+        plan = stages.get("plan")
+        if plan is None:
+            st.info("⏳ Webから情報収集中（SNS強化）..." if pending else "実行計画を生成できませんでした。")
+            plan = {"sources":[], "today":[], "week":[], "month":[]}
 
         # 情報源
         if plan.get("sources"):
             st.caption("参照情報（抜粋）：" + " / ".join(
-                [f"[{s.get('title','source')}]({s.get('url')})" for s in plan["sources"] if s.get("url")]
+                [f"[{s.get('title','source')}]({s.get('url')})" + (f"（ほか{len(s['alternates'])}媒体）" if s.get("alternates") else "")
+                 for s in plan["sources"] if s.get("url")]
             ))
 
         # 実行計画の描画
@@ -333,23 +343,7 @@ def render_result():
 
         # SNS向けコピー：自動生成（SNS強化）
         if HAS_WEB_COPIES:
-            if not st.session_state.auto_copies_done:
-                with st.spinner("チャネル別コピー（SNS強化）を自動生成中..."):
-                    copies_res = web_research_to_copies(
-                        query=default_query,
-                        product=inputs.get("product","サービス"),
-                        industry=inputs.get("industry","その他"),
-                        extra_urls=extra_urls_list,
-                        max_items=8,
-                        tone=tone,
-                        sns_focus=True,
-                        include_reels=False,
-                        salt=salt  # ★ ノンス混入
-                    )
-                st.session_state["auto_copies"] = copies_res
-                st.session_state.auto_copies_done = True
-            else:
-                copies_res = st.session_state.get("auto_copies", {"copies":{}})
+            copies_res = stages.get("copies", {"copies":{}})
 
             st.markdown("### 🧩 チャネル別コピー（SNS強化・自動生成）")
             copies_all = copies_res.get("copies", {})
@@ -361,26 +355,13 @@ def render_result():
                         for i, c in enumerate(copies_all[k], start=1):
                             st.text_area(f"{k}（案 {i}）", c, height=90, key=f"copy_auto_{k}_{i}")
                 st.caption("※ SNSに特化して複数案を自動生成。ハッシュタグ/保存導線などを強化。")
+            elif pending and "copies" not in stages:
+                st.info("⏳ チャネル別コピー（SNS強化）を自動生成中...")
             else:
                 st.info("SNS向けコピーが生成されませんでした。入力内容（業種・商品）を具体化して再実行してください。")
 
             # Instagramリール（3カット＋字幕）：自動生成
-            if not st.session_state.auto_reels_done:
-                with st.spinner("Instagramリール（3カット＋字幕）案を自動生成中..."):
-                    reels_res = web_research_to_copies(
-                        query=default_query,
-                        product=inputs.get("product","サービス"),
-                        industry=inputs.get("industry","その他"),
-                        extra_urls=extra_urls_list,
-                        max_items=8,
-                        tone=tone,
-                        sns_focus=True,
-                        include_reels=True,
-                        salt=salt  # ★ ノンス混入
-                    )
-                st.session_state["auto_reels"] = reels_res.get("reels", [])
-                st.session_state.auto_reels_done = True
-            reels = st.session_state.get("auto_reels", [])
+            reels = stages.get("reels", [])
 
             st.markdown("### 🎬 Instagramリール構成（3カット＋字幕）")
             if reels:
@@ -390,11 +371,14 @@ def render_result():
                         st.markdown(f"**{cut}**")
                         st.text_area(f"{cut}（台本）", content, height=120, key=f"reel_{idx}_{cut}")
                 st.caption("※ 1秒目で掴み→価値提示→CTA の順。字幕は3〜8語/行・2行以内が目安。")
+            elif pending:
+                st.info("⏳ Instagramリール（3カット＋字幕）案を自動生成中...")
             else:
                 st.info("リール案が生成されませんでした。入力内容を見直してください。")
 
     # ファネル診断
-    diag = funnel_diagnosis(inputs)
+    # 派生テーブルは入力が同じなら再実行・別セッションでも作り直さない（result_cache）
+    diag = cached_call(funnel_diagnosis, inputs)
     st.markdown("### ファネル診断（AARRR）")
     df_scores = pd.DataFrame([diag["scores"]]).T.reset_index()
     df_scores.columns = ["ファネル", "スコア(0-100)"]
@@ -433,7 +417,7 @@ def render_result():
 
     # 具体例（テンプレ比較用）
     st.markdown("### 具体例（コピーテンプレ/トーク）")
-    ex = concrete_examples(inputs, tone)
+    ex = cached_call(concrete_examples, inputs, tone)
     def getkey(d, k, default=""):
         return d[k] if k in d else default
     st.write("**SNS投稿例**：", explain_terms(getkey(ex, "SNS投稿", ""), st.session_state.get("explain_terms", True)))
@@ -450,12 +434,12 @@ def render_result():
 
     # KPI逆算
     st.markdown("### KPI逆算（ゴールからバックキャスト）")
-    kpi_df = kpi_backsolve(inputs)
+    kpi_df = cached_call(kpi_backsolve, inputs)
     st.dataframe(kpi_df, hide_index=True, use_container_width=True)
 
     # 週予算の推奨配分
     st.markdown("### 週予算の推奨配分")
-    alloc_df = budget_allocation(inputs)
+    alloc_df = cached_call(budget_allocation, inputs)
     st.dataframe(alloc_df, hide_index=True, use_container_width=True)
 
     # ダウンロード（アクションCSV）
@@ -480,6 +464,11 @@ def render_result():
     if st.button("◀ 入力に戻る"):
         goto("input")
 
+    # 生成ジョブが走っている間はポーリング（ページ全体を描画してから再実行）
+    if pending:
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+
 # =========================
 # 画面遷移
 # =========================
@@ -0,0 +1,28 @@
+import pytest
+
+from web_consult_ai import ai_core_plus as core
+
+KEYPOINTS = ["来店 予約", "LINE", "クーポン", "電話", "新メニュー", "口コミ"]
+TITLES = ["美容室の新サービス - 地域新聞", "ヘアケア特集"]
+JOBS = [
+    ("リーフ", "美容室", "カジュアル", None),
+    ("リーフ", "美容室", "カジュアル", "nonce-1"),
+    ("クラウド会計", "SaaS", "ビジネス", None),
+    ("たこ焼き", "飲食", "ユーモラス", "x"),
+]
+
+
+@pytest.mark.parametrize("sns_focus", [False, True])
+@pytest.mark.parametrize("keypoints,titles", [(KEYPOINTS, TITLES), ([], []), (["LINE"], [])])
+def test_batch_matches_single_calls(keypoints, titles, sns_focus):
+    batch = core.web_enabled_channel_copies_batch(JOBS, keypoints, titles, n=5, sns_focus=sns_focus)
+    single = [core.web_enabled_channel_copies(p, i, keypoints, titles, tone, n=5, sns_focus=sns_focus, salt=salt)
+              for p, i, tone, salt in JOBS]
+    assert batch == single
+
+
+def test_batch_channels_and_counts():
+    out = core.web_enabled_channel_copies_batch(JOBS[:1], KEYPOINTS, TITLES, n=4, sns_focus=True)[0]
+    assert list(out) == ["SNS/Twitter(X)", "SNS/Instagram", "SNS/LinkedIn", "広告/Google", "広告/Meta",
+                         "メール/件名", "メール/本文", "LP/ヒーロー"]
+    assert len(out["SNS/Twitter(X)"]) == 6 and len(out["広告/Google"]) == 4
@@ -0,0 +1,43 @@
+import pytest
+
+from web_consult_ai import ai_core_plus as core
+from web_consult_ai import copy_templates as ct
+
+KEYPOINTS = ["来店 予約", "LINE", "クーポン", "電話"]
+
+
+@pytest.mark.parametrize("text", ["最高！🔥新発売✨ 💡ヒント！", "スゴいしラク！", ""])
+def test_tone_rules_match_chained_replace(text):
+    biz = ct.compile_tone(ct.TONES["copy"]["ビジネス"])
+    assert biz(text) == text.replace("！", "。").replace("🔥", "").replace("✨", "").replace("💡", "")
+    reel = ct.compile_tone(ct.TONES["reel"]["ビジネス"])
+    assert reel(text) == text.replace("スゴい", "注目ポイント").replace("ラク", "効率化")
+    assert ct.compile_tone(ct.TONES["copy"].get("カジュアル"))(text) == text
+
+
+def test_template_fields():
+    render = ct.compile_template("{product}/{industry}:{picks:・}|{first:なし}|{pick:1}{tag1}")
+    assert render("P", "I", ["a b", "c"], True) == "P/I:a b・c|a b|c #a"
+    assert ct.compile_template("{first:なし}")("P", "I", [], False) == "なし"
+    with pytest.raises(ValueError):
+        ct.compile_template("{nope}")
+
+
+def test_renderers_are_cached():
+    assert ct.copy_renderer("広告/Google", "ビジネス") is ct.copy_renderer("広告/Google", "ビジネス")
+    assert ct.reel_renderer("ユーモラス") is ct.reel_renderer("ユーモラス")
+
+
+def test_register_channel_and_tone(monkeypatch):
+    monkeypatch.setattr(ct, "CHANNELS", dict(ct.CHANNELS))
+    monkeypatch.setattr(ct, "TONES", {k: dict(v) for k, v in ct.TONES.items()})
+    before = core.web_enabled_channel_copies("P", "I", KEYPOINTS, [], "熱血", n=3)
+    ct.register_channel(ct.CopyChannel("SNS/Threads", 2, "{product}：{picks: × }！", sns=True))
+    ct.register_tone("copy", "熱血", ct.ToneRule(replace=(("！", "!!"),), suffix=" 🔥"))
+    try:
+        after = core.web_enabled_channel_copies("P", "I", KEYPOINTS, [], "熱血", n=3)
+    finally:
+        ct._invalidate()
+    assert list(after)[-1] == "SNS/Threads"
+    assert all(c.endswith("!! 🔥") for c in after["SNS/Threads"])
+    assert after["メール/件名"] == before["メール/件名"]  # untoned channel, earlier in the order: unchanged
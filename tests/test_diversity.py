@@ -0,0 +1,64 @@
+import itertools
+
+import pytest
+
+from web_consult_ai import ai_core_plus as core
+from web_consult_ai import diversity
+
+np = pytest.importorskip("numpy")
+
+KEYPOINTS = ["来店 予約", "LINE", "クーポン", "電話", "新メニュー", "口コミ", "駐車場", "カラー"]
+TITLES = ["美容室の新サービス - 地域新聞", "ヘアケア特集"]
+
+
+def _mean_similarity(texts):
+    S = diversity.similarity_matrix(texts)
+    pairs = list(itertools.combinations(range(len(texts)), 2))
+    return sum(S[i, j] for i, j in pairs) / len(pairs)
+
+
+def test_features_are_normalized():
+    X = diversity.hashed_features(["新メニュー登場", "a", "", "新メニュー登場"])
+    norms = np.linalg.norm(X, axis=1)
+    assert norms[0] == pytest.approx(1.0) and norms[2] == 0.0
+    assert np.allclose(X[0], X[3])
+
+
+def test_mmr_avoids_near_duplicates():
+    texts = ["新メニュー登場！予約はLINEで", "新メニュー登場！予約はLINEから", "新メニュー登場！予約は電話で",
+             "駐車場完備でアクセス便利", "口コミ評価4.8の実力"]
+    picked = diversity.mmr_select(texts, 3)
+    assert picked[0] == 0
+    assert set(picked) == {0, 3, 4}
+
+
+def test_mmr_edge_cases():
+    assert diversity.mmr_select([], 3) == []
+    assert sorted(diversity.mmr_select(["a", "b"], 5)) == [0, 1]
+    assert diversity.mmr_select(["x", "y", "z"], 2, relevance=[0.0, 0.0, 1.0])[0] == 2
+
+
+def test_fallback_without_numpy(monkeypatch):
+    monkeypatch.setattr(diversity, "np", None)
+    assert not diversity.available()
+    assert diversity.mmr_select(["a", "b", "c"], 2) == [0, 1]
+
+
+def test_diverse_copies_are_less_similar():
+    plain = core.web_enabled_channel_copies("リーフ", "美容室", KEYPOINTS, TITLES, n=5)
+    diverse = core.web_enabled_channel_copies("リーフ", "美容室", KEYPOINTS, TITLES, n=5, diverse=True)
+    assert list(diverse) == list(plain)
+    assert diverse == core.web_enabled_channel_copies("リーフ", "美容室", KEYPOINTS, TITLES, n=5, diverse=True)
+    for ch in plain:
+        assert len(diverse[ch]) == len(plain[ch])
+        assert len(set(diverse[ch])) == len(diverse[ch])
+    total = lambda out: sum(_mean_similarity(v) for v in out.values() if len(v) > 1)
+    assert total(diverse) < total(plain)
+
+
+def test_batch_diverse_matches_single_calls():
+    jobs = [("リーフ", "美容室", "カジュアル", None), ("クラウド会計", "SaaS", "ビジネス", "x")]
+    batch = core.web_enabled_channel_copies_batch(jobs, KEYPOINTS, TITLES, n=5, diverse=True)
+    single = [core.web_enabled_channel_copies(p, i, KEYPOINTS, TITLES, tone, n=5, salt=salt, diverse=True)
+              for p, i, tone, salt in jobs]
+    assert batch == single
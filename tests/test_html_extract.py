@@ -0,0 +1,37 @@
+import glob
+import os
+
+import pytest
+
+from web_consult_ai import html_extract
+
+PAGES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "fixtures", "pages", "*.html")))
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("backend", [b for b in html_extract.available_backends() if b != "bs4"])
+@pytest.mark.parametrize("page", PAGES, ids=os.path.basename)
+def test_backends_match_reference(backend, page):
+    if "bs4" not in html_extract.available_backends():
+        pytest.skip("reference backend (beautifulsoup4) not installed")
+    markup = _read(page)
+    expected = html_extract.extract_text(markup, "bs4")
+    assert expected
+    assert html_extract.extract_text(markup, backend) == expected
+
+
+def test_rules_are_applied():
+    pytest.importorskip("bs4")
+    text = html_extract.extract_text(_read(os.path.join(os.path.dirname(PAGES[0]), "news_article.html")), "bs4")
+    lines = text.splitlines()
+    assert all(len(ln) > html_extract.MIN_LINE_LEN for ln in lines)
+    assert "検索する" not in text and "関連記事" not in text
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        html_extract.get_backend("no-such-parser")
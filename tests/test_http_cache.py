@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+from web_consult_ai import html_extract, http_cache, http_client
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        srv = self.server
+        with srv.lock:
+            srv.hits[self.path] = srv.hits.get(self.path, 0) + 1
+        etag = '"v1"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        data = (self.path * 200).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.daemon_threads = True
+    srv.lock, srv.hits = threading.Lock(), {}
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv, f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    c = http_cache.HttpCache(str(tmp_path), max_bytes=10_000)
+    monkeypatch.setattr(http_cache, "ENABLED", True)
+    monkeypatch.setattr(http_cache, "_default", c)
+    return c
+
+
+def test_hit_then_conditional_revalidation(server, cache):
+    srv, base = server
+    first = http_client.get(f"{base}/a", cache="article")
+    again = http_client.get(f"{base}/a", cache="article")
+    assert again.content == first.content and srv.hits["/a"] == 1
+
+    entry = cache.lookup(http_cache.request_key("GET", f"{base}/a"))
+    entry.stored_at -= entry.ttl + 1
+    cache._atomic_write(cache._meta_path(entry.key), json.dumps(entry.__dict__).encode("utf-8"))
+    stale = http_client.get(f"{base}/a", cache="article")
+    assert stale.status == 200 and stale.content == first.content and srv.hits["/a"] == 2
+    s = cache.stats()
+    assert (s["hit"], s["revalidated"], s["miss"]) == (1, 1, 1)
+
+
+def test_truncated_body_only_answers_the_same_limit(server, cache):
+    srv, base = server
+    cut = http_client.get(f"{base}/long", cache="article", max_bytes=100)
+    assert cut.truncated and len(cut.content) == 100
+    full = http_client.get(f"{base}/long", cache="article")
+    assert not full.truncated and full.text == "/long" * 200
+    again = http_client.get(f"{base}/long", cache="article", max_bytes=100)
+    assert again.truncated and again.content == cut.content
+    assert srv.hits["/long"] == 2
+
+
+def test_async_path_shares_the_cache(server, cache):
+    srv, base = server
+    http_client.get(f"{base}/b", cache="rss")
+    res = http_client.run_sync(http_client.aget(f"{base}/b", cache="rss"))
+    assert res.status == 200 and srv.hits["/b"] == 1
+
+
+def test_lru_eviction_keeps_recent_entries(server, cache):
+    srv, base = server
+    for name in ("/e1", "/e2", "/e3"):
+        http_client.get(base + name, cache="article")  # ~600 bytes each
+    http_client.get(base + "/e1", cache="article")  # touch e1
+    for e in ("/e2", "/e3"):
+        m = cache._meta_path(http_cache.request_key("GET", base + e))
+        os.utime(m, (1, 1))
+    cache.max_bytes = 1000
+    cache.evict()
+    assert cache.lookup(http_cache.request_key("GET", base + "/e1")) is not None
+    assert cache.lookup(http_cache.request_key("GET", base + "/e2")) is None
+    assert cache.disk_usage() <= 1000
+
+
+def test_cleaned_text_is_cached_per_rules_version(server, cache, monkeypatch):
+    pytest.importorskip("bs4")
+    import web_consult_ai.ai_core_plus as core
+
+    srv, base = server
+    calls = []
+    real = core.clean_html
+    monkeypatch.setattr(core, "clean_html", lambda markup: calls.append(1) or real(markup))
+
+    first = core.scrape_and_clean(f"{base}/article")
+    assert first and core.scrape_and_clean(f"{base}/article") == first
+    assert srv.hits["/article"] == 1 and len(calls) == 1
+
+    monkeypatch.setattr(html_extract, "MIN_LINE_LEN", 4)
+    core.scrape_and_clean(f"{base}/article")
+    assert len(calls) == 2
+    assert cache.stats()["clean_hit"] == 1
+
+
+def test_unwritable_clean_cache_is_skipped(cache, monkeypatch):
+    if not html_extract.available_backends():
+        pytest.skip("no HTML parser installed")
+    import web_consult_ai.ai_core_plus as core
+
+    def read_only(*args):
+        raise OSError(30, "Read-only file system")
+
+    monkeypatch.setattr(http_cache.HttpCache, "_store", read_only)
+    markup = "<html><body><article><p>読み取り専用でも本文は抽出されるべきテキストです</p></article></body></html>"
+    res = http_client.HttpResponse(url="https://example.com/a", status=200, headers={},
+                                   content=markup.encode("utf-8"), encoding="utf-8")
+    texts, _, _ = core._clean_and_rank(["https://example.com/a"], [res])
+    assert texts[0] == html_extract.extract_text(markup)
+    assert core._clean_cached("https://example.com/a", res) == texts[0]
+    assert cache.stats()["store_error"] == 2
+
+
+def test_unwritable_cache_still_returns_the_response(server, cache, monkeypatch):
+    def no_space(path, data):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(http_cache.HttpCache, "_atomic_write", staticmethod(no_space))
+    srv, base = server
+    for _ in range(2):
+        res = http_client.get(f"{base}/full", cache="article")
+        assert res.status == 200 and res.text == "/full" * 200
+    assert srv.hits["/full"] == 2
+    cache.put_derived("search", b"{}", "q")
+    assert cache.get_derived("search", "q") is None
+    assert cache.stats()["store_error"] == 3
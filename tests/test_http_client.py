@@ -0,0 +1,102 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+from web_consult_ai import http_client
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        srv = self.server
+        with srv.lock:
+            srv.ports.add(self.client_address[1])
+            srv.hits[self.path] = srv.hits.get(self.path, 0) + 1
+            n = srv.hits[self.path]
+        status = 503 if self.path.startswith("/flaky") and n == 1 else 200
+        ctype, data = "text/plain; charset=utf-8", b"ok"
+        if self.path == "/big":
+            ctype, data = "text/html", b"<p>" + b"x" * (3 * 1024 * 1024)
+        elif self.path == "/pdf":
+            ctype, data = "application/pdf", b"%PDF-1.4" + b"\0" * 100_000
+        elif self.path == "/sjis":
+            ctype = "text/html"
+            data = '<html><head><meta charset="Shift_JIS"></head><body>集客コンサル</body></html>'.encode("shift_jis")
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client stopped reading at max_bytes
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(http_client, "RETRY_BACKOFF", 0.01)
+    monkeypatch.setattr(http_client, "_session", None)
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.daemon_threads = True
+    srv.lock, srv.ports, srv.hits = threading.Lock(), set(), {}
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv, f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_sync_keepalive_and_retry(server):
+    srv, base = server
+    for i in range(5):
+        assert http_client.get(f"{base}/p{i}").status == 200
+    assert len(srv.ports) == 1
+    assert http_client.get(f"{base}/flaky").status == 200
+    assert srv.hits["/flaky"] == 2
+
+
+def test_async_keepalive_and_retry(server):
+    pytest.importorskip("aiohttp")
+    srv, base = server
+
+    async def main():
+        for i in range(5):
+            assert (await http_client.aget(f"{base}/a{i}")).status == 200
+        assert (await http_client.aget(f"{base}/flaky-async")).status == 200
+
+    http_client.run_sync(main())
+    assert len(srv.ports) == 1
+    assert srv.hits["/flaky-async"] == 2
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_streaming_limits_and_charset(server, use_async):
+    srv, base = server
+    if use_async:
+        pytest.importorskip("aiohttp")
+        fetch = lambda url, **kw: http_client.run_sync(http_client.aget(url, **kw))
+    else:
+        fetch = http_client.get
+    big = fetch(f"{base}/big", max_bytes=64 * 1024)
+    assert big.truncated and len(big.content) == 64 * 1024
+    pdf = fetch(f"{base}/pdf", accept=("text/html",))
+    assert pdf.rejected and pdf.content == b""
+    page = fetch(f"{base}/sjis")
+    assert page.encoding == "shift_jis" and "集客コンサル" in page.text
+
+
+def test_charset_detection_skips_a_long_ascii_head():
+    pytest.importorskip("charset_normalizer")
+    head = b"<html><head>" + b'<link rel="preload" href="/static/app.js">' * 500 + b"</head>"
+    body = head + ("<p>東京の飲食店が口コミで集客を伸ばした三つの施策と、その効果を検証したレポートです。</p>" * 40).encode("shift_jis")
+    assert len(head) > 16384
+    enc = http_client.detect_charset({"Content-Type": "text/html"}, body)
+    assert enc is not None and enc != "utf-8"
+    assert "口コミで集客" in body.decode(enc)
+    assert http_client.detect_charset({}, b"<html>plain ascii</html>") == "utf-8"
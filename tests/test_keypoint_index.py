@@ -0,0 +1,50 @@
+from web_consult_ai import http_cache, keypoint_index, keypoints
+
+
+def _index(tmp_path):
+    return keypoint_index.KeypointIndex(str(tmp_path / "kp.sqlite3"))
+
+
+def test_document_frequencies_are_incremental(tmp_path):
+    index = _index(tmp_path)
+    assert index.add_documents([("u1", ["価格", "広告"]), ("u2", ["価格"])]) == 2
+    assert index.add_documents([("u1", ["価格", "広告"]), ("u3", ["価格", "価格"])]) == 1  # u1 again: skipped
+    assert index.doc_count() == 3
+    assert index.document_frequencies(["価格", "広告", "未知"]) == {"価格": 3, "広告": 1, "未知": 0}
+    # another connection (e.g. another process) sees the same data
+    assert _index(tmp_path).document_frequencies(["価格"]) == {"価格": 3}
+
+
+def test_rank_demotes_terms_common_across_documents(tmp_path, monkeypatch):
+    index = _index(tmp_path)
+    text = "キャンペーン。キャンペーン。キャンペーン。新機能。新機能。"
+    counts = keypoints.count_texts([text], tokenizer="script")
+    assert index.rank(counts, 2) == ["キャンペーン", "新機能"]  # cold index: raw frequency
+    monkeypatch.setattr(keypoint_index, "MIN_DOCS", 5)
+    index.add_documents((f"u{i}", ["キャンペーン"]) for i in range(30))
+    index.add_documents([("new", ["新機能"])])
+    assert index.rank(counts, 2) == ["新機能", "キャンペーン"]
+
+
+def test_lookups_use_the_primary_key_and_stay_bounded(tmp_path, monkeypatch):
+    index = _index(tmp_path)
+    index.add_documents((f"u{i}", [f"t{i}-{j}" for j in range(50)]) for i in range(200))
+    plan = index._conn().execute("EXPLAIN QUERY PLAN SELECT h, df FROM terms WHERE h IN (?, ?)", (1, 2)).fetchall()
+    assert all("PRIMARY KEY" in row[-1] and not row[-1].startswith("SCAN") for row in plan)
+
+    looked_up = []
+    real = index.document_frequencies
+    monkeypatch.setattr(index, "document_frequencies", lambda terms: looked_up.append(len(terms)) or real(terms))
+    text = "。".join(chr(0x4E00 + i) * 2 for i in range(3 * keypoint_index.CANDIDATES))
+    index.rank(keypoints.count_texts([text], tokenizer="script"), 10)
+    assert looked_up == [keypoint_index.CANDIDATES]  # one batch, never the whole vocabulary
+
+
+def test_index_follows_http_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(keypoint_index, "_indexes", {})
+    monkeypatch.setattr(http_cache, "_default", http_cache.HttpCache(str(tmp_path)))
+    monkeypatch.setattr(http_cache, "ENABLED", True)
+    index = keypoint_index.get_index("script")
+    assert index.path == str(tmp_path / "keypoints-script.sqlite3")
+    monkeypatch.setattr(http_cache, "ENABLED", False)
+    assert keypoint_index.get_index("script") is None
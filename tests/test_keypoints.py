@@ -0,0 +1,126 @@
+import glob
+import importlib
+import os
+import random
+import re
+from collections import Counter
+
+import pytest
+
+from web_consult_ai import html_extract, keypoints, word_segment
+
+PAGES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "fixtures", "pages", "*.html")))
+
+
+def _reference_counts(texts):
+    # the list-and-Counter implementation the streaming counter replaced
+    counts = Counter()
+    for text in texts:
+        t = re.sub(r"[^\wぁ-んァ-ヶ一-龠\- ]+", " ", text.replace("　", " "))
+        toks = [w for w in t.split() if len(w) >= 2]
+        counts.update(toks)
+        counts.update(" ".join(toks[i:i+2]) for i in range(len(toks) - 1))
+        counts.update(" ".join(toks[i:i+3]) for i in range(len(toks) - 2))
+    return counts
+
+
+def _reference_rank(counts, top_k=20):
+    scored = [(k, v) for k, v in counts.items() if k.lower() not in keypoints.STOP_WORDS and not re.fullmatch(r"\d+", k)]
+    scored.sort(key=lambda x: (-x[1], x[0].count(" ")))
+    return [k for k, _ in scored[:top_k]]
+
+
+def _fixture_texts():
+    if not html_extract.available_backends():
+        pytest.skip("no HTML parser installed")
+    out = []
+    for path in PAGES:
+        with open(path, encoding="utf-8") as f:
+            out.append(html_extract.extract_text(f.read()))
+    return out
+
+
+def test_matches_reference_on_fixtures():
+    texts = _fixture_texts() + ["「新商品」　発売！ 2025年 新商品 発売 こと\tlong-tail 新商品 発売"]
+    counts = keypoints.count_texts(texts, tokenizer="regex")
+    ref = _reference_counts(texts)
+    assert dict(counts.items()) == dict(ref)
+    assert keypoints.extract_keypoints(texts, 20, tokenizer="regex") == _reference_rank(ref, 20)
+    assert keypoints.extract_keypoints(texts, 500, tokenizer="regex") == _reference_rank(ref, 500)
+
+
+def test_merge_equals_single_pass():
+    texts = _fixture_texts()
+    merged = keypoints.merge_counts(keypoints.count_ngrams(t, tokenizer="script") for t in texts)
+    assert list(merged.items()) == list(keypoints.count_texts(texts, tokenizer="script").items())
+
+
+def test_bounded_table_keeps_heavy_hitters():
+    rng = random.Random(7)
+    vocab = [f"w{i:05d}" for i in range(20000)]
+    weights = [1.0 / (i + 1) for i in range(len(vocab))]   # Zipf-like
+    texts = [" ".join(rng.choices(vocab, weights, k=2000)) for _ in range(40)]
+    exact = keypoints.count_texts(texts, capacity=10**9, tokenizer="script")
+    bounded = keypoints.count_texts(texts, capacity=2000, tokenizer="script")
+    assert len(bounded) <= 2 * 2000
+    assert bounded.floor > 0
+    assert keypoints.rank_keypoints(bounded, 20) == keypoints.rank_keypoints(exact, 20)
+    for ngram, c in exact.items():
+        if c > bounded.floor:
+            assert c <= bounded.get(ngram) <= c + bounded.floor
+
+
+JA = "新商品のサブスクリプション価格を改定しました。サブスクリプション価格の比較はこちら！Web広告のCPAも改善。"
+
+
+def test_script_tokenizer_splits_japanese():
+    tokens = word_segment.tokenize(JA, "script")
+    assert tokens == ["新商品", "サブスクリプション", "価格", "改定", "サブスクリプション", "価格", "比較",
+                      "Web", "広告", "CPA", "改善"]
+    assert "" in list(word_segment.iter_tokens(JA, "script"))  # sentence boundaries
+
+
+def test_script_tokenizer_drops_stop_words_and_numbers():
+    assert word_segment.tokenize("今回の場合は 2025 年、THE 施策", "script") == ["施策"]
+
+
+def test_ngrams_restart_at_sentence_boundaries():
+    counts = keypoints.count_texts([JA], tokenizer="script")
+    assert counts.get("サブスクリプション 価格") == 2
+    assert counts.get("改定 サブスクリプション") == 0
+    assert keypoints.extract_keypoints([JA], 2, tokenizer="script") == ["サブスクリプション", "価格"]
+
+
+@pytest.mark.parametrize("backend", [b for b in ("fugashi", "janome") if b in word_segment.available_backends()])
+def test_dictionary_tokenizers_keep_nouns(backend):
+    tokens = word_segment.tokenize(JA, backend)
+    assert "価格" in tokens and "改定" in tokens
+    assert not {"の", "を", "しました", "は"} & set(tokens)
+
+
+def test_unknown_tokenizer():
+    with pytest.raises(ValueError):
+        word_segment.get_backend("nope")
+
+
+def test_fugashi_is_probed_on_first_use(monkeypatch):
+    fugashi = pytest.importorskip("fugashi")
+    calls = []
+
+    def no_dictionary(*args, **kwargs):
+        calls.append(1)
+        raise RuntimeError("no MeCab dictionary")
+
+    monkeypatch.setattr(fugashi, "Tagger", no_dictionary)
+    importlib.reload(word_segment)
+    try:
+        assert calls == []  # importing does not build a Tagger
+        monkeypatch.setattr(word_segment, "PREFERRED", None)
+        assert word_segment.backend_name() == "script"
+        assert word_segment.tokenize(JA) == word_segment.tokenize(JA, "script")
+        with pytest.raises(ValueError):
+            word_segment.get_backend("fugashi")
+        assert calls == [1]  # probed once, then cached
+    finally:
+        monkeypatch.undo()
+        importlib.reload(word_segment)
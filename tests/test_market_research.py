@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from web_consult_ai.market_research import MarketResearch
+from web_consult_ai.providers.trends_pytrends import DummyTrendsProvider
+from web_consult_ai.trend_matrix import TrendMatrix
+
+
+class SlowSearch:
+    def __init__(self, delay):
+        self.delay = delay
+        self.release = threading.Event()
+
+    def search(self, q, num=10):
+        self.release.wait(self.delay)
+        return {"provider": "slow", "query": q, "results": [{"title": "t", "link": "l", "snippet": "s"}], "ads": []}
+
+
+class BrokenTrends:
+    def get_interest(self, keywords, geo="JP", days=90):
+        raise ConnectionError("reset")
+
+
+def _research(search):
+    mr = MarketResearch()
+    mr.search = search
+    return mr
+
+
+def test_providers_run_concurrently():
+    class SlowTrends:
+        def get_interest(self, keywords, geo="JP", days=90):
+            time.sleep(0.3)
+            return {"provider": "slow", "data": {"k": {"avg": 1.0, "latest": 1}}}
+
+    mr = _research(SlowSearch(0.3))
+    mr.trends = SlowTrends()
+    t0 = time.perf_counter()
+    results = mr.call_providers(["k"], "q").results()
+    assert time.perf_counter() - t0 < 0.55
+    assert not any(r.degraded for r in results.values())
+    assert results["search"].value["results"] and results["trends"].value["data"]
+    assert results["search"].seconds >= 0.3
+
+
+def test_late_provider_is_degraded_not_fatal():
+    search = SlowSearch(5)
+    mr = _research(search)
+    t0 = time.perf_counter()
+    calls = mr.call_providers(["k"], "q", timeouts={"search": 0.2})
+    trends, res = calls.result("trends"), calls.result("search")
+    search.release.set()
+    assert time.perf_counter() - t0 < 1.0
+    assert not trends.degraded and trends.value["data"]
+    assert res.degraded and "timeout" in res.error
+    assert res.value["degraded"] and res.value["results"] == [] and mr.normalize_ads(res.value) == []
+    assert calls.result("search") is res
+
+
+def test_deadline_caps_every_provider():
+    search = SlowSearch(5)
+    mr = _research(search)
+    calls = mr.call_providers(["k"], "q", timeouts={"search": 10}, deadline=0.2)
+    t0 = time.perf_counter()
+    assert calls.result("search").degraded
+    search.release.set()
+    assert time.perf_counter() - t0 < 1.0
+
+
+def test_provider_error_is_degraded():
+    mr = _research(SlowSearch(0))
+    mr.trends = BrokenTrends()
+    res = mr.call_providers(["k"], "q").result("trends")
+    assert res.degraded and res.error.startswith("ConnectionError")
+    assert res.value["data"] == {} and mr.trends_to_weight_patch(res.value) == {}
+
+
+def test_trends_as_matrix():
+    pytest.importorskip("numpy")
+    mr = _research(SlowSearch(0))
+    mr.trends = DummyTrendsProvider()
+    res = mr.call_providers(["k1", "k2"], "q", matrix=True).result("trends")
+    assert isinstance(res.value, TrendMatrix) and res.value.keywords == ["k1", "k2"] and not res.degraded
+    assert mr.trends_to_weight_patch(res.value) == mr.trends_to_weight_patch(res.value.to_dict())
+
+    mr.trends = BrokenTrends()  # no get_matrix: converted from get_interest, which fails
+    res = mr.call_providers(["k"], "q", matrix=True).result("trends")
+    assert res.degraded and isinstance(res.value, TrendMatrix) and res.value.degraded
+    assert res.value.keywords == [] and mr.trends_to_weight_patch(res.value) == {}
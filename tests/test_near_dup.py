@@ -0,0 +1,47 @@
+import random
+
+from web_consult_ai import near_dup
+
+TITLES = [
+    "新型EV、来春に国内発売へ 価格は400万円台 - 日本経済新聞",
+    "新型EV、来春に国内発売へ　価格は400万円台 - Yahoo!ニュース",
+    "新型ＥＶ「来春に国内発売へ」価格は400万円台 | 朝日新聞デジタル",
+    "地方銀行の再編、次の焦点は - NHK",
+    "",
+    "新型EV 来春に国内発売 - 共同通信",
+]
+
+
+def _article(rng, n=600):
+    words = ["価格", "発売", "販売店", "予約", "キャンペーン", "顧客", "満足度", "改善", "導入", "事例",
+             "広告", "効果", "比較", "検討", "新型", "モデル", "性能", "充電", "航続", "距離"]
+    return "。".join(" ".join(rng.choices(words, k=8)) for _ in range(n // 8))
+
+
+def test_titles_cluster_across_publishers():
+    primary = near_dup.cluster_titles(TITLES)
+    assert primary[:5] == [0, 0, 0, 3, 4]
+    assert primary[5] in (0, 5)  # shorter rewrite: allowed either way, never merged with unrelated items
+
+
+def test_texts_cluster_with_boilerplate_differences():
+    rng = random.Random(3)
+    a, b = _article(rng), _article(rng)
+    copy = "転載記事です。" + a + "。関連記事はこちら"
+    edited = a.replace("価格", "値段", 1)
+    assert near_dup.cluster_texts([a, b, copy, "", edited]) == [0, 1, 0, 3, 0]
+
+
+def test_collapse_keeps_alternates():
+    items = [{"title": t, "url": f"https://s{i}.example/a", "source": f"s{i}.example"} for i, t in enumerate(TITLES[:4])]
+    out = near_dup.collapse(items, [0, 0, 0, 3])
+    assert [it["url"] for it in out] == ["https://s0.example/a", "https://s3.example/a"]
+    assert [a["source"] for a in out[0]["alternates"]] == ["s1.example", "s2.example"]
+    assert out[1]["alternates"] == []
+
+
+def test_simhash_numpy_and_python_agree(monkeypatch):
+    feats = near_dup.word_shingles(_article(random.Random(5)))
+    expected = near_dup.simhash(feats)
+    monkeypatch.setattr(near_dup, "np", None)
+    assert near_dup.simhash(feats) == expected
@@ -0,0 +1,58 @@
+import glob
+import os
+
+import pytest
+
+from web_consult_ai import html_extract, keypoints, parse_pool
+
+PAGES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "fixtures", "pages", "*.html")))
+
+
+def _items():
+    out = []
+    for path in PAGES:
+        with open(path, "rb") as f:
+            out.append(parse_pool.ParseItem(body=f.read(), encoding="utf-8"))
+    out.append(parse_pool.ParseItem(text="既に抽出済みの本文テキスト 既に抽出済みの本文テキスト"))
+    out.append(parse_pool.ParseItem())
+    return out
+
+
+def _reference(items):
+    texts = [it.text if it.text is not None else
+             html_extract.extract_text(it.body.decode("utf-8")) if it.body else "" for it in items]
+    return texts, keypoints.count_texts(texts)
+
+
+def test_in_process_matches_reference():
+    if not html_extract.available_backends():
+        pytest.skip("no HTML parser installed")
+    items = _items()
+    texts, counts, _ = parse_pool.parse_batch(items, workers=0)
+    ref_texts, ref_counts = _reference(items)
+    assert texts == ref_texts
+    assert list(counts.items()) == list(ref_counts.items())
+    assert keypoints.rank_keypoints(counts) == keypoints.extract_keypoints(ref_texts)
+
+
+def test_pool_matches_in_process():
+    if not html_extract.available_backends():
+        pytest.skip("no HTML parser installed")
+    items = _items()
+    expected = parse_pool.parse_batch(items, workers=0)
+    try:
+        got = parse_pool.parse_batch(items, workers=2, chunksize=1, min_batch=0, min_bytes=0)
+    finally:
+        parse_pool._drop_pool()
+    assert got[0] == expected[0]
+    assert list(got[1].items()) == list(expected[1].items())  # same insertion order -> same tie order
+
+
+def test_small_batches_stay_in_process(monkeypatch):
+    def boom(_):
+        raise AssertionError("pool should not start for a small batch")
+    monkeypatch.setattr(parse_pool, "_get_pool", boom)
+    texts, counts, _ = parse_pool.parse_batch([parse_pool.ParseItem(text="サンプル テキスト")], workers=4)
+    assert texts == ["サンプル テキスト"]
+    assert counts.get("サンプル テキスト") == 1
+
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from web_consult_ai.market_research import MarketResearch
+from web_consult_ai.providers import registry
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    registry.reset()
+    yield
+    registry.reset()
+
+
+def _counting_factory(monkeypatch, name, fail=False, delay=0.0):
+    calls = []
+
+    class Provider:
+        def __init__(self, *args):
+            calls.append(args)
+            time.sleep(delay)
+            if fail:
+                raise ImportError("No module named 'pytrends'")
+
+        def get_interest(self, keywords, geo="JP", days=90):
+            return {"provider": name, "data": {}}
+
+    monkeypatch.setitem(registry.FACTORIES, name, Provider)
+    return calls
+
+
+def test_instances_are_shared_and_built_once(monkeypatch):
+    calls = _counting_factory(monkeypatch, "duckduckgo", delay=0.05)
+    got = []
+    threads = [threading.Thread(target=lambda: got.append(registry.get("duckduckgo"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and len({id(p) for p in got}) == 1
+
+
+def test_failed_construction_is_cached_until_retry(monkeypatch):
+    calls = _counting_factory(monkeypatch, "pytrends", fail=True)
+    for _ in range(3):
+        assert registry.trends_provider()[0] == "dummy"
+    assert len(calls) == 1
+    with pytest.raises(registry.ProviderUnavailable) as e:
+        registry.get("pytrends")
+    assert isinstance(e.value.__cause__, ImportError)
+    monkeypatch.setattr(registry, "RETRY_SECONDS", 0.0)
+    registry.trends_provider()
+    assert len(calls) == 2
+
+
+def test_search_provider_follows_serpapi_key(monkeypatch):
+    monkeypatch.delenv("SERPAPI_KEY", raising=False)
+    assert registry.search_provider()[0] == "duckduckgo"
+    monkeypatch.setenv("SERPAPI_KEY", "k1")
+    name, first = registry.search_provider()
+    assert name == "serpapi" and first.api_key == "k1"
+    assert registry.search_provider()[1] is first
+    monkeypatch.setenv("SERPAPI_KEY", "k2")
+    assert registry.search_provider()[1].api_key == "k2"
+
+
+def test_long_lived_research_picks_up_recovered_provider(monkeypatch):
+    _counting_factory(monkeypatch, "pytrends", fail=True)
+    mr = MarketResearch()
+    assert mr.trends_name == "dummy"
+    _counting_factory(monkeypatch, "pytrends")
+    monkeypatch.setattr(registry, "RETRY_SECONDS", 0.0)
+    assert mr.trends_name == "pytrends"
+    assert mr.get_trends(["k"])["provider"] == "pytrends"
@@ -0,0 +1,59 @@
+import itertools
+import random
+import time
+
+import pytest
+
+from web_consult_ai import ai_core_plus as core
+
+
+def _pairs(scripts):
+    return [(s["カット1（掴み）"], s["カット2（価値提示）"]) for s in scripts]
+
+
+def _brute_force_count(product, keypoints, titles):
+    cands = core._reel_candidates(product, keypoints, titles)
+    # every order the shuffle can produce, then the same cut selection the generator uses
+    takes = [(list(p) * 3)[:3] for p in itertools.permutations(cands)] if len(cands) < 3 else \
+        [list(p) for p in itertools.permutations(cands, 2)]
+    return len({(t[0], t[1]) for t in takes})
+
+
+@pytest.mark.parametrize("k,expected", [(0, 6), (1, 1), (2, 2), (3, 6), (4, 12), (10, 90)])
+def test_variant_count_for_distinct_pools(k, expected):
+    kps = [f"kp{i}" for i in range(k)]
+    assert core.reel_variant_count("P", kps, []) == expected
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_random_pools_terminate_with_distinct_reels(seed):
+    rng = random.Random(seed)
+    vocab = ["a", "b", "c", "d", "e"]
+    kps = [rng.choice(vocab) for _ in range(rng.randrange(0, 7))]   # small pools, duplicates allowed
+    titles = [rng.choice(vocab) for _ in range(rng.randrange(0, 2))]
+    n = rng.randrange(1, 40)
+    total = core.reel_variant_count("P", kps, titles)
+    assert total == _brute_force_count("P", kps, titles)
+    scripts = core.generate_instagram_reel_script("P", "I", kps, titles, "ビジネス", n=n, salt=str(seed))
+    assert len(scripts) == min(n, total)
+    assert len(set(_pairs(scripts))) == len(scripts)
+
+
+def test_exhausts_the_space_when_asked_for_more():
+    scripts = core.generate_instagram_reel_script("P", "I", ["x", "y", "z"], [], n=100)
+    assert len(scripts) == 6
+
+
+def test_large_pool_is_fast_and_deterministic():
+    kps = [f"候補{i}" for i in range(2000)]
+    t0 = time.perf_counter()
+    a = core.generate_instagram_reel_script("P", "I", kps, [], n=50, salt="s")
+    assert time.perf_counter() - t0 < 2.0
+    assert len(a) == 50 and len(set(_pairs(a))) == 50
+    assert a == core.generate_instagram_reel_script("P", "I", kps, [], n=50, salt="s")
+
+
+def test_copy_variety_dedup_is_bounded():
+    calls = []
+    out = core._ensure_variety(lambda: calls.append(1) or "same", 5, max_retry=3)
+    assert out == ["same"] and len(calls) == 20
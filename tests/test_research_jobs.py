@@ -0,0 +1,101 @@
+import threading
+
+from web_consult_ai import ai_core_plus as core
+from web_consult_ai import research_jobs
+
+
+def _stages(calls, gate=None):
+    def make():
+        calls.append(1)
+        yield "a", 1
+        if gate is not None:
+            gate.wait(5)
+        yield "b", 2
+    return make
+
+
+def test_partial_stages_then_done():
+    gate, calls = threading.Event(), []
+    job = research_jobs.submit(research_jobs.job_key("partial"), _stages(calls, gate))
+    for _ in range(100):
+        if job.stages():
+            break
+        threading.Event().wait(0.01)
+    assert job.stages() == {"a": 1} and not job.done
+    gate.set()
+    assert job.wait(5)
+    assert job.stages() == {"a": 1, "b": 2} and job.error is None
+
+
+def test_same_key_is_coalesced():
+    gate, calls = threading.Event(), []
+    key = research_jobs.job_key("coalesce")
+    first = research_jobs.submit(key, _stages(calls, gate))
+    second = research_jobs.submit(key, _stages(calls, gate))
+    gate.set()
+    assert first is second and first.wait(5)
+    assert research_jobs.submit(key, _stages(calls)) is first  # finished jobs stay shareable
+    assert calls == [1]
+    assert research_jobs.get(key) is first
+
+
+def test_failed_job_is_not_shared():
+    key = research_jobs.job_key("fail")
+
+    def boom():
+        yield "a", 1
+        raise RuntimeError("x")
+
+    job = research_jobs.submit(key, boom)
+    assert job.wait(5)
+    assert isinstance(job.error, RuntimeError) and job.stages() == {"a": 1}
+    calls = []
+    retry = research_jobs.submit(key, _stages(calls))
+    assert retry is not job and retry.wait(5) and retry.error is None
+
+
+def test_expired_jobs_are_dropped(monkeypatch):
+    monkeypatch.setattr(research_jobs, "KEEP_SECONDS", 0.0)
+    key = research_jobs.job_key("expire")
+    calls = []
+    assert research_jobs.submit(key, _stages(calls)).wait(5)
+    assert research_jobs.submit(key, _stages(calls)).wait(5)
+    assert calls == [1, 1]
+
+
+def test_research_stages_match_direct_calls():
+    research = core.WebResearch(query="q", extra_urls=[], max_items=8, keypoints=["LINE", "クーポン", "口コミ"],
+                                sources=[{"title": "美容室の新サービス", "url": "https://example.com/a", "text": "本文"}])
+    stages = list(core.iter_research_stages("q", "リーフ", "美容室", max_items=8, tone="カジュアル",
+                                            salt="n1", research=research))
+    assert [s for s, _ in stages] == ["research", "plan", "copies", "reels"]
+    out = dict(stages)
+    assert out["research"] is research
+    assert out["plan"] == core._plan_from_research(research)
+    assert out["copies"]["copies"] == core.web_enabled_channel_copies(
+        "リーフ", "美容室", research.keypoints, research.web_titles, tone="カジュアル", n=5, sns_focus=True, salt="n1")
+    assert out["reels"] == core.generate_instagram_reel_script(
+        "リーフ", "美容室", research.keypoints, research.web_titles, "カジュアル", n=3, salt="n1")
+
+
+def test_research_runs_once_for_sessions_with_different_nonces(monkeypatch):
+    gate, calls = threading.Event(), []
+
+    def fake_research(query, extra_urls=None, max_items=10):
+        calls.append(query)
+        gate.wait(5)
+        return core.WebResearch(query=query, extra_urls=extra_urls or [], max_items=max_items, keypoints=["LINE"],
+                                sources=[{"title": "t", "url": "https://example.com/a", "text": "本文"}])
+
+    monkeypatch.setattr(core, "run_web_research", fake_research)
+    jobs = [research_jobs.submit(research_jobs.job_key("nonce", salt), lambda salt=salt: core.iter_research_stages(
+        "同時に走る2セッション", "リーフ", "美容室", max_items=8, salt=salt)) for salt in ("s1", "s2")]
+    for _ in range(100):
+        if calls:
+            break
+        threading.Event().wait(0.01)
+    threading.Event().wait(0.1)  # give the second job time to reach the research stage
+    gate.set()
+    assert all(j.wait(5) and j.error is None for j in jobs)
+    assert calls == ["同時に走る2セッション"]
+    assert jobs[0].stages()["research"] is jobs[1].stages()["research"]
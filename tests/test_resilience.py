@@ -0,0 +1,204 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from web_consult_ai import http_cache, resilience
+from web_consult_ai.providers.search_cache import CachedSearchProvider
+
+
+@pytest.fixture(autouse=True)
+def fresh_guards():
+    resilience.reset()
+    yield
+    resilience.reset()
+
+
+def test_token_bucket_burst_then_rate():
+    bucket = resilience.TokenBucket(rate=10.0, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.02)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.02)  # reservations queue up
+    with pytest.raises(resilience.Throttled):
+        bucket.reserve(max_wait=0.1)
+
+
+def test_sqlite_bucket_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "limits.sqlite")
+    a = resilience.SqliteTokenBucket(path, "serpapi", rate=1.0, burst=2)
+    b = resilience.SqliteTokenBucket(path, "serpapi", rate=1.0, burst=2)  # as another process would
+    assert a.reserve() == 0.0 and b.reserve() == 0.0
+    assert a.reserve() == pytest.approx(1.0, abs=0.05)
+    with pytest.raises(resilience.Throttled):
+        b.reserve(max_wait=0.5)
+    assert resilience.SqliteTokenBucket(path, "other", rate=1.0, burst=2).reserve() == 0.0
+
+
+def test_breaker_opens_fails_fast_and_recovers(monkeypatch):
+    monkeypatch.setitem(resilience.LIMITS, "flaky", (float("inf"), float("inf")))
+    g = resilience.guard("flaky")
+    g.breaker.threshold, g.breaker.reset_seconds = 2, 0.05
+    calls = []
+
+    def boom():
+        calls.append(1)
+        raise ConnectionError("down")
+
+    for _ in range(2):
+        assert g.call(boom, fallback=lambda e: "cached") == "cached"
+    assert g.breaker.state == "open"
+    assert g.call(boom, fallback=lambda e: type(e).__name__) == "CircuitOpen"
+    assert len(calls) == 2  # the open circuit did not call upstream
+
+    time.sleep(0.06)
+    assert g.breaker.allow() and not g.breaker.allow()  # a single half-open trial
+    g.breaker.release()
+    assert g.call(lambda: "live") == "live"
+    m = resilience.metrics()["flaky"]
+    assert m["state"] == "closed" and m["opened"] == 1 and m["short_circuited"] == 1
+    assert m["failures"] == 2 and m["fallbacks"] == 3
+
+
+def test_throttle_waits_are_reported(monkeypatch):
+    monkeypatch.setitem(resilience.LIMITS, "slow", (20.0, 1))
+    g = resilience.guard("slow")
+    t0 = time.perf_counter()
+    for _ in range(3):
+        g.call(lambda: None)
+    assert time.perf_counter() - t0 >= 0.08
+    m = resilience.metrics()["slow"]
+    assert m["calls"] == 3 and m["throttled"] == 2 and m["throttle_wait_seconds"] >= 0.08
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path.startswith("/slow"):
+            time.sleep(0.3)
+        self.server.hits += 1
+        data = b"fresh" if self.server.up else b"down"
+        self.send_response(200 if self.server.up else 500)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def provider_host(tmp_path, monkeypatch):
+    http_client = pytest.importorskip("web_consult_ai.http_client")
+    pytest.importorskip("requests")
+    monkeypatch.setattr(http_client, "RETRY_TOTAL", 0)
+    monkeypatch.setattr(http_client, "_session", None)
+    monkeypatch.setattr(http_cache, "ENABLED", True)
+    monkeypatch.setattr(http_cache, "_default", http_cache.HttpCache(str(tmp_path)))
+    monkeypatch.setitem(http_cache.TTL_BY_KIND, "search", -1)  # always revalidate
+    monkeypatch.setitem(resilience.LIMITS, "local", (float("inf"), float("inf")))
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.daemon_threads, srv.hits, srv.up = True, 0, True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield http_client, srv, f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_open_circuit_serves_cached_body(provider_host):
+    http_client, srv, base = provider_host
+    resilience.guard("local").breaker.threshold = 2
+    assert not http_client.get(f"{base}/q", cache="search", provider="local").stale
+    srv.up = False
+    for _ in range(2):  # 5xx: stale-if-error, and counted against the breaker
+        res = http_client.get(f"{base}/q", cache="search", provider="local")
+        assert res.text == "fresh" and res.stale
+    assert resilience.metrics()["local"]["state"] == "open"
+
+    hits = srv.hits
+    res = http_client.get(f"{base}/q", cache="search", provider="local")
+    assert res.text == "fresh" and res.stale
+    with pytest.raises(resilience.CircuitOpen):
+        http_client.get(f"{base}/uncached", cache="search", provider="local")
+    assert srv.hits == hits
+    assert http_cache.get_cache().stats()["stale_if_open"] == 1
+
+
+def test_search_miss_with_open_circuit_is_degraded(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, "ENABLED", True)
+    monkeypatch.setattr(http_cache, "_default", http_cache.HttpCache(str(tmp_path)))
+
+    class Down:
+        def search(self, q, num=10):
+            raise resilience.CircuitOpen("duckduckgo circuit is open")
+
+    out = CachedSearchProvider(Down(), "duckduckgo").search("カフェ 集客")
+    assert out["results"] == [] and out["degraded"] and "CircuitOpen" in out["error"]
+
+
+def test_article_timeouts_do_not_trip_the_feed_breaker(provider_host):
+    http_client, srv, base = provider_host
+    pytest.importorskip("bs4")
+    from web_consult_ai.ai_core_plus import scrape_many
+
+    assert http_client.get(f"{base}/rss", cache="rss", provider="google_news").status == 200
+    assert scrape_many([f"{base}/slow/{i}" for i in range(8)], timeout=0.05) == [""] * 8
+    m = resilience.metrics()
+    assert set(m) == {"google_news"}  # article URLs are never guarded
+    assert m["google_news"]["state"] == "closed" and m["google_news"]["failures"] == 0
+    assert http_client.get(f"{base}/rss", provider="google_news").status == 200
+
+
+def test_duckduckgo_block_pages_count_as_failures():
+    g = resilience.guard("duckduckgo")
+    g.record(403)
+    g.record(202)
+    assert g.breaker.failures == 2
+    other = resilience.guard("serpapi")
+    other.record(403)  # a client error, not an outage
+    assert other.breaker.failures == 0
+
+
+def test_malformed_limits_are_skipped():
+    assert resilience._parse_limits("serpapi=fast, duckduckgo=0.5/2,=1/1,pytrends=0/1") == {"duckduckgo": (0.5, 2.0)}
+
+
+def _half_open(g):
+    g.breaker.state, g.breaker._trial = "half_open", False
+
+
+def test_bucket_error_frees_the_half_open_trial():
+    g = resilience.guard("flaky")
+
+    class Locked:
+        def reserve(self, max_wait=None):
+            raise sqlite3.OperationalError("database is locked")
+
+    real, g.bucket = g.bucket, Locked()
+    _half_open(g)
+    with pytest.raises(sqlite3.OperationalError):
+        g.before()
+    g.bucket = real
+    assert g.call(lambda: "live") == "live"
+    assert g.breaker.state == "closed"
+
+
+def test_cancelled_wait_frees_the_half_open_trial(monkeypatch):
+    monkeypatch.setitem(resilience.LIMITS, "slow", (1.0, 1))
+    g = resilience.guard("slow")
+    g.bucket.reserve()  # the next token is a second away
+    _half_open(g)
+
+    async def main():
+        task = asyncio.ensure_future(g.abefore())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert g.breaker.allow()  # not stuck waiting on a trial that never ran
@@ -0,0 +1,81 @@
+from web_consult_ai import ai_core_plus as core
+from web_consult_ai import result_cache
+from web_consult_ai.result_cache import ResultCache, make_key
+
+
+def test_key_normalization():
+    a = {"industry": "美容", "goal": " 週予約20件 ", "channels": ["SNS", "広告"]}
+    b = {"channels": ["SNS", "広告"], "goal": "週予約20件", "industry": "美容"}
+    assert make_key("f", a) == make_key("f", b)
+    assert make_key("f", a) != make_key("g", a)
+    assert make_key("f", a) != make_key("f", a, salt="n1")
+    assert make_key("f", a) != make_key("f", dict(a, channels=["広告", "SNS"]))
+
+
+def test_ttl_expiry():
+    cache = ResultCache(ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2, ttl=0)
+    assert cache.get("a") == 1 and cache.get("b") is None
+    assert cache.stats()["entries"] == 1
+
+
+def test_byte_cap_evicts_least_recently_used():
+    value = "x" * 1000
+    cache = ResultCache(max_bytes=3500)
+    for k in "abc":
+        cache.put(k, value)
+    cache.get("a")
+    cache.put("d", value)
+    assert cache.get("b") is None
+    assert cache.get("a") == value and cache.get("d") == value
+    assert cache.stats()["bytes"] <= 3500
+    cache.put("huge", "y" * 10_000)
+    assert cache.get("huge") is None and cache.get("a") == value
+
+
+def test_get_or_compute_and_keep():
+    cache = ResultCache()
+    calls = []
+    compute = lambda: calls.append(1) or len(calls)
+    assert cache.get_or_compute("k", compute) == 1
+    assert cache.get_or_compute("k", compute) == 1
+    assert cache.get_or_compute("empty", compute, keep=lambda v: False) == 2
+    assert cache.get_or_compute("empty", compute, keep=lambda v: False) == 3
+
+
+def test_cached_call_shares_results(monkeypatch):
+    monkeypatch.setattr(result_cache, "_cache", ResultCache())
+    inputs = {"industry": "美容", "budget": 50000, "goal": "週予約20件"}
+    df = result_cache.cached_call(core.budget_allocation, inputs)
+    assert result_cache.cached_call(core.budget_allocation, dict(reversed(list(inputs.items())))) is df
+    assert result_cache.cached_call(core.budget_allocation, dict(inputs, budget=1)) is not df
+    assert result_cache.cached_call(core.concrete_examples, inputs, "やさしめ") == core.concrete_examples(inputs, "やさしめ")
+
+
+def test_disabled(monkeypatch):
+    monkeypatch.setattr(result_cache, "ENABLED", False)
+    calls = []
+    for _ in range(2):
+        result_cache.cached("ns", lambda: calls.append(1), "x")
+    assert calls == [1, 1]
+
+
+def test_research_is_shared_between_jobs(monkeypatch):
+    monkeypatch.setattr(result_cache, "_cache", ResultCache())
+    calls = []
+
+    def fake_research(query, extra_urls=None, max_items=10, **kw):
+        calls.append(query)
+        sources = [{"title": "t", "url": "https://example.com", "text": "本文"}] if query != "empty" else []
+        return core.WebResearch(query=query, extra_urls=list(extra_urls or []), sources=sources,
+                                keypoints=["LINE"], max_items=max_items)
+
+    monkeypatch.setattr(core, "run_web_research", fake_research)
+    for salt in ("s1", "s2"):
+        stages = dict(core.iter_research_stages("q", "リーフ", "美容室", max_items=8, salt=salt))
+        assert stages["research"].sources
+    assert calls == ["q"]
+    for _ in range(2):
+        list(core.iter_research_stages("empty", "リーフ", "美容室", max_items=8))
+    assert calls == ["q", "empty", "empty"]  # empty research is retried, not cached
@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("bs4")
+
+from web_consult_ai import http_cache, http_client
+from web_consult_ai.ai_core_plus import ascrape_many, scrape_many
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        srv = self.server
+        with srv.lock:
+            srv.active += 1
+            srv.peak = max(srv.peak, srv.active)
+        try:
+            u = urlparse(self.path)
+            time.sleep(float(parse_qs(u.query).get("delay", ["0"])[0]))
+            body = f"<html><body><article><p>記事本文 {u.path} のテキストです</p></article></body></html>"
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with srv.lock:
+                srv.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(http_cache, "ENABLED", False)
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+    srv.daemon_threads = True
+    srv.lock, srv.active, srv.peak = threading.Lock(), 0, 0
+    th = threading.Thread(target=srv.serve_forever, daemon=True)
+    th.start()
+    yield srv, f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_order_is_preserved_and_fetches_overlap(server):
+    srv, base = server
+    urls = [f"{base}/a{i}?delay={0.3 - i * 0.05:.2f}" for i in range(6)]
+    t0 = time.monotonic()
+    out = scrape_many(urls, max_workers=6, per_host=6, deadline=5)
+    assert time.monotonic() - t0 < 1.2
+    assert [f"/a{i}" in t for i, t in enumerate(out)] == [True] * 6
+
+
+def test_per_host_limit(server):
+    srv, base = server
+    urls = [f"{base}/p{i}?delay=0.2" for i in range(6)]
+    out = scrape_many(urls, max_workers=6, per_host=2, deadline=5)
+    assert all(out)
+    assert srv.peak <= 2
+
+
+def test_deadline_returns_what_finished(server):
+    srv, base = server
+    urls = [f"{base}/fast?delay=0", f"{base}/slow?delay=3", f"{base}/fast2?delay=0"]
+    t0 = time.monotonic()
+    out = scrape_many(urls, max_workers=3, per_host=3, deadline=0.8)
+    assert time.monotonic() - t0 < 2
+    assert "/fast" in out[0] and out[1] == "" and "/fast2" in out[2]
+
+
+def test_async_deadline_and_cancellation(server):
+    srv, base = server
+
+    async def main():
+        out = await ascrape_many([f"{base}/ok?delay=0", f"{base}/late?delay=3"], deadline=0.5)
+        assert "/ok" in out[0] and out[1] == ""
+        task = asyncio.ensure_future(ascrape_many([f"{base}/hang?delay=3"], deadline=None))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        t0 = time.monotonic()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert time.monotonic() - t0 < 0.5
+        # 同期ラッパーは動作中のループ内から呼んでも使える
+        assert "/sync" in scrape_many([f"{base}/sync?delay=0"])[0]
+        await http_client.aclose()
+
+    asyncio.run(main())
+
+
+def test_requests_fallback_without_aiohttp(server, monkeypatch):
+    srv, base = server
+    monkeypatch.setattr(http_client, "aiohttp", None)
+    out = scrape_many([f"{base}/r{i}?delay=0.1" for i in range(3)], per_host=3, deadline=5)
+    assert [f"/r{i}" in t for i, t in enumerate(out)] == [True] * 3
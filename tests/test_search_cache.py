@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+from web_consult_ai import http_cache
+from web_consult_ai.providers import registry
+from web_consult_ai.providers.search_cache import CachedSearchProvider, normalize_query
+
+
+class FakeSearch:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self.fail = False
+
+    def search(self, q, num=10, **kwargs):
+        self.calls.append((q, num, kwargs))
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("upstream down")
+        return {"provider": "fake", "query": q, "results": [{"title": f"{q} #{len(self.calls)}"}], "ads": []}
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, "ENABLED", True)
+    monkeypatch.setattr(http_cache, "_default", http_cache.HttpCache(str(tmp_path)))
+
+
+def test_normalized_query_hits_cache():
+    inner = FakeSearch()
+    p = CachedSearchProvider(inner, "fake")
+    first = p.search("飲食　サービス  比較", num=10)
+    assert p.search(" 飲食 サービス 比較 ", num=10) == first
+    assert normalize_query("ＳＥＯ  Tools") == "seo tools"
+    p.search("飲食 サービス 比較", num=5)
+    p.search("飲食 サービス 比較", num=10, engine="bing")
+    assert len(inner.calls) == 3
+    assert p.counters["hit"] == 1 and p.counters["miss"] == 3
+
+
+def test_shared_between_instances():
+    inner = FakeSearch()
+    CachedSearchProvider(inner, "fake").search("q")
+    CachedSearchProvider(inner, "fake").search("q")
+    CachedSearchProvider(inner, "other").search("q")
+    assert len(inner.calls) == 2
+
+
+def test_concurrent_identical_queries_are_coalesced():
+    inner = FakeSearch(delay=0.2)
+    p = CachedSearchProvider(inner, "fake")
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(p.search("同じ クエリ"))) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(inner.calls) == 1 and len(out) == 6 and all(o == out[0] for o in out)
+    assert p.counters["coalesced"] == 5
+
+
+def test_stale_while_revalidate():
+    inner = FakeSearch()
+    p = CachedSearchProvider(inner, "fake", fresh=0.05, stale=60)
+    first = p.search("q")
+    time.sleep(0.06)
+    inner.delay = 0.2
+    t0 = time.perf_counter()
+    assert p.search("q") == first  # stale value served without waiting for the refresh
+    assert time.perf_counter() - t0 < 0.1
+    deadline = time.time() + 2
+    while p.search("q") == first and time.time() < deadline:
+        time.sleep(0.05)
+    assert p.search("q")["results"][0]["title"] == "q #2"
+    assert p.counters["stale"] >= 1
+
+
+def test_failed_refresh_keeps_stale_and_errors_propagate():
+    inner = FakeSearch()
+    p = CachedSearchProvider(inner, "fake", fresh=0.0, stale=60)
+    first = p.search("q")
+    inner.fail = True
+    assert p.search("q") == first
+    deadline = time.time() + 2
+    while p.counters["refresh_error"] == 0 and time.time() < deadline:
+        time.sleep(0.02)
+    assert p.counters["refresh_error"] == 1 and p.search("q") == first
+    with pytest.raises(ConnectionError):
+        p.search("new query")
+
+
+def test_registry_wraps_search_providers(monkeypatch):
+    registry.reset()
+    monkeypatch.setenv("SERPAPI_KEY", "k1")
+    name, provider = registry.search_provider()
+    assert name == "serpapi" and isinstance(provider, CachedSearchProvider) and provider.api_key == "k1"
+    registry.reset()
+
+
+def test_degraded_results_are_not_stored():
+    inner = FakeSearch()
+    real = inner.search
+    inner.search = lambda q, num=10, **kw: dict(real(q, num, **kw), degraded=True, error="stale cached response")
+    p = CachedSearchProvider(inner, "fake")
+    assert p.search("q")["degraded"]
+    assert p.search("q")["degraded"] and len(inner.calls) == 2  # not re-stamped as fresh
+    assert p.counters["degraded"] == 2 and p.counters["hit"] == 0
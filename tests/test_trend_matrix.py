@@ -0,0 +1,59 @@
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from web_consult_ai import trend_matrix
+from web_consult_ai.market_research import MarketResearch
+from web_consult_ai.providers import DummyTrendsProvider
+from web_consult_ai.trend_matrix import TrendMatrix
+
+
+def _dummy_lists(keywords, geo="JP", days=90):
+    base, out = 50, {}
+    for i, k in enumerate(keywords or ["マーケティング"]):
+        slope = (i + 1) * 0.2
+        series = [max(0, min(100, int(base + slope * (t - days / 2)))) for t in range(days)]
+        out[k] = {"series": series, "avg": sum(series) / len(series), "latest": series[-1]}
+    return {"provider": "dummy", "geo": geo, "window_days": days, "keywords": keywords, "data": out}
+
+
+@pytest.mark.parametrize("keywords,days", [(["a", "b", "c"], 90), ([], 30), (["x"] * 2 + ["y"], 7), (["k%d" % i for i in range(40)], 365)])
+def test_dummy_matches_list_implementation(keywords, days):
+    assert DummyTrendsProvider().get_interest(keywords, days=days) == _dummy_lists(keywords, days=days)
+
+
+def test_dummy_without_numpy(monkeypatch):
+    monkeypatch.setattr(trend_matrix, "np", None)
+    assert DummyTrendsProvider().get_interest(["a", "b"], days=20) == _dummy_lists(["a", "b"], days=20)
+
+
+def test_round_trip_and_ragged_series():
+    trends = {"provider": "pytrends", "geo": "JP", "window_days": 5, "keywords": ["a", "b", "c"],
+              "data": {"a": {"series": [1, 2, 3, 4, 5]}, "b": {"series": [7, 8, 9]}, "c": {"series": []}}}
+    m = TrendMatrix.from_dict(trends)
+    assert m.keywords == ["a", "b"] and m.values.shape == (2, 5) and m.values.dtype == np.float32
+    out = m.to_dict(trends["keywords"])
+    assert out["data"]["b"] == {"series": [7, 8, 9], "avg": 8.0, "latest": 9}
+    assert out["data"]["a"]["avg"] == 3.0 and out["keywords"] == ["a", "b", "c"]
+
+
+def test_features_match_python():
+    rng = np.random.default_rng(0)
+    days = 28
+    week = np.array([0, 0, 0, 0, 0, 10, 10], dtype=float)
+    rows = [np.arange(days) * 0.5 + 20, np.tile(week, days // 7) + 30, rng.integers(0, 100, days).astype(float)]
+    m = TrendMatrix.from_series(["up", "weekly", "noise"], rows)
+    for i, y in enumerate(rows):
+        x = np.arange(days)
+        assert m.slope()[i] == pytest.approx(np.polyfit(x, y, 1)[0], rel=1e-4, abs=1e-6)
+        assert m.momentum(7)[i] == pytest.approx(y[-7:].mean() / y.mean(), rel=1e-5)
+    season = m.seasonality(7)
+    assert season[1] == pytest.approx(1.0) and season[0] < 0.2 and season[2] < 0.5
+
+
+def test_weight_patch_accepts_matrix():
+    trends = DummyTrendsProvider().get_interest(["a", "b", "c"], days=60)
+    assert MarketResearch.trends_to_weight_patch(TrendMatrix.from_dict(trends)) == \
+        pytest.approx(MarketResearch.trends_to_weight_patch(trends))
+    assert MarketResearch.trends_to_weight_patch(TrendMatrix.from_dict({"data": {}})) == {}
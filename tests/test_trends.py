@@ -0,0 +1,143 @@
+import json
+
+import pandas as pd
+import pytest
+
+from web_consult_ai import http_cache, resilience, trend_matrix
+from web_consult_ai.providers import trends_pytrends
+from web_consult_ai.providers.trends_pytrends import ANCHOR, PytrendsProvider
+
+LEVELS = {ANCHOR: 40.0, "ランチ": 10.0, "デリバリー": 25.0, "クーポン": 5.0, "カフェ": 30.0,
+          "テイクアウト": 8.0, "居酒屋": 20.0, "焼肉": 15.0, "寿司": 18.0, "ラーメン": 35.0}
+
+
+class FakeTrendReq:
+    '''Scales each request to its own peak of 100 (integers), like Google Trends.'''
+    def __init__(self):
+        self.payloads = []
+
+    def build_payload(self, kw_list, timeframe, geo):
+        assert len(kw_list) <= 5
+        self.payloads.append(list(kw_list))
+
+    def interest_over_time(self):
+        kws = self.payloads[-1]
+        raw = {k: [LEVELS[k] * (1 + 0.01 * t * (i + 1)) for t in range(30)] for i, k in enumerate(sorted(LEVELS)) if k in kws}
+        peak = max(max(v) for v in raw.values())
+        df = pd.DataFrame({k: [round(x * 100 / peak) for x in raw[k]] for k in kws})
+        df["isPartial"] = False
+        return df
+
+
+@pytest.fixture
+def provider(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, "ENABLED", True)
+    monkeypatch.setattr(http_cache, "_default", http_cache.HttpCache(str(tmp_path)))
+    monkeypatch.setitem(resilience.LIMITS, "pytrends", (float("inf"), float("inf")))
+    resilience.reset()
+    p = PytrendsProvider.__new__(PytrendsProvider)
+    p.pytrends = FakeTrendReq()
+    p._lock = trends_pytrends.threading.Lock()
+    return p
+
+
+def test_batches_of_five_with_anchor(provider):
+    kws = [k for k in LEVELS if k != ANCHOR]
+    out = provider.get_interest(kws, days=30)
+    assert list(out["data"]) == kws
+    assert len(provider.pytrends.payloads) == 3
+    assert all(p[-1] == ANCHOR and len(p) <= 5 for p in provider.pytrends.payloads)
+    assert max(max(v["series"]) for v in out["data"].values()) == 100
+    for v in out["data"].values():
+        assert v["latest"] == v["series"][-1] and v["avg"] == pytest.approx(sum(v["series"]) / len(v["series"]))
+
+
+def test_only_missing_keywords_are_fetched(provider):
+    provider.get_interest(["ランチ", "カフェ"], days=30)
+    provider.get_interest(["ランチ", "カフェ", "寿司"], days=30)
+    assert provider.pytrends.payloads == [["ランチ", "カフェ", ANCHOR], ["寿司", ANCHOR]]
+    provider.get_interest(["カフェ", "ランチ"], days=30)
+    assert len(provider.pytrends.payloads) == 2
+    provider.get_interest(["カフェ"], geo="US", days=30)  # other geo is another cache entry
+    assert len(provider.pytrends.payloads) == 3
+
+
+def test_series_from_separate_requests_are_comparable(provider, tmp_path, monkeypatch):
+    provider.get_interest(["ランチ"], days=30)
+    provider.get_interest(["ラーメン"], days=30)
+    merged = provider.get_interest(["ランチ", "ラーメン"], days=30)["data"]
+
+    monkeypatch.setattr(http_cache, "_default", http_cache.HttpCache(str(tmp_path / "fresh")))
+    together = provider.get_interest(["ランチ", "ラーメン"], days=30)["data"]
+    for k in ("ランチ", "ラーメン"):
+        assert max(abs(a - b) for a, b in zip(merged[k]["series"], together[k]["series"])) <= 2
+
+
+def test_expired_entries_are_refetched(provider, monkeypatch):
+    provider.get_interest(["ランチ"], days=30)
+    monkeypatch.setitem(http_cache.TTL_BY_KIND, "trends", -1)
+    provider.get_interest(["寿司"], days=30)
+    provider.get_interest(["寿司"], days=30)
+    assert len(provider.pytrends.payloads) == 3
+
+
+def test_without_cache_and_with_anchor_requested(provider, monkeypatch):
+    monkeypatch.setattr(http_cache, "ENABLED", False)
+    out = provider.get_interest([ANCHOR, "焼肉"], days=30)
+    assert set(out["data"]) == {ANCHOR, "焼肉"}
+    assert provider.pytrends.payloads == [["焼肉", ANCHOR]]
+
+
+def test_failed_batch_falls_back_to_cache_then_dummy(provider, monkeypatch):
+    provider.get_interest(["ランチ"], days=30)
+    monkeypatch.setattr(provider.pytrends, "interest_over_time", lambda: (_ for _ in ()).throw(ConnectionError("429")))
+    partial = provider.get_interest(["ランチ", "寿司"], days=30)
+    assert partial["degraded"] and list(partial["data"]) == ["ランチ"]
+    dummy = provider.get_interest(["寿司"], days=30)
+    assert dummy["degraded"] and dummy["provider"] == "dummy" and "ConnectionError" in dummy["error"]
+    assert resilience.metrics()["pytrends"]["fallbacks"] == 2
+
+
+def test_keyword_flattened_by_a_batch_mate_is_refetched(provider, monkeypatch):
+    monkeypatch.setitem(LEVELS, ANCHOR, 2.0)
+    monkeypatch.setitem(LEVELS, "ニッチ", 0.5)
+    out = provider.get_interest(["ラーメン", "ニッチ"], days=30)
+    assert provider.pytrends.payloads == [["ラーメン", "ニッチ", ANCHOR], ["ニッチ", ANCHOR]]
+    cached = json.loads(http_cache.get_cache().get_derived("trends", "ニッチ", "JP", "30d", ANCHOR))
+    assert len(set(cached)) > 10  # real shape on the anchor's scale, not Google's 0/1 floor
+    ratio = LEVELS["ニッチ"] / LEVELS["ラーメン"]
+    assert out["data"]["ニッチ"]["avg"] / out["data"]["ラーメン"]["avg"] == pytest.approx(ratio, rel=0.5)
+
+
+def test_keyword_below_a_dominant_anchor_is_left_out(provider, monkeypatch):
+    monkeypatch.setitem(LEVELS, ANCHOR, 4000.0)
+    out = provider.get_interest(["ランチ", "クーポン"], days=30)
+    assert out["data"] == {}
+    assert provider.pytrends.payloads == [["ランチ", "クーポン", ANCHOR]]  # nothing to re-batch against
+    assert provider.get_interest(["ランチ"], days=30)["data"] == {}
+    assert len(provider.pytrends.payloads) == 1  # remembered as too small, not refetched
+    assert http_cache.get_cache().get_derived("trends", "ランチ", "JP", "30d", ANCHOR) == b"null"
+    monkeypatch.setitem(http_cache.TTL_BY_KIND, "trends", -1)  # negative entries follow the trends TTL
+    provider.get_interest(["焼肉"], days=30)
+    provider.get_interest(["焼肉"], days=30)
+    assert len(provider.pytrends.payloads) == 3
+
+
+def test_batch_without_anchor_data_is_degraded_and_not_cached(provider, monkeypatch):
+    provider.get_interest(["ランチ"], days=30)
+    monkeypatch.setitem(LEVELS, ANCHOR, 0.0)
+    out = provider.get_interest(["ランチ", "寿司", "カフェ"], days=30)
+    assert out["degraded"] and "LookupError" in out["error"] and list(out["data"]) == ["ランチ"]
+    assert provider.pytrends.payloads[1:] == [["寿司", "カフェ", ANCHOR]]
+    assert http_cache.get_cache().get_derived("trends", "寿司", "JP", "30d", ANCHOR) is None
+    assert resilience.metrics()["pytrends"]["state"] == "closed"
+
+
+def test_matrix_matches_the_dict_path(provider, monkeypatch):
+    kws = [k for k in LEVELS if k != ANCHOR]
+    provider.get_interest(kws[:3], days=30)  # part from cache, part fetched
+    m = provider.get_matrix(kws, days=30)
+    assert isinstance(m, trend_matrix.TrendMatrix) and m.keywords == kws and not m.degraded
+    expected = m.to_dict(kws)
+    monkeypatch.setattr(trend_matrix, "np", None)  # pure-Python _renormalize
+    assert provider.get_interest(kws, days=30) == expected
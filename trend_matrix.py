@@ -0,0 +1,107 @@
+# Keyword x day trend series as one NumPy array, with vectorized features.
+# The built-in trends providers build one directly (get_matrix) and consult carries it
+# through to the weight patch; the dict format ({"data": {kw: {"series", "avg", "latest"}}})
+# remains for get_interest and the report. from_dict / to_dict convert losslessly for
+# integer series.
+# Series of different lengths (e.g. cache entries fetched on different days) are
+# right-aligned so the last column is always "latest", and padded with NaN.
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+
+def available() -> bool:
+    return np is not None
+
+
+@dataclass
+class TrendMatrix:
+    keywords: List[str]
+    values: "np.ndarray"          # float32, shape (len(keywords), days)
+    provider: Optional[str] = None
+    geo: Optional[str] = None
+    window_days: Optional[int] = None
+    degraded: bool = False        # provider fell back (cached subset or dummy data)
+    error: str = ""
+
+    # -------- conversion ----------
+    @classmethod
+    def from_series(cls, keywords: Sequence[str], series: Sequence[Sequence[float]], **meta: Any) -> "TrendMatrix":
+        days = max((len(s) for s in series), default=0)
+        values = np.full((len(series), days), np.nan, dtype=np.float32)
+        for i, s in enumerate(series):
+            if len(s):
+                values[i, days - len(s):] = s
+        return cls(list(keywords), values, **meta)
+
+    @classmethod
+    def from_dict(cls, trends: Dict[str, Any]) -> "TrendMatrix":
+        data = trends.get("data") or {}
+        kws = [k for k, v in data.items() if v.get("series")]
+        return cls.from_series(kws, [data[k]["series"] for k in kws], provider=trends.get("provider"),
+                               geo=trends.get("geo"), window_days=trends.get("window_days"),
+                               degraded=bool(trends.get("degraded")), error=trends.get("error", ""))
+
+    def to_dict(self, keywords: Optional[List[str]] = None) -> Dict[str, Any]:
+        '''The providers' dict format. keywords: the requested list to report (default: rows).'''
+        avg, latest = self.avg(), self.latest()
+        data = {}
+        for i, k in enumerate(self.keywords):
+            row = self.values[i]
+            data[k] = {"series": row[~np.isnan(row)].astype(int).tolist(), "avg": float(avg[i]),
+                       "latest": int(latest[i])}
+        out = {"provider": self.provider, "geo": self.geo, "window_days": self.window_days,
+               "keywords": keywords if keywords is not None else list(self.keywords), "data": data}
+        if self.degraded:
+            out.update(degraded=True, error=self.error)
+        return out
+
+    # -------- features (one value per keyword) ----------
+    def avg(self) -> "np.ndarray":
+        return np.nanmean(self.values, axis=1, dtype=np.float64) if self.values.size else np.zeros(len(self.keywords))
+
+    def latest(self) -> "np.ndarray":
+        return self.values[:, -1].astype(np.float64) if self.values.size else np.zeros(len(self.keywords))
+
+    def momentum(self, recent: int = 7) -> "np.ndarray":
+        '''Mean of the last `recent` days over the mean of the whole window (1.0 = flat).'''
+        if not self.values.size:
+            return np.ones(len(self.keywords))
+        tail = np.nanmean(self.values[:, -recent:], axis=1, dtype=np.float64)
+        return tail / (self.avg() + 1e-9)
+
+    def slope(self) -> "np.ndarray":
+        '''Least-squares slope per keyword, in index points per day.'''
+        y = self.values.astype(np.float64)
+        w = ~np.isnan(y)
+        y = np.where(w, y, 0.0)
+        x = np.broadcast_to(np.arange(y.shape[1], dtype=np.float64), y.shape)
+        n = np.maximum(w.sum(axis=1), 1)
+        xm = (x * w).sum(axis=1) / n
+        ym = y.sum(axis=1) / n
+        dx = (x - xm[:, None]) * w
+        return (dx * (y - ym[:, None])).sum(axis=1) / np.maximum((dx * dx).sum(axis=1), 1e-9)
+
+    def seasonality(self, period: int = 7) -> "np.ndarray":
+        '''
+        Share of each keyword's variance explained by the day-of-period profile
+        (0 = no weekly pattern, 1 = purely periodic). Needs two full periods.
+        '''
+        k, days = self.values.shape
+        cycles = days // period
+        if cycles < 2:
+            return np.zeros(k)
+        y = self.values[:, days - cycles * period:].astype(np.float64).reshape(k, cycles, period)
+        profile = np.nanmean(y, axis=1)
+        total = np.nanvar(y.reshape(k, -1), axis=1)
+        explained = np.nanmean((profile - np.nanmean(y.reshape(k, -1), axis=1)[:, None]) ** 2, axis=1)
+        return np.where(total > 1e-9, explained / np.maximum(total, 1e-9), 0.0)
+
+    def features(self) -> Dict[str, "np.ndarray"]:
+        return {"avg": self.avg(), "latest": self.latest(), "momentum": self.momentum(),
+                "slope": self.slope(), "seasonality": self.seasonality()}
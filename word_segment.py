@@ -0,0 +1,156 @@
+# Word segmentation for keypoint extraction, with pluggable backends.
+# Japanese has no spaces, so splitting on whitespace turns whole sentences into
+# single tokens. Backends here yield content words only (nouns, loanwords, Latin
+# words) and "" at sentence boundaries, where n-gram windows restart.
+#   "fugashi" : MeCab morphological analysis, preferred when installed (with a dictionary)
+#   "script"  : dependency-free default; splits on script changes (kanji / katakana /
+#               Latin runs are kept, hiragana runs are function words)
+#   "janome"  : pure-Python morphological analysis; accurate but slow, so only on request
+#   "regex"   : the original whitespace split, kept for comparison
+from __future__ import annotations
+import os
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional
+
+try:
+    import fugashi
+except Exception:
+    fugashi = None
+try:
+    from janome.tokenizer import Tokenizer as JanomeTokenizer
+except Exception:
+    JanomeTokenizer = None
+
+STOP_WORDS = frozenset([
+    # ja
+    "こと", "ため", "よう", "する", "して", "です", "ます", "これ", "それ", "ここ", "もの", "あり", "ない",
+    "さん", "など", "とき", "ところ", "そこ", "どこ", "なに", "場合", "今回", "以上", "以下", "一方",
+    "自分", "皆様", "皆さん", "方法", "ページ", "サイト", "トップ", "ホーム", "メニュー", "ログイン",
+    # en
+    "of", "to", "in", "on", "at", "by", "is", "be", "or", "an", "as", "it", "we", "if", "no", "so",
+    "the", "and", "for", "with", "that", "this", "from", "are", "was", "were", "you", "your", "our",
+    "have", "has", "had", "not", "but", "can", "will", "all", "more", "about", "into", "its", "it's",
+    "they", "their", "there", "what", "when", "which", "who", "how", "also", "than", "then", "been",
+    "http", "https", "www", "com",
+])
+MIN_LEN = 2
+
+_NUMERIC = re.compile(r"[\d.,\-]+")
+_RUNS = re.compile(
+    r"(?P<kanji>[一-龠々〆ヶ]+)"
+    r"|(?P<kata>[ァ-ヺー]+)"
+    r"|(?P<latin>[A-Za-z0-9][A-Za-z0-9\-+&']*)"
+    r"|(?P<stop>[。！？!?\n]+)"
+)
+_SENTENCE_END = re.compile(r"[。！？!?\n]")
+_LEGACY_NON_WORD = re.compile(r"[^\wぁ-んァ-ヶ一-龠\-]+")
+
+
+def _keep(w: str) -> bool:
+    return len(w) >= MIN_LEN and w.lower() not in STOP_WORDS and not _NUMERIC.fullmatch(w)
+
+
+# -------- script runs (no dependencies) ----------
+def _tokens_script(text: str) -> Iterator[str]:
+    for m in _RUNS.finditer(unicodedata.normalize("NFKC", text)):
+        if m.lastgroup == "stop":
+            yield ""
+            continue
+        w = m.group()
+        if m.lastgroup == "kata":
+            w = w.strip("ー")
+        if _keep(w):
+            yield w
+
+
+# -------- original whitespace split ----------
+def _tokens_regex(text: str) -> Iterator[str]:
+    for w in _LEGACY_NON_WORD.split(text):
+        if len(w) >= 2:
+            yield w
+
+
+# -------- dictionary backends ----------
+# Taggers are expensive to build and not thread-safe, so there is one per thread.
+_local = threading.local()
+
+_FUGASHI_SKIP = ("数詞", "助動詞語幹")   # unidic pos2
+_JANOME_SKIP = ("非自立", "代名詞", "数", "接尾")
+
+
+def _tokens_fugashi(text: str) -> Iterator[str]:
+    tagger = getattr(_local, "fugashi", None)
+    if tagger is None:
+        tagger = _local.fugashi = fugashi.Tagger()
+    for line in _SENTENCE_END.split(unicodedata.normalize("NFKC", text)):
+        for word in tagger(line):
+            f = word.feature
+            if f.pos1 == "名詞" and f.pos2 not in _FUGASHI_SKIP and _keep(word.surface):
+                yield word.surface
+        yield ""
+
+
+def _tokens_janome(text: str) -> Iterator[str]:
+    tok = getattr(_local, "janome", None)
+    if tok is None:
+        tok = _local.janome = JanomeTokenizer()
+    for line in _SENTENCE_END.split(unicodedata.normalize("NFKC", text)):
+        if not line.strip():
+            continue
+        for t in tok.tokenize(line):
+            pos = t.part_of_speech.split(",")
+            if pos[0] == "名詞" and pos[1] not in _JANOME_SKIP and _keep(t.surface):
+                yield t.surface
+        yield ""
+
+
+@lru_cache(maxsize=None)
+def _fugashi_works() -> bool:
+    # Probed on first use rather than at import: building a Tagger loads the dictionary.
+    try:
+        _local.fugashi = fugashi.Tagger()  # needs a dictionary package (unidic-lite / unidic) as well
+        return True
+    except Exception:
+        return False
+
+
+BACKENDS: Dict[str, Callable[[str], Iterator[str]]] = {}
+if fugashi is not None:
+    BACKENDS["fugashi"] = _tokens_fugashi
+BACKENDS["script"] = _tokens_script
+if JanomeTokenizer is not None:
+    BACKENDS["janome"] = _tokens_janome
+BACKENDS["regex"] = _tokens_regex
+
+# WEB_CONSULT_TOKENIZER pins a backend; otherwise the first installed one above is used.
+PREFERRED = os.environ.get("WEB_CONSULT_TOKENIZER") or None
+
+
+def available_backends() -> List[str]:
+    return [n for n in BACKENDS if n != "fugashi" or _fugashi_works()]
+
+
+def get_backend(name: Optional[str] = None) -> Callable[[str], Iterator[str]]:
+    return BACKENDS[backend_name(name)]
+
+
+def backend_name(name: Optional[str] = None) -> str:
+    name = name or PREFERRED
+    available = available_backends()
+    if name:
+        if name not in available:
+            raise ValueError(f"tokenizer {name!r} is not installed (available: {', '.join(available)})")
+        return name
+    return available[0]
+
+
+def iter_tokens(text: str, backend: Optional[str] = None) -> Iterator[str]:
+    '''Content words of text in order; "" marks a sentence boundary.'''
+    return get_backend(backend)(text)
+
+
+def tokenize(text: str, backend: Optional[str] = None) -> List[str]:
+    return [w for w in iter_tokens(text, backend) if w]